@@ -0,0 +1,115 @@
+import datetime
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _aware(ts: datetime.datetime) -> datetime.datetime:
+    """
+    created_at naive (waktu lokal: SessionStore lama, SQLite) -> aware, supaya turn
+    dari sesi dan dari kolom timestamptz chat_history bisa dibandingkan.
+    """
+    return ts if ts.tzinfo else ts.astimezone()
+
+
+def _format_turn(chat: Dict[str, Any]) -> str:
+    return f"User: {chat['message']}\nBot: {chat['answer']}"
+
+
+class RollingSummary:
+    """
+    Ringkasan bergulir untuk turn yang sudah keluar dari jendela verbatim.
+
+    Setiap turn dilipat sekali saja (dicatat lewat created_at turn terakhir yang
+    sudah dilipat), menjadi satu baris pendek. Baris tertua dibuang saat total
+    melebihi max_chars, sehingga biaya update per turn konstan.
+    """
+
+    def __init__(self, max_chars: int = 1000, line_chars: int = 120):
+        self.max_chars = max_chars
+        self.line_chars = line_chars
+        self.lines = deque()  # (created_at, baris)
+        self.chars = 0
+        self.folded_until = None
+
+    def fold(self, chats: List[Dict[str, Any]]) -> int:
+        """Lipat turn (urut kronologis) yang belum pernah dilipat; kembalikan jumlah turn baru."""
+        folded = 0
+        for chat in chats:
+            created_at = _aware(chat["created_at"])
+            if self.folded_until is not None and created_at <= self.folded_until:
+                continue
+            line = f"- {_clip(chat['message'], self.line_chars // 2)} -> {_clip(chat['answer'], self.line_chars // 2)}"
+            self.lines.append((created_at, line))
+            self.chars += len(line) + 1
+            self.folded_until = created_at
+            folded += 1
+        while self.lines and self.chars > self.max_chars:
+            _, line = self.lines.popleft()
+            self.chars -= len(line) + 1
+        return folded
+
+    def render(self, since: Optional[datetime.datetime] = None) -> str:
+        """Baris ringkasan (opsional hanya yang created_at >= since, sama dengan jendela 24 jam)."""
+        lines = []
+        cutoff = _aware(since) if since is not None else None
+        for created_at, line in self.lines:
+            if cutoff is not None and created_at < cutoff:
+                continue
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class ContextBuilder:
+    """
+    Susun prompt chat dengan budget karakter (kira-kira 4 karakter per token).
+
+    Turn terbaru dipertahankan verbatim (urut kronologis) selama muat di
+    max_chars; turn yang lebih lama dilipat ke RollingSummary milik sesi user
+    sehingga tidak dihitung ulang setiap turn.
+    """
+
+    def __init__(self, max_chars: int = 4000, summary_max_chars: int = 1000,
+                 summary_line_chars: int = 120, hours: int = 24):
+        self.max_chars = max_chars
+        self.summary_max_chars = summary_max_chars
+        self.summary_line_chars = summary_line_chars
+        self.hours = hours
+
+    def new_summary(self) -> RollingSummary:
+        return RollingSummary(self.summary_max_chars, self.summary_line_chars)
+
+    def split(self, recent_chats: List[Dict[str, Any]]):
+        """(turn lama, turn verbatim) dari recent_chats newest-first, keduanya kronologis."""
+        verbatim = []
+        used = 0
+        for i, chat in enumerate(recent_chats):
+            size = len(_format_turn(chat)) + 1
+            if used + size > self.max_chars:
+                return list(reversed(recent_chats[i:])), list(reversed(verbatim))
+            verbatim.append(chat)
+            used += size
+        return [], list(reversed(verbatim))
+
+    def build(self, user_msg: str, recent_chats, summary: Optional[RollingSummary] = None) -> str:
+        if not recent_chats:
+            return user_msg
+        older, verbatim = self.split(recent_chats)
+        if summary is None:
+            summary = self.new_summary()
+        if older:
+            summary.fold(older)
+
+        since = datetime.datetime.now() - datetime.timedelta(hours=self.hours)
+        sections = []
+        summary_text = summary.render(since)
+        if summary_text:
+            sections.append(f"Ringkasan percakapan sebelumnya:\n{summary_text}")
+        if verbatim:
+            sections.append("Konteks: " + "\n".join(_format_turn(c) for c in verbatim))
+        sections.append(f"Pertanyaan: {user_msg}")
+        return "\n".join(sections)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+class ChatHistoryWriter:
+    """
+    Write-behind untuk insert chat_history.
+
+    Request hanya memasukkan row ke antrean (await enqueue); task background
+    mengumpulkan row sampai batch_size atau flush_interval_ms lalu menulis
+    semuanya dengan satu insert multi-row. Antrean dibatasi max_queue: saat
+    penuh, enqueue menunggu (backpressure) alih-alih menumpuk memori.
+    close() menulis semua row yang tersisa sebelum berhenti.
+
+    Jika insert_batch tetap gagal setelah max_retries, batch dikirim ke
+    fallback (insert sync, dijalankan di thread) bila ada; jika fallback juga
+    gagal, setiap row yang dibuang di-log di level error supaya history tidak
+    hilang tanpa jejak.
+    """
+
+    def __init__(self, insert_batch: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+                 batch_size: int = 100, flush_interval_ms: float = 50.0, max_queue: int = 10000,
+                 max_retries: int = 3, fallback: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.insert_batch = insert_batch
+        self.fallback = fallback
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+
+        self._queue = None
+        self._task = None
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.fallback_written = 0
+        self.failed = 0
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def enqueue(self, row: Dict[str, Any]):
+        self._ensure_task()
+        await self._queue.put(row)
+        self.enqueued += 1
+
+    async def _collect(self, first) -> tuple:
+        loop = asyncio.get_running_loop()
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # Antrean kosong: tunggu row berikutnya sampai sisa flush_interval
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = await self._collect(first)
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self.insert_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                logging.error(f"Gagal menulis {len(batch)} chat_history (percobaan {attempt}): {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.1 * attempt)
+        if self.fallback is not None:
+            try:
+                await asyncio.to_thread(self.fallback, batch)
+                self.fallback_written += len(batch)
+                logging.warning(f"{len(batch)} chat_history ditulis lewat insert sync setelah write-behind gagal")
+                return
+            except Exception as e:
+                logging.error(f"Insert sync fallback {len(batch)} chat_history gagal: {e}")
+        self.failed += len(batch)
+        for row in batch:
+            logging.error(f"chat_history dibuang: {row!r}")
+
+    async def close(self):
+        """Drain antrean (dipanggil saat shutdown FastAPI lewat close_connection_async)."""
+        if self._task is not None and not self._task.done():
+            await self._queue.put(_STOP)
+            await self._task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "fallback_written": self.fallback_written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": self.written / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue
+        }
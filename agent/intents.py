@@ -0,0 +1,97 @@
+import re
+from typing import Dict, FrozenSet, List, Optional
+
+# Tabel keyword per intent (substring, case-insensitive), sama dengan daftar
+# keyword lama di method is_*_related ChatRouter.
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "simulation": ["simulasi", "prediksi", "produksi", "minggu", "target", "kapasitas", "delay"],
+    "weather": ["hujan", "cuaca", "rain", "weather", "besok", "hari ini"],
+    "production_target": ["target", "ton", "produksi", "hasil", "output"],
+    "capacity": ["kapasitas", "unit", "mesin", "alat"],
+    "efficiency": ["efisiensi", "persentase", "rate", "tingkat"],
+    "weekly_prediction": ["minggu", "weekly", "minggu depan", "prediksi minggu"],
+    "shipping": ["kapal", "vessel", "shipping", "delay", "arrival", "departure"],
+}
+
+DATE_PATTERN = r"\d{4}-\d{2}-\d{2}"
+DEFAULT_TARGET_TON = 10000.0
+
+
+class ParsedMessage:
+    """Hasil satu pass classifier: semua intent yang cocok + slot tonase dan tanggal."""
+
+    __slots__ = ("intents", "target_ton", "date_text")
+
+    def __init__(self, intents: FrozenSet[str], target_ton: float, date_text: Optional[str]):
+        self.intents = intents
+        self.target_ton = target_ton
+        self.date_text = date_text  # string YYYY-MM-DD pertama (di-parse oleh pemanggil)
+
+    def has(self, intent: str) -> bool:
+        return intent in self.intents
+
+    def __repr__(self):
+        return f"ParsedMessage(intents={sorted(self.intents)}, target_ton={self.target_ton}, date_text={self.date_text!r})"
+
+
+class IntentClassifier:
+    """
+    Classifier intent + slot dari satu regex gabungan yang di-compile sekali.
+
+    Satu scan finditer mengambil keyword terpanjang di setiap posisi dan deret
+    digit. Intent sebuah keyword sudah mencakup intent semua keyword yang
+    merupakan substring-nya; keyword yang overlap dengan ekor keyword yang
+    cocok dicek langsung di offset-nya (tabel dihitung saat init), sehingga
+    hasilnya sama dengan cek substring per keyword. Slot mengikuti
+    parse_simulation_input lama: tonase = deret digit pertama di pesan
+    (termasuk digit tanggal), tanggal = YYYY-MM-DD pertama.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]] = None):
+        keywords = keywords or INTENT_KEYWORDS
+        direct: Dict[str, set] = {}
+        for intent, words in keywords.items():
+            for word in words:
+                direct.setdefault(word.lower(), set()).add(intent)
+        # Keyword yang memuat keyword lain juga memicu intent keyword tersebut
+        self.keyword_intents: Dict[str, FrozenSet[str]] = {
+            word: frozenset().union(*(intents for other, intents in direct.items() if other in word))
+            for word in direct
+        }
+        # (offset, keyword lain) yang dimulai di dalam keyword ini dan melewati ujungnya
+        self.overlaps: Dict[str, List[tuple]] = {
+            word: [
+                (offset, other) for offset in range(1, len(word)) for other in direct
+                if len(other) > len(word) - offset and other.startswith(word[offset:])
+            ]
+            for word in direct
+        }
+        alternation = "|".join(re.escape(w) for w in sorted(self.keyword_intents, key=len, reverse=True))
+        self.pattern = re.compile(rf"({alternation})|(\d+)")
+        self.date_pattern = re.compile(DATE_PATTERN)
+
+    def classify(self, message: str) -> ParsedMessage:
+        text = message.lower()
+        intents = set()
+        number = None
+        date_text = None
+        for match in self.pattern.finditer(text):
+            kw = match.group(1)
+            if kw is not None:
+                intents |= self.keyword_intents[kw]
+                for offset, other in self.overlaps[kw]:
+                    if text.startswith(other, match.start() + offset):
+                        intents |= self.keyword_intents[other]
+                continue
+            if number is None:
+                number = match.group(2)
+            if date_text is None and match.end() - match.start() >= 4:
+                # Tanggal yang dimulai di deret digit ini harus dimulai 4 digit sebelum '-'
+                date = self.date_pattern.match(text, match.end() - 4)
+                if date is not None:
+                    date_text = date.group()
+        return ParsedMessage(
+            frozenset(intents),
+            float(number) if number is not None else DEFAULT_TARGET_TON,
+            date_text
+        )
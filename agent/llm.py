@@ -1,7 +1,36 @@
-import google.generativeai as genai
 import logging
 from dotenv import load_dotenv
+import asyncio
+import concurrent.futures
 import os
+import random
+import threading
+import time
+from typing import Optional
+from agent.llm_cache import ResponseCache, prompt_key
+from agent.resilience import CircuitBreaker, LatencyTracker
+
+FALLBACK_ANSWER = "Sorry, I couldn't process that."
+
+# Outcome of a guarded LLM call (LLMClient.complete/complete_async). Any status
+# other than OK/CACHED means the caller's fallback answer was returned instead.
+OK, CACHED = "ok", "cache"
+TIMEOUT, ERROR, BREAKER_OPEN, DEADLINE = "timeout", "error", "breaker_open", "deadline"
+
+DEFAULT_POLICY = {
+    'timeout_seconds': 30.0,        # hard timeout per call (including a hedged request)
+    'hedge': False,                 # send a second request when the first is slower than hedge_percentile
+    'hedge_percentile': 95,
+    'hedge_min_delay_ms': 250,      # hedge delay floor; also used until enough latencies are recorded
+    'breaker_failures': 5,          # consecutive failures that open the circuit (0 = disabled)
+    'breaker_cooldown_seconds': 30.0,
+}
+
+# The backend's own timeout (SDK request timeout, no retries) is this much longer
+# than the client's wait, so the client always gives up first and the status says
+# who cut the call off (a caller's DEADLINE must not look like a backend ERROR).
+# The SDK timeout only makes abandoned calls stop instead of holding a worker.
+BACKEND_TIMEOUT_GRACE_SECONDS = 0.5
 
 # Setup logging for the web app to capture errors and info
 logging.basicConfig(
@@ -17,24 +46,483 @@ try:
 except Exception as e:
     logging.error(f"Error loading .env file: {e}")
 
-# Configure the Google Generative AI API
-try:
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        logging.error("GOOGLE_API_KEY not found in environment variables.")
-    else:
-        genai.configure(api_key=api_key)
-        logging.info("Google Generative AI API configured.")
-except Exception as e:
-    logging.error(f"Error configuring Google Generative AI API: {e}")
-
-def ask_gemini(user_msg: str) -> str:
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash") 
-        
-        response = model.generate_content(user_msg)
-        logging.info(f"Gemini response: {response.text.strip()}")
+# The Google Generative AI SDK (~0.5 s to import) is imported and configured on
+# first use instead of at module import; see warm_up_llm_client.
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def get_genai():
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            try:
+                api_key = os.getenv("GOOGLE_API_KEY")
+                if not api_key:
+                    logging.error("GOOGLE_API_KEY not found in environment variables.")
+                else:
+                    genai.configure(api_key=api_key)
+                    logging.info("Google Generative AI API configured.")
+            except Exception as e:
+                logging.error(f"Error configuring Google Generative AI API: {e}")
+            _genai = genai
+    return _genai
+
+
+class GeminiBackend:
+    """Reusable Gemini backend: the GenerativeModel is created once, not per request."""
+
+    def __init__(self, model_name: str = "gemini-2.5-flash"):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_genai().GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        """Import + configure the SDK and build the GenerativeModel (no API request)."""
+        return self.model
+
+    @staticmethod
+    def request_options(timeout: Optional[float]) -> dict:
+        """Per-call SDK options: bounded by `timeout` and never retried (the client retries by hedging)."""
+        return {"timeout": timeout, "retry": None}
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        return self.model.generate_content(prompt, request_options=self.request_options(timeout)).text.strip()
+
+    async def generate_async(self, prompt: str, timeout: Optional[float] = None) -> str:
+        response = await self.model.generate_content_async(prompt, request_options=self.request_options(timeout))
         return response.text.strip()
-    except Exception as e:
-        logging.error(f"Error in ask_gemini(): {e}")
-        return "Sorry, I couldn't process that."
\ No newline at end of file
+
+    async def generate_stream_async(self, prompt: str, timeout: Optional[float] = None):
+        response = await self.model.generate_content_async(
+            prompt, stream=True, request_options=self.request_options(timeout)
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeLLMBackend:
+    """
+    Local LLM backend for tests/benchmarks: deterministic answers with artificial latency.
+    error_rate / slow_rate make a seeded fraction of calls raise or take slow_latency
+    seconds instead, to exercise timeouts, hedging and the circuit breaker. Like the
+    SDK, a call given a `timeout` raises TimeoutError once it runs that long.
+    """
+
+    def __init__(self, responder=None, latency: float = 0.0, model_name: str = "fake-llm",
+                 first_token_latency: float = None, token_latency: float = 0.0,
+                 error_rate: float = 0.0, slow_rate: float = 0.0, slow_latency: float = 0.0, seed: int = 0):
+        self.responder = responder or (lambda prompt: f"[fake] {prompt[:80]}")
+        self.latency = latency
+        self.model_name = model_name
+        # Streaming: delay before the first token, then per following token
+        self.first_token_latency = latency if first_token_latency is None else first_token_latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self, base_latency: float) -> float:
+        """Latency of this call; raises for the error_rate fraction of calls."""
+        self.calls += 1
+        with self._rng_lock:
+            fail, slow = self._rng.random() < self.error_rate, self._rng.random() < self.slow_rate
+        if fail:
+            raise RuntimeError("fake LLM backend error")
+        return self.slow_latency if slow else base_latency
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        latency = self._draw(self.latency)
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("fake LLM backend timeout")
+        if latency:
+            time.sleep(latency)
+        return self.responder(prompt)
+
+    async def generate_async(self, prompt: str, timeout: Optional[float] = None) -> str:
+        latency = self._draw(self.latency)
+        if timeout is not None and latency > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError("fake LLM backend timeout")
+        if latency:
+            await asyncio.sleep(latency)
+        return self.responder(prompt)
+
+    async def generate_stream_async(self, prompt: str, timeout: Optional[float] = None):
+        latency = self._draw(self.first_token_latency)
+        if timeout is not None and latency > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError("fake LLM backend timeout")
+        await asyncio.sleep(latency)
+        for i, token in enumerate(self.responder(prompt).split(" ")):
+            if i and self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield token if i == 0 else " " + token
+
+
+class LLMClient:
+    """
+    LLM client with a response cache (see agent/llm_cache.py) and call guards
+    configured by `policy` (see DEFAULT_POLICY):
+
+    - every backend call has a hard timeout, further capped by the caller's
+      Deadline (agent/resilience.py); the backend gets the same timeout (plus
+      BACKEND_TIMEOUT_GRACE_SECONDS, no SDK retries) so abandoned calls stop;
+    - a call cut off by the caller's deadline ends with DEADLINE and is not
+      counted against the breaker: deadline_ms comes from the request, so only
+      backend errors and the policy timeout say the backend is unhealthy;
+    - with hedging on, a second identical request is sent once the first has
+      been running longer than the recent p95 latency (or immediately if the
+      first one fails); the first answer wins and the other is cancelled;
+    - a circuit breaker stops calling a backend that keeps failing.
+
+    When a call cannot produce an answer, complete()/complete_async() return
+    the caller's fallback text together with the reason (TIMEOUT, ERROR,
+    BREAKER_OPEN, DEADLINE). Fallback answers are never cached; bypass_cache=True
+    always calls the backend.
+    """
+
+    def __init__(self, backend, cache: ResponseCache = None, policy: dict = None):
+        self.backend = backend
+        self.cache = cache
+        self.policy = {**DEFAULT_POLICY, **(policy or {})}
+        self.breaker = CircuitBreaker(self.policy['breaker_failures'], self.policy['breaker_cooldown_seconds'])
+        self.latency = LatencyTracker()
+        self.counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, TIMEOUT: 0, ERROR: 0, BREAKER_OPEN: 0, DEADLINE: 0}
+        self._inflight = {}  # key -> asyncio.Task for calls in progress (complete_async)
+        self._executor = None  # threads for the sync path, created on first use
+
+    def _lookup(self, prompt: str, bypass_cache: bool):
+        if self.cache is None:
+            return None, None
+        if bypass_cache:
+            self.cache.record_bypass()
+            return None, None
+        key = prompt_key(prompt, self.backend.model_name)
+        return key, self.cache.get(key)
+
+    def hedge_delay(self):
+        """Seconds before a hedged request is sent, or None when hedging is off."""
+        if not self.policy['hedge']:
+            return None
+        floor = self.policy['hedge_min_delay_ms'] / 1000.0
+        observed = self.latency.percentile(self.policy['hedge_percentile'])
+        return floor if observed is None else max(floor, observed)
+
+    def _call_timeout(self, deadline):
+        """(seconds to wait for this call, status to report then): DEADLINE if the caller's deadline is tighter."""
+        cap = self.policy['timeout_seconds']
+        if deadline is not None and deadline.remaining() < cap:
+            return deadline.timeout(cap), DEADLINE
+        return cap, TIMEOUT
+
+    @staticmethod
+    def _backend_timeout(give_up_at: float) -> float:
+        return max(0.0, give_up_at - time.monotonic()) + BACKEND_TIMEOUT_GRACE_SECONDS
+
+    def _finish_call(self, key, started: float, answer, status: str):
+        self.counters["calls"] += 1
+        if status == OK:
+            self.breaker.record_success()
+            self.latency.record(time.monotonic() - started)
+            logging.info(f"Gemini response: {answer}")
+            if key is not None:
+                self.cache.set(key, answer)
+        elif status == DEADLINE:
+            self.breaker.record_cancelled()
+            self.counters[status] += 1
+        else:
+            self.breaker.record_failure()
+            self.counters[status] += 1
+        return answer, status
+
+    def _call_backend(self, prompt: str, key, deadline=None):
+        """
+        Sync path: calls run on a thread pool so they can be timed out and hedged.
+        A call that times out cannot be interrupted; it finishes in the
+        background and its result is dropped.
+        """
+        if not self.breaker.allow():
+            self.counters[BREAKER_OPEN] += 1
+            return None, BREAKER_OPEN
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
+        started = time.monotonic()
+        call_timeout, expiry_status = self._call_timeout(deadline)
+        give_up_at = started + call_timeout
+        hedge_delay = self.hedge_delay()
+        hedge_at = None if hedge_delay is None else started + hedge_delay
+        first = self._executor.submit(self.backend.generate, prompt, self._backend_timeout(give_up_at))
+        pending, answer, status = {first}, None, expiry_status
+        try:
+            while True:
+                if pending:
+                    wake_at = give_up_at if hedge_at is None else min(give_up_at, hedge_at)
+                    done, pending = concurrent.futures.wait(
+                        pending, timeout=max(0.0, wake_at - time.monotonic()),
+                        return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for call in done:
+                        if call.exception() is None:
+                            answer, status = call.result(), OK
+                            if call is not first:
+                                self.counters["hedge_wins"] += 1
+                            break
+                        logging.error(f"Error in ask_gemini(): {call.exception()}")
+                        status = ERROR
+                    if status == OK:
+                        break
+                if time.monotonic() >= give_up_at:
+                    status = ERROR if status == ERROR else expiry_status
+                    break
+                if hedge_at is not None and (not pending or time.monotonic() >= hedge_at):
+                    pending.add(self._executor.submit(self.backend.generate, prompt, self._backend_timeout(give_up_at)))
+                    self.counters["hedged"] += 1
+                    hedge_at = None
+                elif not pending:
+                    break
+        finally:
+            for call in pending:
+                call.cancel()
+        return self._finish_call(key, started, answer, status)
+
+    async def _call_backend_async(self, prompt: str, key, deadline=None):
+        """Async path of _call_backend; the losing or timed-out request is cancelled."""
+        if not self.breaker.allow():
+            self.counters[BREAKER_OPEN] += 1
+            return None, BREAKER_OPEN
+        started = time.monotonic()
+        call_timeout, expiry_status = self._call_timeout(deadline)
+        give_up_at = started + call_timeout
+        hedge_delay = self.hedge_delay()
+        hedge_at = None if hedge_delay is None else started + hedge_delay
+        first = asyncio.ensure_future(self.backend.generate_async(prompt, self._backend_timeout(give_up_at)))
+        pending, answer, status = {first}, None, expiry_status
+        try:
+            while True:
+                if pending:
+                    wake_at = give_up_at if hedge_at is None else min(give_up_at, hedge_at)
+                    done, pending = await asyncio.wait(
+                        pending, timeout=max(0.0, wake_at - time.monotonic()),
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for call in done:
+                        if call.exception() is None:
+                            answer, status = call.result(), OK
+                            if call is not first:
+                                self.counters["hedge_wins"] += 1
+                            break
+                        logging.error(f"Error in ask_gemini_async(): {call.exception()}")
+                        status = ERROR
+                    if status == OK:
+                        break
+                if time.monotonic() >= give_up_at:
+                    status = ERROR if status == ERROR else expiry_status
+                    break
+                if hedge_at is not None and (not pending or time.monotonic() >= hedge_at):
+                    pending.add(asyncio.ensure_future(self.backend.generate_async(prompt, self._backend_timeout(give_up_at))))
+                    self.counters["hedged"] += 1
+                    hedge_at = None
+                elif not pending:
+                    break
+        except asyncio.CancelledError:
+            # The caller went away: no backend outcome, but a half-open trial slot must be released
+            self.breaker.record_cancelled()
+            raise
+        finally:
+            for call in pending:
+                call.cancel()
+        return self._finish_call(key, started, answer, status)
+
+    def complete(self, prompt: str, bypass_cache: bool = False, deadline=None,
+                 fallback: str = FALLBACK_ANSWER):
+        """Return (answer, status); answer is `fallback` unless status is OK or CACHED."""
+        key, cached = self._lookup(prompt, bypass_cache)
+        if cached is not None:
+            return cached, CACHED
+        if deadline is not None and deadline.expired():
+            self.counters[DEADLINE] += 1
+            return fallback, DEADLINE
+        answer, status = self._call_backend(prompt, key, deadline)
+        return (answer, status) if status == OK else (fallback, status)
+
+    async def complete_async(self, prompt: str, bypass_cache: bool = False, deadline=None,
+                             fallback: str = FALLBACK_ANSWER):
+        """
+        Async complete(). Identical prompts that miss the cache at the same time
+        share one backend call (single-flight). The call runs as its own task
+        bounded by the policy timeout, so a cancelled caller does not cancel it
+        for the others; each caller stops waiting when its own deadline runs out.
+        """
+        key, cached = self._lookup(prompt, bypass_cache)
+        if cached is not None:
+            return cached, CACHED
+        if deadline is not None and deadline.expired():
+            self.counters[DEADLINE] += 1
+            return fallback, DEADLINE
+        if key is None:
+            answer, status = await self._call_backend_async(prompt, None, deadline)
+            return (answer, status) if status == OK else (fallback, status)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call_backend_async(prompt, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.cache.record_coalesced()
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            answer, status = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.counters[DEADLINE] += 1
+            return fallback, DEADLINE
+        return (answer, status) if status == OK else (fallback, status)
+
+    def ask(self, prompt: str, bypass_cache: bool = False, deadline=None) -> str:
+        return self.complete(prompt, bypass_cache, deadline)[0]
+
+    async def ask_async(self, prompt: str, bypass_cache: bool = False, deadline=None) -> str:
+        return (await self.complete_async(prompt, bypass_cache, deadline))[0]
+
+    async def stream_async(self, prompt: str, bypass_cache: bool = False, deadline=None,
+                           fallback: str = FALLBACK_ANSWER, outcome: dict = None):
+        """
+        Yield answer chunks as the backend produces them. A cached answer is
+        yielded as a single chunk; a completed stream is written to the cache.
+        Streams are not hedged. If nothing arrives before the timeout/deadline
+        (or the circuit is open) `fallback` is yielded instead; a stream cut off
+        midway keeps the partial answer. The status is written to outcome["status"].
+        """
+        outcome = outcome if outcome is not None else {}
+        key, cached = self._lookup(prompt, bypass_cache)
+        if cached is not None:
+            outcome["status"] = CACHED
+            yield cached
+            return
+        if deadline is not None and deadline.expired():
+            self.counters[DEADLINE] += 1
+            outcome["status"] = DEADLINE
+            yield fallback
+            return
+        if not self.breaker.allow():
+            self.counters[BREAKER_OPEN] += 1
+            outcome["status"] = BREAKER_OPEN
+            yield fallback
+            return
+        started = time.monotonic()
+        call_timeout, expiry_status = self._call_timeout(deadline)
+        give_up_at = started + call_timeout
+        parts, status = [], OK
+        chunks = self.backend.generate_stream_async(prompt, self._backend_timeout(give_up_at))
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, give_up_at - time.monotonic()))
+                except StopAsyncIteration:
+                    break
+                parts.append(chunk)
+                yield chunk
+        except asyncio.TimeoutError:
+            status = expiry_status
+        except (GeneratorExit, asyncio.CancelledError):
+            # Consumer disconnected mid-stream (aclose at a yield, or task cancelled at an
+            # await): nothing after this runs, so release a half-open trial slot here
+            self.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            logging.error(f"Error in stream_gemini_async(): {e}")
+            status = ERROR
+        finally:
+            await chunks.aclose()
+        answer = "".join(parts).strip()
+        if status == OK:
+            self._finish_call(key if answer else None, started, answer, OK)
+        else:
+            self._finish_call(None, started, None, status)
+            if not parts:
+                yield fallback
+        outcome["status"] = status
+
+    def stats(self) -> dict:
+        hedge_delay = self.hedge_delay()
+        return {
+            **self.counters,
+            "breaker": self.breaker.stats(),
+            "hedge_delay_ms": hedge_delay * 1000.0 if hedge_delay is not None else None,
+            "timeout_seconds": self.policy['timeout_seconds'],
+        }
+
+
+_client = None
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Default client (Gemini + cache from config.LLM_CACHE_CONFIG, call guards
+    from config.RESILIENCE_CONFIG), created once per process.
+    """
+    global _client
+    if _client is None:
+        from config import LLM_CACHE_CONFIG, RESILIENCE_CONFIG
+        cache = None
+        if LLM_CACHE_CONFIG.get('enabled', True):
+            cache = ResponseCache(
+                max_entries=LLM_CACHE_CONFIG.get('max_entries', 1024),
+                ttl_seconds=LLM_CACHE_CONFIG.get('ttl_seconds', 3600),
+                disk_path=LLM_CACHE_CONFIG.get('disk_path')
+            )
+        policy = {k: RESILIENCE_CONFIG[k] for k in DEFAULT_POLICY if k in RESILIENCE_CONFIG}
+        _client = LLMClient(GeminiBackend(), cache, policy)
+    return _client
+
+
+def warm_up_llm_client() -> LLMClient:
+    """Create the default client and warm up its backend (run in parallel at startup)."""
+    client = get_llm_client()
+    warm_up = getattr(client.backend, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+    return client
+
+
+def set_llm_client(client: LLMClient):
+    """Replace the default client (e.g. with a FakeLLMBackend for tests/benchmarks)."""
+    global _client
+    _client = client
+
+
+def ask_gemini(user_msg: str, bypass_cache: bool = False, deadline=None) -> str:
+    return get_llm_client().ask(user_msg, bypass_cache=bypass_cache, deadline=deadline)
+
+
+async def ask_gemini_async(user_msg: str, bypass_cache: bool = False, deadline=None) -> str:
+    """Non-blocking version of ask_gemini for use on the FastAPI event loop."""
+    return await get_llm_client().ask_async(user_msg, bypass_cache=bypass_cache, deadline=deadline)
+
+
+def complete_gemini(user_msg: str, deadline=None, fallback: str = FALLBACK_ANSWER):
+    """ask_gemini returning (answer, status); see LLMClient.complete."""
+    return get_llm_client().complete(user_msg, deadline=deadline, fallback=fallback)
+
+
+async def complete_gemini_async(user_msg: str, deadline=None, fallback: str = FALLBACK_ANSWER):
+    return await get_llm_client().complete_async(user_msg, deadline=deadline, fallback=fallback)
+
+
+async def stream_gemini_async(user_msg: str, bypass_cache: bool = False, deadline=None,
+                              fallback: str = FALLBACK_ANSWER, outcome: dict = None):
+    """Stream the answer chunk by chunk (used by /chat/stream)."""
+    async for chunk in get_llm_client().stream_async(user_msg, bypass_cache=bypass_cache, deadline=deadline,
+                                                     fallback=fallback, outcome=outcome):
+        yield chunk
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def prompt_key(prompt: str, model_name: str = "") -> str:
+    """Hash of the normalized prompt (trimmed, whitespace collapsed), scoped per model."""
+    normalized = _WHITESPACE.sub(" ", prompt).strip()
+    return hashlib.sha256(f"{model_name}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM answers.
+
+    - Tier 1: in-process LRU with TTL (OrderedDict, thread-safe).
+    - Tier 2 (optional): SQLite on disk, survives restarts. Disk hits are
+      promoted to the memory tier.
+    Hit/miss/eviction counters are available through stats().
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "writes": 0,
+            "bypassed": 0,
+            "coalesced": 0,
+        }
+
+        self._disk = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT, expires_at REAL)"
+            )
+            self._disk.commit()
+
+    def _count(self, name: str):
+        self.counters[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count("memory_hits")
+                    return response
+                del self._memory[key]
+                self._count("expired")
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        self._store_memory(key, row[0], row[1])
+                        self._count("disk_hits")
+                        return row[0]
+                    self._disk.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._disk.commit()
+                    self._count("expired")
+
+            self._count("misses")
+            return None
+
+    def set(self, key: str, response: str):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store_memory(key, response, expires_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                    (key, response, expires_at)
+                )
+                self._disk.commit()
+            self._count("writes")
+
+    def _store_memory(self, key: str, response: str, expires_at: float):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._count("evictions")
+
+    def record_bypass(self):
+        with self._lock:
+            self._count("bypassed")
+
+    def record_coalesced(self):
+        """A miss that joined an identical in-flight backend call instead of making its own."""
+        with self._lock:
+            self._count("coalesced")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM llm_cache")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "entries": len(self._memory),
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "disk_enabled": self._disk is not None,
+            }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
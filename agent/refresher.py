@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class MiningDataRefresher:
+    """
+    Thread background yang menarik baris mining_clean2 baru secara berkala.
+
+    High-water mark = departure_date terbesar yang sudah dimuat. Karena
+    departure_date bertipe tanggal (banyak shipment per hari) dan tabel tidak
+    punya id, query memakai >= high-water mark lalu baris di tanggal itu yang
+    sudah ada dibuang (perbandingan nilai, multiset). Baris baru diteruskan ke
+    calculator.append_data, yang menukar data tanpa memblokir pembaca.
+    """
+
+    def __init__(self, calculator, fetch_since: Callable[[Optional[pd.Timestamp]], pd.DataFrame],
+                 interval_seconds: float = 60.0, prepare: Callable[[pd.DataFrame], pd.DataFrame] = None,
+                 column: str = "departure_date"):
+        self.calculator = calculator
+        self.fetch_since = fetch_since
+        self.interval_seconds = interval_seconds
+        self.prepare = prepare
+        self.column = column
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Metrics
+        self.runs = 0
+        self.rows_added = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_run_at = None
+        self.last_duration_ms = 0.0
+
+    def _rows_at_high_water_mark(self):
+        """(high-water mark, baris lama di tanggal itu). Lewat feature_store (terurut) bila ada, tanpa scan tabel."""
+        df = self.calculator.df
+        store = self.calculator.feature_store
+        if store is not None and len(store):
+            lo = np.searchsorted(store.dates, store.dates[-1], side='left')
+            return pd.Timestamp(store.dates[-1]), df.iloc[np.sort(store.positions[lo:])]
+        if self.column not in df.columns or not len(df):
+            return None, df.iloc[:0]
+        dates = pd.to_datetime(df[self.column])
+        hwm = dates.max()
+        return (None, df.iloc[:0]) if pd.isna(hwm) else (hwm, df[dates == hwm])
+
+    def high_water_mark(self) -> Optional[pd.Timestamp]:
+        store = self.calculator.feature_store
+        if store is not None and len(store):
+            return pd.Timestamp(store.dates[-1])
+        return self._rows_at_high_water_mark()[0]
+
+    def _drop_known(self, fetched: pd.DataFrame, hwm: Optional[pd.Timestamp], known_rows: pd.DataFrame) -> pd.DataFrame:
+        """Buang baris di tanggal high-water mark yang sudah ada di data lama."""
+        if hwm is None or not len(fetched):
+            return fetched
+        columns = [c for c in fetched.columns if c in known_rows.columns]
+
+        def keys(frame):
+            frame = frame[columns].copy()
+            for col in columns:
+                # Samakan tipe dengan data lama (snapshot: datetime64/float64, DB: date/Decimal)
+                if pd.api.types.is_datetime64_any_dtype(known_rows[col].dtype):
+                    frame[col] = pd.to_datetime(frame[col])
+                elif pd.api.types.is_numeric_dtype(known_rows[col].dtype):
+                    frame[col] = pd.to_numeric(frame[col], errors="coerce").astype(np.float64)
+            return [tuple(str(v) for v in row) for row in frame.itertuples(index=False, name=None)]
+
+        known = Counter(keys(known_rows))
+        at_hwm = (pd.to_datetime(fetched[self.column]) == hwm).to_numpy()
+        keep = []
+        for is_hwm, key in zip(at_hwm, keys(fetched)):
+            if is_hwm and known[key] > 0:
+                known[key] -= 1
+                keep.append(False)
+            else:
+                keep.append(True)
+        return fetched[keep]
+
+    def refresh_once(self) -> int:
+        """Satu siklus: fetch >= high-water mark, buang duplikat, append. Return jumlah baris baru."""
+        started = time.perf_counter()
+        try:
+            hwm, known_rows = self._rows_at_high_water_mark()
+            new_rows = self._drop_known(self.fetch_since(hwm), hwm, known_rows)
+            if self.prepare is not None and len(new_rows):
+                new_rows = self.prepare(new_rows)
+            added = self.calculator.append_data(new_rows)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Warning: Refresh mining_clean2 gagal ({str(e)}).")
+            return 0
+        finally:
+            self.runs += 1
+            self.last_run_at = time.time()
+            self.last_duration_ms = (time.perf_counter() - started) * 1000.0
+        self.rows_added += added
+        return added
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.refresh_once()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mining-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        hwm = self.high_water_mark()
+        return {
+            "runs": self.runs,
+            "rows_added": self.rows_added,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms,
+            "high_water_mark": str(hwm) if hwm is not None else None,
+            "data_version": getattr(self.calculator, "data_version", None),
+            "rows": len(self.calculator.df),
+            "interval_seconds": self.interval_seconds
+        }
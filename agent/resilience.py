@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class Deadline:
+    """
+    Budget waktu satu request (detik, jam monotonic). Dibuat sekali di awal
+    handle_message lalu diteruskan ke setiap stage; panggilan LLM memakai
+    sisa budget sebagai batas timeout-nya.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def from_ms(cls, budget_ms: Optional[float]) -> Optional["Deadline"]:
+        return cls(budget_ms / 1000.0) if budget_ms else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Sisa budget, dibatasi cap (mis. timeout per panggilan) jika ada."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana (closed -> open -> half_open) yang thread-safe.
+
+    Setelah failure_threshold kegagalan berturut-turut (error atau timeout
+    backend; panggilan yang dihentikan deadline pemanggil tidak dihitung)
+    sirkuit terbuka: allow() False selama cooldown_seconds sehingga request
+    langsung memakai jawaban fallback tanpa menunggu backend yang sedang
+    bermasalah. Setelah cooldown satu panggilan percobaan diizinkan
+    (half_open); sukses menutup sirkuit, gagal membukanya lagi.
+    failure_threshold=0 menonaktifkan breaker.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.counters = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        if not self.failure_threshold:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_cancelled(self):
+        """Panggilan dihentikan oleh deadline pemanggil: bukan sukses/gagal backend, hanya lepas slot percobaan."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.counters["opened"] += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, **self.counters}
+
+
+class LatencyTracker:
+    """Latency sukses terakhir (window tetap) untuk menaksir persentil, mis. delay hedging di p95."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """None sampai sampel cukup (min_samples)."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
@@ -1,107 +1,260 @@
 # agent/router.py (kode lengkap dan diperbaiki)
 import pandas as pd
+import numpy as np
 from sqlalchemy import create_engine, text
-from agent.llm import ask_gemini
-from model.calculator import MiningValueCalculator
+from sqlalchemy.ext.asyncio import create_async_engine
+from agent.llm import OK, CACHED, FALLBACK_ANSWER, complete_gemini, complete_gemini_async, stream_gemini_async, warm_up_llm_client
+from agent.resilience import Deadline
+from agent.session import SessionStore
+from agent.simulation_cache import SimulationCache
+from agent.context import ContextBuilder
+from agent.intents import IntentClassifier, ParsedMessage
+from agent.history_writer import ChatHistoryWriter
+from agent.refresher import MiningDataRefresher
+from agent.startup import run_startup_tasks
+from model.calculator import MINING_FEATURES, MiningValueCalculator
+from model.batching import MicroBatcher
+from model.shipping_batch import SHIPPING_FEATURES, add_delay_hours
+from model.registry import ModelRegistry
+from model.outlook import WeeklyOutlook
+from model.snapshot import TableSnapshot
+from model.tracing import NULL_TRACE, Trace, span
 from model.rules import apply_general_rules
+import base64
 import datetime
+import functools
 import json
 import pickle
 import os
+import time
 import uuid
+import asyncio
+
+def with_llm_status(result: dict, llm_status: str) -> dict:
+    """Tandai respons yang jawabannya fallback (timeout/error/breaker_open/deadline), bukan dari LLM."""
+    if llm_status not in (OK, CACHED):
+        result["llm_fallback"] = llm_status
+    return result
+
+def encode_history_cursor(created_at, chat_id) -> str:
+    """Cursor keyset opaque untuk row terakhir satu halaman history."""
+    ts = created_at.isoformat() if isinstance(created_at, datetime.datetime) else str(created_at)
+    return base64.urlsafe_b64encode(json.dumps([ts, str(chat_id)]).encode()).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str):
+    """(created_at, chat_id) dari cursor; ValueError jika cursor tidak valid."""
+    try:
+        ts, chat_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.datetime.fromisoformat(ts), str(chat_id)
+    except Exception as e:
+        raise ValueError(f"cursor tidak valid: {cursor!r}") from e
+
+def build_history_page_query(with_cursor: bool):
+    """
+    Halaman history terbaru-dulu dengan keyset (created_at, chat_id): cukup satu
+    range scan di index (user_id, created_at, chat_id) sepanjang limit row,
+    berapa pun panjang history user (lihat migrations/001_chat_history_keyset_index.sql).
+    """
+    after = "AND (created_at, chat_id) < (:cursor_created_at, :cursor_chat_id)" if with_cursor else ""
+    return text(f"""
+    SELECT chat_id, message, answer, created_at
+    FROM chat_history
+    WHERE user_id = :user_id {after}
+    ORDER BY created_at DESC, chat_id DESC
+    LIMIT :limit;
+    """)
+
+def build_chat_history_insert(n_rows: int):
+    """INSERT multi-row untuk n_rows chat_history (parameter :kolom_i per row)."""
+    values = ", ".join(f"(:user_id_{i}, :message_{i}, :answer_{i}, :chat_id_{i})" for i in range(n_rows))
+    return text(f"INSERT INTO chat_history (user_id, message, answer, chat_id) VALUES {values};")
 
 class ChatRouter:
-    def __init__(self, df_path, model_paths):
+    def __init__(self, df_path, model_paths, engine=None, async_engine=None):
+        """
+        engine/async_engine opsional: engine SQLAlchemy yang sudah jadi (misalnya
+        SQLite untuk benchmark). Jika None, dibuat dari config.DB_CONFIG (PostgreSQL).
+        """
+        from config import (SESSION_CACHE_CONFIG, CONTEXT_CONFIG, TRACING_CONFIG, SIMULATION_CACHE_CONFIG,
+                            RESILIENCE_CONFIG, HISTORY_API_CONFIG)
+        # Timer per stage -> histogram /metrics (lihat model/tracing.py)
+        self.tracing_enabled = TRACING_CONFIG.get('enabled', True)
+        # Default budget waktu per request (lihat new_deadline)
+        self.request_budget_ms = RESILIENCE_CONFIG.get('request_budget_ms')
+        # Ukuran halaman /history (lihat get_chat_history_page)
+        self.history_page_config = dict(HISTORY_API_CONFIG)
+        # Cache sesi per user (username + turn terakhir) untuk menghindari query DB tiap turn
+        self.sessions = SessionStore(**SESSION_CACHE_CONFIG)
+        # Konteks chat dengan budget karakter + ringkasan bergulir per sesi
+        self.context_builder = ContextBuilder(**CONTEXT_CONFIG)
+        # Regex intent + slot gabungan, di-compile sekali
+        self.intent_classifier = IntentClassifier()
+        
+        self.shipping_features = list(SHIPPING_FEATURES)
+        self.shipping_model_version = 0
+        # Single-flight + cache hasil simulasi identik (lihat agent/simulation_cache.py)
+        cache_config = {k: v for k, v in SIMULATION_CACHE_CONFIG.items() if k != 'enabled'}
+        self.simulation_cache = SimulationCache(**cache_config) if SIMULATION_CACHE_CONFIG.get('enabled', True) else None
+        
         # Jika df_path='dummy', skip DB load untuk test
         if df_path == 'dummy':
             self.conn = None
-            self.mining_calculator = MiningValueCalculator(df_path=None, model_path=None)
+            self.engine = None
+            self.mining_snapshot = None
+            self.mining_refresher = None
+            self.weekly_outlook = None
+            self.async_engine = None
+            self.history_writer = None
+            self.mining_calculator = MiningValueCalculator(df=pd.DataFrame(), model_path=None)
             self.shipping_model = None
+            self.shipping_predictor = None
+            self.inference_batch_config = {}
+            self.model_registry = None
+            self.startup_profile = None
             return
         
         # Setup DB dengan SQLAlchemy
-        from config import DB_CONFIG
-        db_uri = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-        self.engine = create_engine(db_uri)
-        
-        # Load data mining_clean2 dari DB
-        if df_path is None:
-            query = "SELECT * FROM mining_clean2;"
-            mining_df = pd.read_sql_query(query, self.engine)
-        else:
-            mining_df = pd.read_csv(df_path)
+        from config import (DB_CONFIG, INFERENCE_BATCH_CONFIG, TARGET_PROBABILITY_THRESHOLD, HISTORY_WRITER_CONFIG,
+                            SNAPSHOT_CONFIG, REFRESH_CONFIG, MODEL_REGISTRY_CONFIG, STARTUP_CONFIG, OUTLOOK_CONFIG)
+        if engine is None:
+            db_uri = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+            engine = create_engine(db_uri)
+            # Engine async (asyncpg) untuk path request non-blocking
+            async_db_uri = db_uri.replace("postgresql://", "postgresql+asyncpg://", 1)
+            async_engine = create_async_engine(async_db_uri)
+        self.engine = engine
+        self.async_engine = async_engine
+        
+        # Write-behind chat_history: insert dikumpulkan jadi batch multi-row di background
+        writer_config = {k: v for k, v in HISTORY_WRITER_CONFIG.items() if k != 'enabled'}
+        self.history_writer = ChatHistoryWriter(
+            self.insert_chat_history_batch_async, fallback=self.insert_chat_history_batch, **writer_config
+        ) if HISTORY_WRITER_CONFIG.get('enabled', True) else None
+        
+        # Startup: data mining_clean2, model mining/shipping dan client LLM saling
+        # independen, jadi di-load paralel (lihat agent/startup.py). Model hanya
+        # di-load + warm-up di sini; diaktifkan setelah calculator siap.
+        self.mining_snapshot = TableSnapshot(SNAPSHOT_CONFIG['directory']) if SNAPSHOT_CONFIG.get('enabled') else None
+        self.shipping_model = None
+        self.shipping_predictor = None
+        self.inference_batch_config = INFERENCE_BATCH_CONFIG
+        self.model_registry = None
+        self.model_paths = model_paths
+        tasks = {
+            'mining_data': self.load_mining_table if df_path is None else (lambda: pd.read_csv(df_path))
+        }
+        if model_paths is not None:
+            # Model di-load lewat registry: load awal di sini, lalu reload otomatis
+            # di background saat models/ (atau manifest) berubah
+            self.model_registry = ModelRegistry(
+                manifest_path=MODEL_REGISTRY_CONFIG.get('manifest_path'),
+                poll_seconds=MODEL_REGISTRY_CONFIG['poll_seconds']
+            )
+            if self.model_paths.get('mining'):
+                self.model_registry.register(
+                    'mining', self.model_paths['mining'], len(MINING_FEATURES),
+                    activate=lambda model: self.mining_calculator.set_model(model)
+                )
+            if self.model_paths.get('shipping'):
+                self.model_registry.register(
+                    'shipping', self.model_paths['shipping'], len(self.shipping_features),
+                    activate=self.set_shipping_model, feature_names=self.shipping_features
+                )
+            for name, entry in self.model_registry.entries.items():
+                tasks[f'model_{name}'] = functools.partial(self.model_registry.prepare_entry, entry)
+        tasks['llm_client'] = warm_up_llm_client
+        results, self.startup_profile = run_startup_tasks(
+            tasks, parallel=STARTUP_CONFIG.get('parallel', True), max_workers=STARTUP_CONFIG.get('max_workers')
+        )
+        mining_df = results['mining_data']
         
-        # Setup model paths
         if model_paths is None:
-            self.model_paths = None
             self.mining_calculator = MiningValueCalculator(df=mining_df, model_path=None)
-            self.shipping_model = None
         else:
-            self.model_paths = model_paths
-            # Load mining model
-            mining_model_path = self.model_paths.get('mining')
-            self.mining_calculator = MiningValueCalculator(df=mining_df, model_path=mining_model_path)
-            
-            # Load shipping model
-            shipping_model_path = self.model_paths.get('shipping')
-            if shipping_model_path and os.path.exists(shipping_model_path):
-                try:
-                    with open(shipping_model_path, 'rb') as f:
-                        self.shipping_model = pickle.load(f)
-                except Exception as e:
-                    print(f"Warning: Shipping model gagal load ({str(e)}). Menggunakan rule-based.")
-                    self.shipping_model = None
-            else:
-                self.shipping_model = None
+            self.mining_calculator = MiningValueCalculator(
+                df=mining_df, model_path=None, batch_config=INFERENCE_BATCH_CONFIG,
+                target_probability_threshold=TARGET_PROBABILITY_THRESHOLD
+            )
+            for name, entry in self.model_registry.entries.items():
+                if not self.model_registry.activate_entry(entry, results[f'model_{name}']):
+                    print(f"Warning: Model {name} tidak tersedia. Menggunakan rule-based.")
+            if MODEL_REGISTRY_CONFIG.get('enabled', True):
+                self.model_registry.start()
         
         # Hitung delay_hours untuk shipping jika ada data
-        if 'arrival_estimate' in mining_df.columns and 'departure_date' in mining_df.columns:
-            mining_df["delay_hours"] = (
-                (pd.to_datetime(mining_df["arrival_estimate"]) - pd.to_datetime(mining_df["departure_date"]))
-                .dt.total_seconds() / 3600
-            ).clip(lower=0).fillna(0)
+        add_delay_hours(mining_df)
         
-        self.shipping_features = [
-            "distance", "cargo_volume_ton", "capacity_ton", "rainfall_mm", 
-            "wind_speed_kmh", "wave_height_m", "temperature_c", "humidity_percent"
-        ]
+        # Prediksi N minggu ke depan dihitung sekali di sini, lalu di-build ulang di
+        # background setiap append_data / set_model (lihat model/outlook.py)
+        self.weekly_outlook = None
+        if OUTLOOK_CONFIG.get('enabled'):
+            self.weekly_outlook = WeeklyOutlook(
+                self.mining_calculator, horizon_weeks=OUTLOOK_CONFIG['horizon_weeks'],
+                check_interval_seconds=OUTLOOK_CONFIG['check_interval_seconds'],
+                persist_path=OUTLOOK_CONFIG.get('persist_path')
+            )
+            self.mining_calculator.outlook = self.weekly_outlook
+            self.weekly_outlook.start()
+        
+        # Tarik baris baru mining_clean2 di background (hanya jika data dari DB)
+        self.mining_refresher = None
+        if df_path is None and REFRESH_CONFIG.get('enabled'):
+            self.mining_refresher = MiningDataRefresher(
+                self.mining_calculator, self.fetch_mining_rows_since,
+                interval_seconds=REFRESH_CONFIG['interval_seconds'], prepare=add_delay_hours
+            )
+            self.mining_refresher.start()
+    
+    
+    def load_mining_table(self) -> pd.DataFrame:
+        """
+        mining_clean2 dari snapshot (dibaca ulang dari DB hanya jika jumlah baris /
+        max departure_date berubah), atau langsung dari DB jika snapshot nonaktif/gagal.
+        """
+        if self.mining_snapshot is not None:
+            try:
+                return self.mining_snapshot.load_or_refresh(self.engine)
+            except Exception as e:
+                print(f"Warning: Snapshot mining_clean2 gagal ({str(e)}). Load langsung dari DB.")
+        query = "SELECT * FROM mining_clean2;"
+        return pd.read_sql_query(query, self.engine)
+    
+    def fetch_mining_rows_since(self, high_water_mark) -> pd.DataFrame:
+        """Baris mining_clean2 dengan departure_date >= high_water_mark (semua jika None)."""
+        if high_water_mark is None:
+            return pd.read_sql_query("SELECT * FROM mining_clean2;", self.engine)
+        query = text("SELECT * FROM mining_clean2 WHERE departure_date >= :hwm;")
+        return pd.read_sql_query(query, self.engine, params={"hwm": pd.Timestamp(high_water_mark).to_pydatetime()})
     
+    def classify(self, message: str) -> ParsedMessage:
+        """Semua intent + tonase + tanggal dari satu pass regex (lihat agent/intents.py)."""
+        return self.intent_classifier.classify(message)
     
     def is_simulation_request(self, message: str) -> bool:
-        keywords = ["simulasi", "prediksi", "produksi", "minggu", "target", "kapasitas", "delay"]
-        return any(k in message.lower() for k in keywords)
+        return self.classify(message).has("simulation")
     
     def is_weather_related(self, message: str) -> bool:
-        weather_keywords = ["hujan", "cuaca", "rain", "weather", "besok", "hari ini"]
-        return any(k in message.lower() for k in message.lower())
+        return self.classify(message).has("weather")
     
     def is_production_target_related(self, message: str) -> bool:
-        target_keywords = ["target", "ton", "produksi", "hasil", "output"]
-        return any(k in message.lower() for k in target_keywords)
+        return self.classify(message).has("production_target")
     
     def is_capacity_related(self, message: str) -> bool:
-        capacity_keywords = ["kapasitas", "unit", "mesin", "alat"]
-        return any(k in message.lower() for k in capacity_keywords)
+        return self.classify(message).has("capacity")
     
     def is_efficiency_related(self, message: str) -> bool:
-        efficiency_keywords = ["efisiensi", "persentase", "rate", "tingkat"]
-        return any(k in message.lower() for k in efficiency_keywords)
+        return self.classify(message).has("efficiency")
     
     def is_weekly_prediction_related(self, message: str) -> bool:
-        weekly_keywords = ["minggu", "weekly", "minggu depan", "prediksi minggu"]
-        return any(k in message.lower() for k in weekly_keywords)
+        return self.classify(message).has("weekly_prediction")
     
     def is_shipping_related(self, message: str) -> bool:
-        shipping_keywords = ["kapal", "vessel", "shipping", "delay", "arrival", "departure"]
-        return any(k in message.lower() for k in shipping_keywords)
+        return self.classify(message).has("shipping")
     
-    def parse_simulation_input(self, message: str):
-        import re
-        ton_match = re.findall(r"\d+", message)
-        target_ton = float(ton_match[0]) if ton_match else 10000.0
-        date_match = re.findall(r"\d{4}-\d{2}-\d{2}", message)
-        week_start = datetime.datetime.strptime(date_match[0], "%Y-%m-%d") if date_match else datetime.datetime.today()
-        return target_ton, week_start
+    def parse_simulation_input(self, message: str, parsed: ParsedMessage = None):
+        parsed = parsed or self.classify(message)
+        week_start = datetime.datetime.strptime(parsed.date_text, "%Y-%m-%d") if parsed.date_text else datetime.datetime.today()
+        return parsed.target_ton, week_start
     
     def format_simulation_for_llm(self, sim_result: dict, user_msg: str, sim_type: str) -> str:
         input_feat = sim_result.get("input_features", {})
@@ -119,6 +272,36 @@ class ChatRouter:
         task_prompt = "Jelaskan hasil dengan bahasa natural, fokus pada yang ditanyakan."
         return intro_prompt + data_prompt + task_prompt
     
+    def format_simulation_fallback(self, sim_result: dict, sim_type: str) -> str:
+        """
+        Jawaban template (tanpa LLM) dari hasil simulasi, dipakai saat budget
+        request habis, LLM timeout/error, atau circuit breaker terbuka.
+        """
+        if sim_type == "shipping":
+            delay = sim_result.get("predicted_delay_hours", 0.0)
+            lines = [f"Prediksi delay kapal sekitar {delay:.1f} jam."]
+            quantiles = sim_result.get("delay_quantiles")
+            if quantiles:
+                lines.append(f"Rentang perkiraan (P10–P90): {quantiles['p10']:.1f}–{quantiles['p90']:.1f} jam.")
+            feats = sim_result.get("input_features", {})
+            if "wave_height_m" in feats and "wind_speed_kmh" in feats:
+                risk = self.mining_calculator.calculate_risk_level(feats["wave_height_m"], feats["wind_speed_kmh"])
+                lines.append(f"Risk level cuaca: {risk} (gelombang {feats['wave_height_m']} m, angin {feats['wind_speed_kmh']} km/h).")
+            return " ".join(lines)
+        
+        predicted = sim_result.get("predicted_production_ton", 0.0)
+        lines = [f"Prediksi produksi minggu ini sekitar {predicted:,.0f} ton "
+                 f"(pencapaian {sim_result.get('achievement_percent', 0.0):.1f}% dari target)."]
+        quantiles = sim_result.get("predicted_production_quantiles")
+        if quantiles:
+            lines.append(f"Rentang perkiraan (P10–P90): {quantiles['p10']:,.0f}–{quantiles['p90']:,.0f} ton.")
+        recommendations = sim_result.get("recommendations") or []
+        if recommendations:
+            lines.append("Rekomendasi:\n" + "\n".join(f"- {rec}" for rec in recommendations))
+        if sim_result.get("justification"):
+            lines.append(f"Alasan: {sim_result['justification']}")
+        return "\n".join(lines)
+    
     def get_user_info(self, user_id):
         # Cast user_id ke UUID jika perlu, atau asumsikan input sudah UUID string
         query = text("SELECT user_id, username FROM users WHERE user_id = :user_id;")
@@ -126,17 +309,77 @@ class ChatRouter:
             result = conn.execute(query, {"user_id": user_id}).fetchone()
         return dict(result._mapping) if result else None
     
+    async def get_user_info_async(self, user_id):
+        query = text("SELECT user_id, username FROM users WHERE user_id = :user_id;")
+        async with self.async_engine.connect() as conn:
+            result = (await conn.execute(query, {"user_id": user_id})).fetchone()
+        return dict(result._mapping) if result else None
+    
     def get_recent_chat_history(self, user_id, hours=24):
+        # LIMIT = max_turns sesi: turn yang lebih lama tidak pernah disimpan di SessionStore
         since_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
         query = text("""
         SELECT message, answer, created_at 
         FROM chat_history 
         WHERE user_id = :user_id AND created_at >= :since_time 
-        ORDER BY created_at DESC;
+        ORDER BY created_at DESC
+        LIMIT :limit;
         """)
+        params = {"user_id": user_id, "since_time": since_time, "limit": self.sessions.max_turns}
         with self.engine.connect() as conn:
-            results = conn.execute(query, {"user_id": user_id, "since_time": since_time}).fetchall()
+            results = conn.execute(query, params).fetchall()
         return [dict(row._mapping) for row in results] if results else None
+    
+    async def get_recent_chat_history_async(self, user_id, hours=24):
+        since_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
+        query = text("""
+        SELECT message, answer, created_at 
+        FROM chat_history 
+        WHERE user_id = :user_id AND created_at >= :since_time 
+        ORDER BY created_at DESC
+        LIMIT :limit;
+        """)
+        params = {"user_id": user_id, "since_time": since_time, "limit": self.sessions.max_turns}
+        async with self.async_engine.connect() as conn:
+            results = (await conn.execute(query, params)).fetchall()
+        return [dict(row._mapping) for row in results] if results else None
+    
+    def history_page_params(self, user_id, limit=None, cursor=None):
+        """Parameter query halaman history; limit dibatasi ke [1, max_limit]."""
+        limit = limit or self.history_page_config.get('default_limit', 50)
+        limit = max(1, min(int(limit), self.history_page_config.get('max_limit', 200)))
+        # Ambil limit + 1 row untuk tahu masih ada halaman berikutnya tanpa COUNT
+        params = {"user_id": user_id, "limit": limit + 1}
+        if cursor:
+            params["cursor_created_at"], params["cursor_chat_id"] = decode_history_cursor(cursor)
+        return limit, params
+    
+    def history_page(self, rows, limit: int) -> dict:
+        items = [dict(row._mapping) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_history_cursor(last["created_at"], last["chat_id"])
+        return {"items": items, "next_cursor": next_cursor}
+    
+    def get_chat_history_page(self, user_id, limit=None, cursor=None) -> dict:
+        """
+        Satu halaman chat_history user, terbaru dulu: {"items": [...], "next_cursor"}.
+        Halaman berikutnya diminta dengan next_cursor (None = halaman terakhir).
+        Pagination keyset: biaya query sebanding limit, bukan posisi halaman.
+        """
+        limit, params = self.history_page_params(user_id, limit, cursor)
+        query = build_history_page_query("cursor_chat_id" in params)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return self.history_page(rows, limit)
+    
+    async def get_chat_history_page_async(self, user_id, limit=None, cursor=None) -> dict:
+        limit, params = self.history_page_params(user_id, limit, cursor)
+        query = build_history_page_query("cursor_chat_id" in params)
+        async with self.async_engine.connect() as conn:
+            rows = (await conn.execute(query, params)).fetchall()
+        return self.history_page(rows, limit)
 
     
     def save_chat_history(self, user_id, message, answer, chat_id=None):
@@ -149,67 +392,360 @@ class ChatRouter:
         with self.engine.connect() as conn:
             conn.execute(query, {"user_id": user_id, "message": message, "answer": answer, "chat_id": chat_id})
             conn.commit()
+        self.sessions.record_turn(user_id, message, answer)
+    
+    async def save_chat_history_async(self, user_id, message, answer, chat_id=None):
+        if chat_id is None:
+            chat_id = str(uuid.uuid4())
+        row = {"user_id": user_id, "message": message, "answer": answer, "chat_id": chat_id}
+        if self.history_writer is not None:
+            # Write-behind: hanya masuk antrean, ditulis batch oleh ChatHistoryWriter
+            await self.history_writer.enqueue(row)
+        else:
+            await self.insert_chat_history_batch_async([row])
+        self.sessions.record_turn(user_id, message, answer)
+    
+    def insert_chat_history_batch(self, rows):
+        """Versi sync (engine psycopg2): fallback ChatHistoryWriter jika insert async terus gagal."""
+        params = {}
+        for i, row in enumerate(rows):
+            params.update({f"{k}_{i}": v for k, v in row.items()})
+        with self.engine.begin() as conn:
+            conn.execute(build_chat_history_insert(len(rows)), params)
+    
+    async def insert_chat_history_batch_async(self, rows):
+        params = {}
+        for i, row in enumerate(rows):
+            params.update({f"{k}_{i}": v for k, v in row.items()})
+        async with self.async_engine.begin() as conn:
+            await conn.execute(build_chat_history_insert(len(rows)), params)
+    
+    def set_shipping_model(self, model):
+        """Aktifkan model shipping baru (dipanggil ModelRegistry); predictor dulu, baru model."""
+        if self.shipping_predictor is None:
+            self.shipping_predictor = MicroBatcher(
+                model, feature_names=self.shipping_features, name="shipping", **self.inference_batch_config
+            )
+        else:
+            self.shipping_predictor.model = model
+        self.shipping_model = model
+        self.shipping_model_version += 1
     
     def predict_shipping_delay(self, input_data: dict) -> dict:
         if self.shipping_model is None:
-            return {"predicted_delay_hours": 0.0, "input_features": input_data}
-        X_input = pd.DataFrame([input_data])[self.shipping_features].fillna(pd.Series(input_data).median())
-        prediction = float(self.shipping_model.predict(X_input)[0])
-        return {"predicted_delay_hours": prediction, "input_features": input_data}
+            return {"predicted_delay_hours": 0.0, "delay_quantiles": None, "input_features": input_data}
+        # Row fitur tanpa membangun DataFrame; nilai kosong diisi median input (seperti sebelumnya)
+        row = np.array([input_data[f] for f in self.shipping_features], dtype=np.float64)
+        if np.isnan(row).any():
+            row = np.where(np.isnan(row), pd.Series(input_data).median(), row)
+        with span("model_predict"):
+            dist = self.shipping_predictor.predict_one_distribution(row)
+        quantiles = {"p10": dist["p10"], "p50": dist["p50"], "p90": dist["p90"]} if dist["trees"] is not None else None
+        return {"predicted_delay_hours": dist["mean"], "delay_quantiles": quantiles, "input_features": input_data}
     
-    def handle_message(self, user_msg: str, user_id: str):
-        user_info = self.get_user_info(user_id)
+    def inference_stats(self) -> dict:
+        """Metrics batch-size dan queue-wait MicroBatcher untuk model mining & shipping."""
+        mining_predictor = getattr(self.mining_calculator, 'predictor', None)
+        return {
+            "mining": mining_predictor.stats() if mining_predictor else None,
+            "shipping": self.shipping_predictor.stats() if self.shipping_predictor else None
+        }
+    
+    def load_user_context(self, user_id, trace=NULL_TRACE):
+        """
+        (user_info, recent_chats) untuk satu turn. Dari cache sesi jika masih hangat,
+        jika tidak query users + chat_history lalu simpan sebagai sesi baru.
+        """
+        session = self.sessions.get(user_id)
+        if session is None:
+            with trace.span("user_lookup"):
+                user_info = self.get_user_info(user_id)
+            if not user_info:
+                return None, None
+            with trace.span("history_fetch"):
+                recent_chats = self.get_recent_chat_history(user_id)
+            session = self.sessions.load(user_id, user_info['username'], recent_chats)
+        return {"user_id": user_id, "username": session.username}, session.recent_chats()
+    
+    async def load_user_context_async(self, user_id, trace=NULL_TRACE):
+        async def timed(stage, coro):
+            with trace.span(stage):
+                return await coro
+        
+        session = self.sessions.get(user_id)
+        if session is None:
+            # Dua query jalan bersamaan; span masing-masing tetap dicatat terpisah
+            user_info, recent_chats = await asyncio.gather(
+                timed("user_lookup", self.get_user_info_async(user_id)),
+                timed("history_fetch", self.get_recent_chat_history_async(user_id))
+            )
+            if not user_info:
+                return None, None
+            session = self.sessions.load(user_id, user_info['username'], recent_chats)
+        return {"user_id": user_id, "username": session.username}, session.recent_chats()
+    
+    def simulation_job(self, user_msg: str, parsed: ParsedMessage = None):
+        """
+        (sim_type, key, fn, args) untuk simulasi dari pesan user. key = input yang
+        dinormalisasi + versi data + versi model, dipakai SimulationCache.
+        """
+        parsed = parsed or self.classify(user_msg)
+        target_ton, week_start = self.parse_simulation_input(user_msg, parsed)
+        if parsed.has("shipping"):
+            input_data = {
+                "distance": 100.0,
+                "cargo_volume_ton": target_ton,
+                "capacity_ton": 5000.0,
+                "rainfall_mm": 0.0,
+                "wind_speed_kmh": 10.0,
+                "wave_height_m": 1.0,
+                "temperature_c": 25.0,
+                "humidity_percent": 60.0
+            }
+            key = ("shipping", tuple(input_data.items()), self.shipping_model_version)
+            return "shipping", key, self.predict_shipping_delay, (input_data,)
+        
+        key = ("mining",) + self.mining_calculator.simulation_key(target_ton, week_start)
+        return "mining", key, self.mining_calculator.calculate_optimal_value, (target_ton, week_start)
+    
+    def run_simulation(self, user_msg: str, parsed: ParsedMessage = None):
+        """
+        Jalankan simulasi (shipping/mining) dari pesan user.
+        Murni CPU-bound (feature engineering + model.predict), tanpa I/O DB/LLM,
+        sehingga aman dijalankan di executor. parsed = hasil classify() yang sudah
+        dihitung pemanggil, supaya pesan tidak di-scan ulang. Simulasi identik
+        yang sedang/sudah dihitung diambil dari simulation_cache.
+        """
+        sim_type, key, fn, args = self.simulation_job(user_msg, parsed)
+        if self.simulation_cache is None:
+            return fn(*args), sim_type
+        return self.simulation_cache.get_or_compute(key, fn, *args), sim_type
+    
+    async def run_simulation_async(self, user_msg: str, parsed: ParsedMessage = None, trace=NULL_TRACE):
+        """run_simulation untuk event loop: komputasi di thread executor, request identik digabung."""
+        sim_type, key, fn, args = self.simulation_job(user_msg, parsed)
+        if self.simulation_cache is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, trace.run, fn, *args), sim_type
+        return await self.simulation_cache.get_or_compute_async(key, trace.run, fn, *args), sim_type
+    
+    def build_chat_prompt(self, user_msg: str, recent_chats, user_id=None) -> str:
+        """
+        Prompt chat non-simulasi: turn terbaru verbatim dalam budget CONTEXT_CONFIG,
+        turn lama dilipat ke ringkasan bergulir yang disimpan di sesi user.
+        """
+        summary = None
+        session = self.sessions.peek(user_id) if user_id is not None else None
+        if session is not None:
+            if session.summary is None:
+                session.summary = self.context_builder.new_summary()
+            summary = session.summary
+        return self.context_builder.build(user_msg, recent_chats, summary)
+    
+    def new_trace(self):
+        """Trace per request (lihat model/tracing.py); no-op jika TRACING_CONFIG dimatikan."""
+        return Trace() if self.tracing_enabled else NULL_TRACE
+    
+    def new_deadline(self, deadline_ms: float = None):
+        """Deadline request (lihat agent/resilience.py); None jika tidak ada budget."""
+        return Deadline.from_ms(deadline_ms or self.request_budget_ms)
+    
+    def finish_trace(self, trace, result: dict, include_timings: bool = False) -> dict:
+        """Catat durasi stage ke histogram /metrics; tambahkan field timings jika diminta."""
+        trace.finish(result.get("type", "unknown"))
+        if include_timings and self.tracing_enabled:
+            result["timings"] = trace.timings()
+        return result
+    
+    def handle_message(self, user_msg: str, user_id: str, include_timings: bool = False, deadline_ms: float = None):
+        trace = self.new_trace()
+        result = self._handle_message(user_msg, user_id, trace, self.new_deadline(deadline_ms))
+        return self.finish_trace(trace, result, include_timings)
+    
+    def _handle_message(self, user_msg: str, user_id: str, trace, deadline=None):
+        user_info, recent_chats = self.load_user_context(user_id, trace)
         if not user_info:
             return {"type": "error", "answer": "User tidak ditemukan."}
         
-        recent_chats = self.get_recent_chat_history(user_id)
         greeting = f"Hai {user_info['username']}! " if not recent_chats else ""
         
-        if self.is_simulation_request(user_msg):
+        with trace.span("intent"):
+            parsed = self.classify(user_msg)
+        if parsed.has("simulation"):
             try:
-                if self.is_shipping_related(user_msg):
-                    target_ton, week_start = self.parse_simulation_input(user_msg)
-                    input_data = {
-                        "distance": 100.0,
-                        "cargo_volume_ton": target_ton,
-                        "capacity_ton": 5000.0,
-                        "rainfall_mm": 0.0,
-                        "wind_speed_kmh": 10.0,
-                        "wave_height_m": 1.0,
-                        "temperature_c": 25.0,
-                        "humidity_percent": 60.0
-                    }
-                    sim = self.predict_shipping_delay(input_data)
-                    sim_type = "shipping"
-                else:
-                    target_ton, week_start = self.parse_simulation_input(user_msg)
-                    sim = self.mining_calculator.calculate_optimal_value(target_ton=target_ton, week_start=week_start)
-                    sim_type = "mining"
-                
-                llm_prompt = self.format_simulation_for_llm(sim, user_msg, sim_type)
-                natural_answer = ask_gemini(llm_prompt)
-                self.save_chat_history(user_id, user_msg, natural_answer)
-                return {
+                with trace.span("simulation"):
+                    sim, sim_type = trace.run(self.run_simulation, user_msg, parsed)
+                with trace.span("prompt_build"):
+                    llm_prompt = self.format_simulation_for_llm(sim, user_msg, sim_type)
+                    fallback = self.format_simulation_fallback(sim, sim_type)
+                with trace.span("llm"):
+                    natural_answer, llm_status = complete_gemini(llm_prompt, deadline, fallback)
+                with trace.span("history_insert"):
+                    self.save_chat_history(user_id, user_msg, natural_answer)
+                return with_llm_status({
                     "type": "simulation",
                     "result": sim,
                     "answer": greeting + natural_answer
-                }
+                }, llm_status)
             
             except Exception as e:
                 error_msg = f"Error simulasi: {str(e)}"
-                self.save_chat_history(user_id, user_msg, error_msg)
+                with trace.span("history_insert"):
+                    self.save_chat_history(user_id, user_msg, error_msg)
                 return {"type": "error", "answer": greeting + error_msg}
         
         else:
-            if recent_chats:
-                history_context = "\n".join([f"User: {c['message']}\nBot: {c['answer']}" for c in recent_chats])
-                full_prompt = f"Konteks: {history_context}\nPertanyaan: {user_msg}"
-                answer = ask_gemini(full_prompt)
-            else:
-                answer = ask_gemini(user_msg)
-            self.save_chat_history(user_id, user_msg, answer)
-            return {"type": "llm", "answer": greeting + answer}
+            with trace.span("prompt_build"):
+                prompt = self.build_chat_prompt(user_msg, recent_chats, user_id)
+            with trace.span("llm"):
+                answer, llm_status = complete_gemini(prompt, deadline)
+            with trace.span("history_insert"):
+                self.save_chat_history(user_id, user_msg, answer)
+            return with_llm_status({"type": "llm", "answer": greeting + answer}, llm_status)
+    
+    async def handle_message_async(self, user_msg: str, user_id: str, include_timings: bool = False,
+                                   deadline_ms: float = None):
+        """
+        Versi async dari handle_message: DB via asyncpg (hanya saat cache sesi
+        miss), LLM via client async, dan inferensi model dijalankan di thread
+        executor agar event loop tidak pernah ter-block. include_timings=True
+        menambahkan durasi per stage (ms) di field timings.
+        
+        deadline_ms (default RESILIENCE_CONFIG['request_budget_ms']) adalah
+        budget seluruh request; LLM hanya mendapat sisa budget. Jika LLM tidak
+        menjawab, simulasi tetap dijawab dengan template dari rekomendasi dan
+        justifikasinya, dan field llm_fallback berisi alasannya.
+        """
+        trace = self.new_trace()
+        result = await self._handle_message_async(user_msg, user_id, trace, self.new_deadline(deadline_ms))
+        return self.finish_trace(trace, result, include_timings)
+    
+    async def _handle_message_async(self, user_msg: str, user_id: str, trace, deadline=None):
+        user_info, recent_chats = await self.load_user_context_async(user_id, trace)
+        if not user_info:
+            return {"type": "error", "answer": "User tidak ditemukan."}
+        
+        greeting = f"Hai {user_info['username']}! " if not recent_chats else ""
+        
+        with trace.span("intent"):
+            parsed = self.classify(user_msg)
+        if parsed.has("simulation"):
+            try:
+                with trace.span("simulation"):
+                    sim, sim_type = await self.run_simulation_async(user_msg, parsed, trace)
+                with trace.span("prompt_build"):
+                    llm_prompt = self.format_simulation_for_llm(sim, user_msg, sim_type)
+                    fallback = self.format_simulation_fallback(sim, sim_type)
+                with trace.span("llm"):
+                    natural_answer, llm_status = await complete_gemini_async(llm_prompt, deadline, fallback)
+                with trace.span("history_insert"):
+                    await self.save_chat_history_async(user_id, user_msg, natural_answer)
+                return with_llm_status({
+                    "type": "simulation",
+                    "result": sim,
+                    "answer": greeting + natural_answer
+                }, llm_status)
+            
+            except Exception as e:
+                error_msg = f"Error simulasi: {str(e)}"
+                with trace.span("history_insert"):
+                    await self.save_chat_history_async(user_id, user_msg, error_msg)
+                return {"type": "error", "answer": greeting + error_msg}
+        
+        else:
+            with trace.span("prompt_build"):
+                prompt = self.build_chat_prompt(user_msg, recent_chats, user_id)
+            with trace.span("llm"):
+                answer, llm_status = await complete_gemini_async(prompt, deadline)
+            with trace.span("history_insert"):
+                await self.save_chat_history_async(user_id, user_msg, answer)
+            return with_llm_status({"type": "llm", "answer": greeting + answer}, llm_status)
+    
+    async def handle_message_stream(self, user_msg: str, user_id: str, include_timings: bool = False,
+                                    deadline_ms: float = None):
+        """
+        Versi streaming dari handle_message_async. Yield pasangan (event, data):
+        - "simulation": hasil simulasi (dikirim sebelum jawaban LLM)
+        - "token": potongan jawaban LLM begitu diterima
+        - "done": jawaban lengkap (disimpan ke chat_history setelah stream selesai)
+        - "error": user tidak ditemukan / simulasi gagal
+        Event terakhir (done/error) membawa timings jika include_timings=True.
+        deadline_ms seperti di handle_message_async; event done membawa
+        llm_fallback jika jawaban LLM diganti template.
+        """
+        trace = self.new_trace()
+        deadline = self.new_deadline(deadline_ms)
+        async for event, data in self._handle_message_stream(user_msg, user_id, trace, deadline):
+            if event in ("done", "error"):
+                data = self.finish_trace(trace, data, include_timings)
+            yield event, data
+    
+    async def _handle_message_stream(self, user_msg: str, user_id: str, trace, deadline=None):
+        user_info, recent_chats = await self.load_user_context_async(user_id, trace)
+        if not user_info:
+            yield "error", {"type": "error", "answer": "User tidak ditemukan."}
+            return
+        
+        greeting = f"Hai {user_info['username']}! " if not recent_chats else ""
+        
+        with trace.span("intent"):
+            parsed = self.classify(user_msg)
+        if parsed.has("simulation"):
+            try:
+                with trace.span("simulation"):
+                    sim, sim_type = await self.run_simulation_async(user_msg, parsed, trace)
+            except Exception as e:
+                error_msg = f"Error simulasi: {str(e)}"
+                with trace.span("history_insert"):
+                    await self.save_chat_history_async(user_id, user_msg, error_msg)
+                yield "error", {"type": "error", "answer": greeting + error_msg}
+                return
+            yield "simulation", {"type": "simulation", "result": sim}
+            response_type = "simulation"
+            with trace.span("prompt_build"):
+                prompt = self.format_simulation_for_llm(sim, user_msg, sim_type)
+                fallback = self.format_simulation_fallback(sim, sim_type)
+        else:
+            response_type = "llm"
+            with trace.span("prompt_build"):
+                prompt = self.build_chat_prompt(user_msg, recent_chats, user_id)
+                fallback = FALLBACK_ANSWER
+        
+        if greeting:
+            yield "token", {"text": greeting}
+        parts = []
+        llm_started = time.perf_counter()
+        outcome = {}
+        async for chunk in stream_gemini_async(prompt, deadline=deadline, fallback=fallback, outcome=outcome):
+            if not parts:
+                trace.record("llm_first_token", time.perf_counter() - llm_started)
+            parts.append(chunk)
+            yield "token", {"text": chunk}
+        trace.record("llm", time.perf_counter() - llm_started)
+        
+        answer = "".join(parts).strip()
+        with trace.span("history_insert"):
+            await self.save_chat_history_async(user_id, user_msg, answer)
+        yield "done", with_llm_status({"type": response_type, "answer": greeting + answer}, outcome.get("status", OK))
     
     def close_connection(self):
+        if getattr(self, 'weekly_outlook', None):
+            self.weekly_outlook.stop()
+        if getattr(self, 'model_registry', None):
+            self.model_registry.stop()
+        if getattr(self, 'mining_refresher', None):
+            self.mining_refresher.stop()
+        if getattr(self, 'shipping_predictor', None):
+            self.shipping_predictor.close()
+        if getattr(self.mining_calculator, 'predictor', None):
+            self.mining_calculator.predictor.close()
         if hasattr(self, 'engine') and self.engine:
             self.engine.dispose()
+    
+    async def close_connection_async(self):
+        # Drain antrean write-behind dulu supaya tidak ada chat_history yang hilang
+        if getattr(self, 'history_writer', None):
+            await self.history_writer.close()
+        if getattr(self, 'async_engine', None):
+            await self.async_engine.dispose()
+        self.close_connection()
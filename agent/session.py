@@ -0,0 +1,118 @@
+import datetime
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+
+class UserSession:
+    """Username + ring terbatas berisi turn terakhir (urut kronologis) untuk satu user."""
+
+    def __init__(self, user_id, username: str, max_turns: int, loaded_at: float):
+        self.user_id = user_id
+        self.username = username
+        self.turns = deque(maxlen=max_turns)
+        self.loaded_at = loaded_at
+        self.summary = None  # RollingSummary (agent/context.py), dibuat saat prompt pertama
+
+    def recent_chats(self, hours: int = 24) -> Optional[List[Dict[str, Any]]]:
+        """Format sama dengan get_recent_chat_history: newest-first, None jika kosong."""
+        since_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
+        since_aware = since_time.astimezone()  # untuk kolom timestamptz
+        chats = [
+            turn for turn in reversed(list(self.turns))
+            if turn["created_at"] >= (since_aware if turn["created_at"].tzinfo else since_time)
+        ]
+        return chats or None
+
+
+class SessionStore:
+    """
+    Cache sesi in-memory per user_id: username dan turn terakhir.
+
+    Sesi dimuat sekali dari DB (users + chat_history), lalu diperbarui setiap
+    save_chat_history sehingga turn berikutnya tidak perlu membaca PostgreSQL.
+    Sesi kedaluwarsa setelah ttl_seconds (agar tulisan dari worker lain tetap
+    terlihat) dan jumlah user dibatasi max_users dengan eviction LRU.
+    """
+
+    def __init__(self, max_users: int = 10000, max_turns: int = 50, ttl_seconds: float = 300.0):
+        self.max_users = max_users
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[Any, UserSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, user_id) -> Optional[UserSession]:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None and now - session.loaded_at > self.ttl_seconds:
+                del self._sessions[user_id]
+                self.expired += 1
+                session = None
+            if session is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(user_id)
+            self.hits += 1
+            return session
+
+    def peek(self, user_id) -> Optional[UserSession]:
+        """Sesi yang sedang di-cache tanpa mengubah urutan LRU maupun counter hit/miss."""
+        with self._lock:
+            return self._sessions.get(user_id)
+
+    def load(self, user_id, username: str, recent_chats: Optional[List[Dict[str, Any]]]) -> UserSession:
+        """Simpan sesi hasil query DB (recent_chats newest-first seperti get_recent_chat_history)."""
+        session = UserSession(user_id, username, self.max_turns, time.monotonic())
+        for chat in reversed(recent_chats or []):
+            session.turns.append({
+                "message": chat["message"],
+                "answer": chat["answer"],
+                "created_at": chat["created_at"]
+            })
+        with self._lock:
+            self._sessions[user_id] = session
+            self._sessions.move_to_end(user_id)
+            while len(self._sessions) > self.max_users:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+
+    def record_turn(self, user_id, message: str, answer: str, created_at: datetime.datetime = None):
+        """Update-on-write: tambahkan turn ke sesi yang sedang di-cache (jika ada)."""
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None:
+                session.turns.append({
+                    "message": message,
+                    "answer": answer,
+                    # Aware (zona lokal), sama dengan created_at dari kolom timestamptz chat_history
+                    "created_at": created_at or datetime.datetime.now().astimezone()
+                })
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._sessions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "max_users": self.max_users,
+                "max_turns": self.max_turns
+            }
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SimulationCache:
+    """
+    Single-flight + cache LRU/TTL untuk hasil simulasi.
+
+    Request dengan key sama yang datang bersamaan menunggu satu komputasi yang
+    sedang berjalan (in-flight) alih-alih menghitung ulang; hasil yang selesai
+    disimpan maksimal ttl_seconds. Key sudah memuat versi data dan versi model
+    (lihat ChatRouter.simulation_job), jadi setelah data di-append atau model
+    di-reload key lama tidak pernah dipakai lagi dan tergeser LRU/TTL. Error
+    tidak di-cache. Hasil dibagi antar request: perlakukan sebagai read-only.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0, "errors": 0}
+
+    def _begin(self, key: Hashable):
+        """('hit', nilai) | ('wait', future in-flight) | ('lead', future baru yang harus diisi pemanggil)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return "hit", value
+                del self._entries[key]
+                self.counters["expired"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+                return "wait", future
+            future = Future()
+            self._inflight[key] = future
+            self.counters["misses"] += 1
+            return "lead", future
+
+    def _complete(self, key: Hashable, future: Future, value: Any = None, error: BaseException = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None:
+                self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.counters["evictions"] += 1
+            else:
+                self.counters["errors"] += 1
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get_or_compute(self, key: Hashable, fn: Callable, *args):
+        """Versi sync (thread-safe): hasil cache, tunggu in-flight, atau hitung fn(*args)."""
+        state, obj = self._begin(key)
+        if state == "hit":
+            return obj
+        if state == "wait":
+            return obj.result()
+        try:
+            value = fn(*args)
+        except Exception as e:
+            self._complete(key, obj, error=e)
+            raise
+        self._complete(key, obj, value)
+        return value
+
+    async def get_or_compute_async(self, key: Hashable, fn: Callable, *args):
+        """
+        Versi async: fn(*args) dijalankan di thread executor. Komputasi tidak ikut
+        dibatalkan jika request pemimpinnya dibatalkan (client putus), sehingga
+        request lain yang menunggu tetap mendapat hasil.
+        """
+        state, obj = self._begin(key)
+        if state == "hit":
+            return obj
+        if state == "lead":
+            def run():
+                try:
+                    value = fn(*args)
+                except Exception as e:
+                    self._complete(key, obj, error=e)
+                    return
+                self._complete(key, obj, value)
+            asyncio.get_running_loop().run_in_executor(None, run)
+        return await asyncio.shield(asyncio.wrap_future(obj))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hit_rate": (self.counters["hits"] + self.counters["coalesced"]) / lookups if lookups else 0.0,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
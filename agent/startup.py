@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+
+def run_startup_tasks(tasks: Dict[str, Callable[[], Any]], parallel: bool = True,
+                      max_workers: int = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Jalankan task inisialisasi yang saling independen (load data, load model,
+    client LLM), paralel di thread pool atau berurutan. Sebagian besar waktunya
+    I/O atau import/unpickle di C yang melepas GIL, jadi thread cukup.
+
+    Return (hasil per task, profile). Profile berisi durasi tiap task dan total
+    wall-clock dalam ms. Jika ada task yang gagal, error task pertama (urutan
+    dict) di-raise setelah semua task selesai.
+    """
+    timings: Dict[str, float] = {}
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    outcomes = {}
+    if parallel and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers or len(tasks), thread_name_prefix="startup") as pool:
+            futures = {name: pool.submit(timed, name, fn) for name, fn in tasks.items()}
+            for name, future in futures.items():
+                error = future.exception()
+                outcomes[name] = (None, error) if error is not None else (future.result(), None)
+    else:
+        for name, fn in tasks.items():
+            try:
+                outcomes[name] = (timed(name, fn), None)
+            except Exception as e:
+                outcomes[name] = (None, e)
+    wall_ms = (time.perf_counter() - started) * 1000.0
+
+    for name, (_, error) in outcomes.items():
+        if error is not None:
+            raise error
+    profile = {
+        "parallel": parallel,
+        "wall_ms": wall_ms,
+        "tasks_ms": {name: timings[name] for name in tasks},
+    }
+    return {name: result for name, (result, _) in outcomes.items()}, profile
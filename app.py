@@ -1,14 +1,20 @@
 # app.py (update untuk handle error model dengan lebih baik)
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from agent.router import ChatRouter
+from typing import List, Optional
+import asyncio
+import datetime
+import json
+import math
+import numpy as np
 import os
+import time
+from model.tracing import METRICS
 
-app = FastAPI(
-    title="Mining Value Chain Chatbox API",
-    description="API untuk chatbot simulasi mining dan shipping dengan integrasi PostgreSQL.",
-    version="1.0.0"
-)
+# ChatRouter (pandas, SQLAlchemy, model, SDK Gemini) sengaja TIDAK di-import di
+# level modul: import app.py cepat dan semua yang berat di-load di lifespan.
 
 # Konfigurasi default untuk ChatRouter
 DEFAULT_DF_PATH = None  # Jika None, load dari DB PostgreSQL
@@ -17,70 +23,281 @@ DEFAULT_MODEL_PATHS = {
     'shipping': os.path.join(os.getcwd(), 'models', 'shipping_simulation_rf.pkl')
 }
 
-# Inisiasi Router dengan parameter
 router = None
-try:
-    router = ChatRouter(
-        df_path=DEFAULT_DF_PATH,
-        model_paths=DEFAULT_MODEL_PATHS
-    )
-except Exception as e:
-    print(f"Warning: Model gagal load ({str(e)}). Menggunakan fallback rule-based saja. Retrain model jika perlu.")
+# Status startup untuk /health: liveness = proses hidup, readiness = router siap
+startup_state = {"ready": False, "error": None, "started_at": None, "profile": None}
+
+
+def build_router():
+    """Import + inisiasi ChatRouter (dengan fallback tanpa model / tanpa DB). Dijalankan di thread."""
+    started = time.perf_counter()
+    from agent.router import ChatRouter
+    import_ms = (time.perf_counter() - started) * 1000.0
+    
     try:
-        # Fallback tanpa model
-        router = ChatRouter(
+        new_router = ChatRouter(
             df_path=DEFAULT_DF_PATH,
-            model_paths=None  # Skip load model
+            model_paths=DEFAULT_MODEL_PATHS
         )
-    except Exception as fallback_e:
-        print(f"Error fallback: {str(fallback_e)}")
-        # Jika masih gagal, inisiasi minimal tanpa DB dan model (untuk test)
+    except Exception as e:
+        print(f"Warning: Model gagal load ({str(e)}). Menggunakan fallback rule-based saja. Retrain model jika perlu.")
         try:
-            router = ChatRouter(
-                df_path='dummy',  # Gunakan dummy untuk skip DB load
-                model_paths=None
+            # Fallback tanpa model
+            new_router = ChatRouter(
+                df_path=DEFAULT_DF_PATH,
+                model_paths=None  # Skip load model
             )
-        except Exception as minimal_e:
-            raise RuntimeError(f"Gagal inisiasi ChatRouter sepenuhnya: {str(minimal_e)}. Cek kode dan dependencies.")
+        except Exception as fallback_e:
+            print(f"Error fallback: {str(fallback_e)}")
+            # Jika masih gagal, inisiasi minimal tanpa DB dan model (untuk test)
+            try:
+                new_router = ChatRouter(
+                    df_path='dummy',  # Gunakan dummy untuk skip DB load
+                    model_paths=None
+                )
+            except Exception as minimal_e:
+                raise RuntimeError(f"Gagal inisiasi ChatRouter sepenuhnya: {str(minimal_e)}. Cek kode dan dependencies.")
+    
+    startup_state["profile"] = {
+        "import_ms": import_ms,
+        "total_ms": (time.perf_counter() - started) * 1000.0,
+        "router": new_router.startup_profile
+    }
+    return new_router
+
+
+async def initialize_router():
+    global router
+    loop = asyncio.get_running_loop()
+    try:
+        router = await loop.run_in_executor(None, build_router)
+        startup_state["ready"] = True
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"Error startup: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from config import STARTUP_CONFIG
+    startup_state["started_at"] = time.time()
+    init_task = asyncio.create_task(initialize_router())
+    if STARTUP_CONFIG.get('wait_for_ready', False):
+        await init_task
+    yield
+    await init_task
+    if router is not None:
+        await router.close_connection_async()
+
+
+app = FastAPI(
+    title="Mining Value Chatbox API",
+    description="API untuk chatbot simulasi mining dan shipping dengan integrasi PostgreSQL.",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+
+def require_router():
+    """ChatRouter yang siap dipakai; 503 selama startup, 500 jika startup gagal."""
+    if router is not None:
+        return router
+    if startup_state["error"] is not None:
+        raise HTTPException(status_code=500, detail=f"ChatRouter gagal diinisiasi: {startup_state['error']}")
+    raise HTTPException(status_code=503, detail="ChatRouter sedang diinisiasi, coba lagi sebentar.")
 
 class ChatRequest(BaseModel):
     message: str
     user_id: str
 
+class SweepRequest(BaseModel):
+    week_start: Optional[str] = None  # YYYY-MM-DD, default hari ini
+    n_weeks: int = 12
+    targets: Optional[List[float]] = None
+    # Alternatif targets: range target_min..target_max (inklusif) dengan target_step
+    target_min: Optional[float] = None
+    target_max: Optional[float] = None
+    target_step: Optional[float] = None
+    include_recommendations: bool = False  # rekomendasi & justifikasi per (minggu, target)
+
+MAX_SWEEP_WEEKS = 104
+MAX_SWEEP_TARGETS = 500
+
 @app.post("/chat")
-async def chat_endpoint(req: ChatRequest):
-    if router is None:
-        raise HTTPException(status_code=500, detail="ChatRouter belum diinisiasi.")
+async def chat_endpoint(req: ChatRequest, timings: bool = False, deadline_ms: Optional[float] = None):
+    router = require_router()
     
     try:
-        result = router.handle_message(req.message, req.user_id)
+        result = await router.handle_message_async(req.message, req.user_id, include_timings=timings,
+                                                   deadline_ms=deadline_ms)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest, timings: bool = False, deadline_ms: Optional[float] = None):
+    router = require_router()
+    
+    async def event_stream():
+        try:
+            async for event, data in router.handle_message_stream(req.message, req.user_id, include_timings=timings,
+                                                                  deadline_ms=deadline_ms):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"type": "error", "answer": f"Error processing chat: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/history")
+async def history_endpoint(request: Request, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    History chat satu user, pagination keyset: kirim next_cursor dari respons
+    sebelumnya untuk halaman berikutnya.
+
+    API ini tidak punya autentikasi sendiri; seperti /chat, user_id dipercaya apa
+    adanya. Jika HISTORY_API_CONFIG['identity_header'] diisi, user_id harus sama
+    dengan header identitas dari gateway (403 jika tidak ada / berbeda). Tanpa itu,
+    endpoint ini hanya boleh dijangkau dari jaringan yang sudah dibatasi.
+    """
+    router = require_router()
+    
+    identity_header = router.history_page_config.get('identity_header')
+    if identity_header and request.headers.get(identity_header) != user_id:
+        raise HTTPException(status_code=403, detail="Tidak boleh membaca history user lain.")
+    max_limit = router.history_page_config.get('max_limit', 200)
+    if limit is not None and not 1 <= limit <= max_limit:
+        raise HTTPException(status_code=400, detail=f"limit harus 1..{max_limit}.")
+    try:
+        return await router.get_chat_history_page_async(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error history: {str(e)}")
+
 @app.get("/")
 def root():
     return {"message": "Mining Value Chatbox API is running. Gunakan POST /chat untuk interaksi."}
 
+def startup_status() -> dict:
+    return {
+        "live": True,
+        "ready": startup_state["ready"],
+        "error": startup_state["error"],
+        "uptime_s": time.time() - startup_state["started_at"] if startup_state["started_at"] else None,
+        "profile": startup_state["profile"]
+    }
+
+def startup_metrics() -> list:
+    lines = ["# HELP app_ready 1 jika ChatRouter sudah siap melayani request.", "# TYPE app_ready gauge",
+             f"app_ready {int(startup_state['ready'])}"]
+    profile = startup_state["profile"]
+    if profile is not None:
+        lines += ["# HELP app_startup_seconds Durasi inisialisasi ChatRouter (termasuk import).",
+                  "# TYPE app_startup_seconds gauge", f"app_startup_seconds {profile['total_ms'] / 1000.0!r}"]
+    return lines
+
+METRICS.collectors.append(startup_metrics)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # Format teks Prometheus: histogram durasi per stage chat + total per tipe respons
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+def liveness_check():
+    # Hanya cek proses + event loop hidup; tidak menunggu DB/model
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    if router is None:
+        return JSONResponse(status_code=503, content={"status": "starting" if startup_state["error"] is None else "failed",
+                                                      "startup": startup_status()})
+    return {"status": "ready"}
+
 @app.get("/health")
 def health_check():
     if router is None:
-        return {"status": "unhealthy", "error": "ChatRouter belum diinisiasi."}
+        if startup_state["error"] is not None:
+            return {"status": "unhealthy", "error": f"ChatRouter gagal diinisiasi: {startup_state['error']}",
+                    "startup": startup_status()}
+        return {"status": "starting", "startup": startup_status()}
     
     try:
-        return {"status": "healthy", "message": "API running."}
+        from agent.llm import get_llm_client
+        llm_client = get_llm_client()
+        llm_cache = llm_client.cache
+        return {
+            "status": "healthy",
+            "message": "API running.",
+            "startup": startup_status(),
+            "models": router.model_registry.stats() if router.model_registry else None,
+            "inference": router.inference_stats(),
+            "sessions": router.sessions.stats(),
+            "history_writer": router.history_writer.stats() if router.history_writer else None,
+            "data_refresh": router.mining_refresher.stats() if router.mining_refresher else None,
+            "simulation_cache": router.simulation_cache.stats() if router.simulation_cache else None,
+            "weekly_outlook": router.weekly_outlook.stats() if router.weekly_outlook else None,
+            "llm_cache": llm_cache.stats() if llm_cache else None,
+            "llm": llm_client.stats()
+        }
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
 @app.post("/simulate")
-async def simulate_endpoint(req: ChatRequest):
-    if router is None:
-        raise HTTPException(status_code=500, detail="ChatRouter belum diinisiasi.")
+async def simulate_endpoint(req: ChatRequest, timings: bool = False, deadline_ms: Optional[float] = None):
+    router = require_router()
     
     try:
-        result = router.handle_message(req.message, req.user_id)
+        result = await router.handle_message_async(req.message, req.user_id, include_timings=timings,
+                                                   deadline_ms=deadline_ms)
         if result.get("type") not in ["simulation", "error"]:
             raise HTTPException(status_code=400, detail="Pesan bukan simulasi.")
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error simulation: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error simulation: {str(e)}")
+
+@app.post("/simulate/sweep")
+async def simulate_sweep_endpoint(req: SweepRequest):
+    router = require_router()
+    
+    limit_detail = f"Maksimal {MAX_SWEEP_WEEKS} minggu dan {MAX_SWEEP_TARGETS} target."
+    if not 1 <= req.n_weeks <= MAX_SWEEP_WEEKS:
+        raise HTTPException(status_code=400, detail=limit_detail)
+    if req.targets:
+        if len(req.targets) > MAX_SWEEP_TARGETS:
+            raise HTTPException(status_code=400, detail=limit_detail)
+        targets = req.targets
+    elif req.target_min is not None and req.target_max is not None and req.target_step is not None:
+        # Jumlah target dihitung dulu: range besar / step kecil ditolak sebelum ada alokasi di event loop
+        if not all(math.isfinite(v) for v in (req.target_min, req.target_max, req.target_step)) \
+                or req.target_step <= 0 or req.target_max < req.target_min:
+            raise HTTPException(status_code=400, detail="target_step harus > 0 dan target_max >= target_min.")
+        span = (req.target_max - req.target_min) / req.target_step  # bisa inf untuk nilai ekstrem
+        n_targets = math.floor(span + 1e-9) + 1 if span < MAX_SWEEP_TARGETS else MAX_SWEEP_TARGETS + 1
+        if n_targets > MAX_SWEEP_TARGETS:
+            raise HTTPException(status_code=400, detail=limit_detail)
+        targets = (req.target_min + req.target_step * np.arange(n_targets)).tolist()
+    else:
+        raise HTTPException(status_code=400, detail="Isi targets atau target_min/target_max/target_step.")
+    
+    try:
+        week_start = datetime.datetime.strptime(req.week_start, "%Y-%m-%d") if req.week_start else datetime.datetime.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format week_start harus YYYY-MM-DD.")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, router.mining_calculator.calculate_target_sweep, week_start, req.n_weeks, targets,
+            req.include_recommendations
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error sweep: {str(e)}")
@@ -0,0 +1,68 @@
+# benchmarks/bench_async_chat.py
+# Benchmark konkurensi /chat: path lama (handle_message blocking di dalam
+# endpoint async) vs handle_message_async. DB dan LLM di-stub dengan latency
+# tetap sehingga yang terukur murni efek blocking pada event loop.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_async_chat
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from agent.llm import FakeLLMBackend, LLMClient, set_llm_client
+from benchmarks.stubs import build_stub_router
+
+MESSAGES = [
+    "Halo, apa kabar?",
+    "simulasi produksi 12000 ton minggu 2024-12-02",
+    "Bagaimana cuaca untuk operasi?",
+    "prediksi delay kapal 3000 ton",
+]
+
+
+def build_router(db_latency, llm_latency):
+    router = build_stub_router(db_latency)
+    # LLM palsu dengan latency tetap, tanpa cache jawaban
+    set_llm_client(LLMClient(FakeLLMBackend(responder=lambda prompt: "ok", latency=llm_latency), cache=None))
+    return router
+
+
+async def run_clients(handler, n_clients):
+    # Semua client datang bersamaan; latency dihitung dari waktu datang yang
+    # sama sehingga waktu antre di event loop ikut terukur.
+    latencies = []
+    t0 = time.perf_counter()
+
+    async def client(i):
+        await handler(MESSAGES[i % len(MESSAGES)], "u1")
+        latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(client(i) for i in range(n_clients)))
+    wall = time.perf_counter() - t0
+    return np.array(latencies) * 1000, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--db-latency", type=float, default=0.002)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    router = build_router(args.db_latency, args.llm_latency)
+
+    # Endpoint lama: async def yang memanggil handle_message sinkron
+    async def blocking_handler(msg, user_id):
+        return router.handle_message(msg, user_id)
+
+    print(f"{'mode':<10}{'clients':>8}{'p50 ms':>10}{'p99 ms':>10}{'wall s':>9}{'req/s':>9}")
+    for n in args.clients:
+        for name, handler in (("blocking", blocking_handler), ("async", router.handle_message_async)):
+            lat, wall = asyncio.run(run_clients(handler, n))
+            print(f"{name:<10}{n:>8}{np.percentile(lat, 50):>10.1f}{np.percentile(lat, 99):>10.1f}"
+                  f"{wall:>9.2f}{n / wall:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
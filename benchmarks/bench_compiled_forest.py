@@ -0,0 +1,79 @@
+# benchmarks/bench_compiled_forest.py
+# Bandingkan RandomForestRegressor sklearn (pickle) dengan CompiledForest:
+# selisih prediksi, latency single-row & batch, dan RSS proses setelah load.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_compiled_forest
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from model.forest import CompiledForest, load_pickled_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS = ["mining_simulation_rf.pkl", "shipping_simulation_rf.pkl"]
+
+RSS_SNIPPET = """
+import gc, sys
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * 4096
+import numpy, sklearn.ensemble
+from model.forest import CompiledForest, load_pickled_model
+before = rss()
+m = load_pickled_model(sys.argv[2]) if sys.argv[1] == 'pickle' else CompiledForest.load(sys.argv[2])
+m.predict(numpy.zeros((1, m.n_features_in_)))
+gc.collect()
+print(rss() - before)
+"""
+
+
+def rss_after_load(kind, path):
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", RSS_SNIPPET, kind, path],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return int(out.stdout.strip()) / 1e6
+
+
+def per_call_ms(fn, X, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - t0) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'model':<28}{'max |diff|':>12}{'1-row skl':>11}{'1-row cf':>10}"
+              f"{'batch skl':>11}{'batch cf':>10}{'RSS skl MB':>12}{'RSS cf MB':>11}")
+        for name in MODELS:
+            path = os.path.join(ROOT, "models", name)
+            model = load_pickled_model(path)
+            forest_dir = os.path.join(tmp, name + ".forest")
+            CompiledForest.from_sklearn(model).save(forest_dir)
+            forest = CompiledForest.load(forest_dir)
+
+            X = rng.random((args.rows, model.n_features_in_)) * 100
+            diff = np.abs(model.predict(X) - forest.predict(X)).max()
+            one = X[:1]
+            print(f"{name:<28}{diff:>12.2e}"
+                  f"{per_call_ms(model.predict, one, args.repeat):>11.2f}"
+                  f"{per_call_ms(forest.predict, one, args.repeat):>10.3f}"
+                  f"{per_call_ms(model.predict, X, 5):>11.1f}"
+                  f"{per_call_ms(forest.predict, X, 5):>10.1f}"
+                  f"{rss_after_load('pickle', path):>12.1f}"
+                  f"{rss_after_load('compiled', forest_dir):>11.1f}")
+        print("latency dalam ms; batch =", args.rows, "rows")
+
+
+if __name__ == "__main__":
+    main()
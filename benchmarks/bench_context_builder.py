@@ -0,0 +1,95 @@
+# benchmarks/bench_context_builder.py
+# Ukuran prompt dan waktu build konteks chat untuk history panjang sintetis:
+# join semua turn 24 jam (cara lama) vs ContextBuilder dengan budget karakter,
+# baik ringkasan bergulir inkremental maupun dihitung ulang tiap turn.
+# Latency LLM dimodelkan linear terhadap jumlah token prompt (~4 karakter/token).
+# Sebelumnya dicek: history campuran created_at aware (kolom timestamptz) dan
+# naive (turn sesi lama) tetap bisa dilipat ke ringkasan.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_context_builder
+import argparse
+import datetime
+import time
+
+import numpy as np
+
+from agent.context import ContextBuilder
+
+
+def legacy_prompt(user_msg, recent_chats):
+    if recent_chats:
+        history_context = "\n".join([f"User: {c['message']}\nBot: {c['answer']}" for c in recent_chats])
+        return f"Konteks: {history_context}\nPertanyaan: {user_msg}"
+    return user_msg
+
+
+def synthetic_history(n_turns, answer_chars):
+    start = datetime.datetime.now() - datetime.timedelta(hours=20)
+    step = datetime.timedelta(hours=20) / n_turns
+    filler = "produksi batubara minggu ini dipengaruhi curah hujan dan ketersediaan kapal "
+    return [{
+        "message": f"pertanyaan ke-{i} tentang target produksi dan jadwal tongkang",
+        "answer": (f"jawaban {i}: " + filler * (answer_chars // len(filler) + 1))[:answer_chars],
+        "created_at": start + step * i
+    } for i in range(n_turns)]
+
+
+def run(history, build):
+    sizes, times = [], []
+    for t in range(1, len(history) + 1):
+        recent_chats = list(reversed(history[:t]))  # newest-first seperti get_recent_chat_history
+        t0 = time.perf_counter()
+        prompt = build(f"pertanyaan baru {t}", recent_chats)
+        times.append(time.perf_counter() - t0)
+        sizes.append(len(prompt))
+    return np.array(sizes), np.array(times) * 1e6
+
+
+def mixed_timezone_check(answer_chars):
+    """Turn dari DB (aware) lalu turn baru dari sesi (naive, lalu aware), dilipat inkremental tanpa error."""
+    history = synthetic_history(60, answer_chars)
+    for i, chat in enumerate(history):
+        if i < 30:
+            chat["created_at"] = chat["created_at"].astimezone()  # seperti baris timestamptz dari DB
+        elif i % 2:
+            chat["created_at"] = chat["created_at"].astimezone(datetime.timezone.utc)
+    builder = ContextBuilder(max_chars=2000)
+    summary = builder.new_summary()
+    run(history, lambda msg, chats: builder.build(msg, chats, summary))
+    older, _ = builder.split(list(reversed(history)))
+    assert len(summary.lines) and summary.folded_until == older[-1]["created_at"].astimezone(), \
+        "turn campuran aware/naive tidak terlipat urut"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--answer-chars", type=int, default=600)
+    parser.add_argument("--max-chars", type=int, default=4000)
+    parser.add_argument("--llm-base-ms", type=float, default=300.0)
+    parser.add_argument("--llm-ms-per-1k-tokens", type=float, default=150.0)
+    args = parser.parse_args()
+
+    mixed_timezone_check(args.answer_chars)
+    history = synthetic_history(args.turns, args.answer_chars)
+    builder = ContextBuilder(max_chars=args.max_chars)
+    summary = builder.new_summary()
+
+    modes = {
+        "legacy": legacy_prompt,
+        "budget+incr": lambda msg, chats: builder.build(msg, chats, summary),
+        "budget+recomp": lambda msg, chats: builder.build(msg, chats, None),
+    }
+
+    print(f"{'mode':<15}{'avg chars':>10}{'max chars':>10}{'avg tokens':>11}{'build us':>10}{'llm ms*':>9}")
+    for name, build in modes.items():
+        sizes, times = run(history, build)
+        tokens = sizes / 4.0
+        llm_ms = args.llm_base_ms + tokens / 1000.0 * args.llm_ms_per_1k_tokens
+        print(f"{name:<15}{sizes.mean():>10.0f}{sizes.max():>10}{tokens.mean():>11.0f}"
+              f"{times.mean():>10.1f}{llm_ms.mean():>9.0f}")
+    print("* latency LLM dimodelkan: base + ms per 1k token prompt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/bench_history.py
+# GET /history: pagination keyset (ChatRouter.get_chat_history_page, index
+# migrations/001_chat_history_keyset_index.sql) vs LIMIT/OFFSET pada kedalaman
+# halaman yang sama, plus query history 24 jam lama tanpa LIMIT, di SQLite
+# lokal berisi jutaan row chat_history (satu user "berat" + banyak user biasa).
+# Terakhir: keyset yang sama jika hanya ada index (user_id).
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_history
+import argparse
+import datetime
+import logging
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import text
+
+from benchmarks.standins import SCHEMA, TIMESTAMP_FORMAT, SQLiteChatRouter, mining_rows, sqlite_engine
+
+HEAVY_USER = str(uuid.UUID(int=1))
+
+
+def seed(db_path, heavy_rows, users, rows_per_user):
+    engine = sqlite_engine(db_path)
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+    mining_rows(2000).to_sql("mining_clean2", engine, if_exists="replace", index=False)
+    engine.dispose()
+
+    # executemany langsung (jutaan row); satu row per detik mundur dari sekarang
+    now = datetime.datetime.now()
+    user_ids = [HEAVY_USER] + [str(uuid.UUID(int=i + 2)) for i in range(users)]
+
+    def rows():
+        for uid, n in [(HEAVY_USER, heavy_rows)] + [(uid, rows_per_user) for uid in user_ids[1:]]:
+            for j in range(n):
+                yield (uid, f"pesan {j}", f"jawaban {j}", str(uuid.UUID(int=j * 7919 + 1)),
+                       (now - datetime.timedelta(seconds=j + 1)).strftime(TIMESTAMP_FORMAT))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users VALUES (?, ?)", (HEAVY_USER, "berat"))
+    conn.executemany("INSERT INTO users VALUES (?, ?)", [(uid, f"user{i}") for i, uid in enumerate(user_ids[1:])])
+    conn.executemany("INSERT INTO chat_history (user_id, message, answer, chat_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                     rows())
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return heavy_rows + users * rows_per_user
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def offset_page(router, user_id, limit, offset):
+    query = text("SELECT chat_id, message, answer, created_at FROM chat_history WHERE user_id = :user_id "
+                 "ORDER BY created_at DESC, chat_id DESC LIMIT :limit OFFSET :offset")
+    with router.engine.connect() as conn:
+        return conn.execute(query, {"user_id": user_id, "limit": limit, "offset": offset}).fetchall()
+
+
+def unbounded_recent(router, user_id, hours=24):
+    # Query get_recent_chat_history sebelum ada LIMIT
+    since_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
+    query = text("SELECT message, answer, created_at FROM chat_history "
+                 "WHERE user_id = :user_id AND created_at >= :since_time ORDER BY created_at DESC")
+    with router.engine.connect() as conn:
+        return conn.execute(query, {"user_id": user_id, "since_time": since_time}).fetchall()
+
+
+def cursor_at(router, user_id, limit, page):
+    """Cursor awal halaman ke-page (1-based), diambil dengan berjalan lewat OFFSET sekali saja."""
+    if page == 1:
+        return None
+    last = offset_page(router, user_id, 1, (page - 1) * limit - 1)[0]
+    from agent.router import encode_history_cursor
+    return encode_history_cursor(last.created_at, last.chat_id)
+
+
+def run_depths(router, limit, pages, repeat, with_offset=True):
+    for page in pages:
+        cursor = cursor_at(router, HEAVY_USER, limit, page)
+        keyset_page = router.get_chat_history_page(HEAVY_USER, limit, cursor)
+        keyset_ms = timed(lambda: router.get_chat_history_page(HEAVY_USER, limit, cursor), repeat)
+        line = f"{page:>10}{(page - 1) * limit:>12}{keyset_ms:>12.2f}"
+        if with_offset:
+            rows = offset_page(router, HEAVY_USER, limit, (page - 1) * limit)
+            assert [r.chat_id for r in rows] == [i["chat_id"] for i in keyset_page["items"]], "halaman berbeda"
+            offset_ms = timed(lambda: offset_page(router, HEAVY_USER, limit, (page - 1) * limit), repeat)
+            line += f"{offset_ms:>12.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--heavy-rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rows-per-user", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "history.sqlite")
+        t0 = time.perf_counter()
+        total = seed(db_path, args.heavy_rows, args.users, args.rows_per_user)
+        print(f"seed: {total:,} row chat_history ({args.heavy_rows:,} milik satu user) dalam "
+              f"{time.perf_counter() - t0:.1f}s, {os.path.getsize(db_path) / 1e6:.0f} MB\n")
+        router = SQLiteChatRouter(db_path, model_paths=None)
+
+        print(f"halaman {args.limit} row, user berat, median {args.repeat}x (ms)")
+        print(f"{'halaman':>10}{'offset row':>12}{'keyset':>12}{'OFFSET':>12}")
+        run_depths(router, args.limit, args.pages, args.repeat)
+
+        normal_user = str(uuid.UUID(int=2))
+        print(f"\nuser biasa ({args.rows_per_user} row), halaman 1: "
+              f"{timed(lambda: router.get_chat_history_page(normal_user, args.limit), args.repeat):.2f} ms")
+        n_recent = len(unbounded_recent(router, HEAVY_USER))
+        print(f"history 24 jam user berat: tanpa LIMIT {n_recent:,} row "
+              f"{timed(lambda: unbounded_recent(router, HEAVY_USER), 3):.1f} ms, "
+              f"LIMIT max_turns ({router.sessions.max_turns}) "
+              f"{timed(lambda: router.get_recent_chat_history(HEAVY_USER), args.repeat):.2f} ms")
+
+        # Tanpa index keyset: hanya index (user_id) -> semua row user di-sort per halaman
+        with router.engine.begin() as conn:
+            conn.execute(text("DROP INDEX idx_chat_history_user_created_chat"))
+            conn.execute(text("CREATE INDEX idx_chat_history_user ON chat_history (user_id)"))
+        print("\ntanpa index (user_id, created_at, chat_id), hanya (user_id):")
+        print(f"{'halaman':>10}{'offset row':>12}{'keyset':>12}")
+        run_depths(router, args.limit, args.pages[:1] + args.pages[-1:], 3, with_offset=False)
+        router.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_history_writer.py
+# Insert chat_history per pesan (insert + commit di request path) vs
+# ChatHistoryWriter (write-behind multi-row), dengan SQLite file lokal
+# sebagai stand-in PostgreSQL. Mengukur latency request dan inserts/detik.
+# Sebelumnya dicek: batch yang insert async-nya terus gagal ditulis lewat
+# fallback sync, atau di-log per row jika fallback juga gagal.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_history_writer
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from agent.history_writer import ChatHistoryWriter
+from agent.router import build_chat_history_insert
+
+
+class SQLiteStandIn:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE chat_history (chat_id TEXT PRIMARY KEY, user_id TEXT, message TEXT, answer TEXT,"
+            " created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def insert_rows(self, rows):
+        params = {}
+        for i, row in enumerate(rows):
+            params.update({f"{k}_{i}": v for k, v in row.items()})
+        with self.lock:
+            self.conn.execute(str(build_chat_history_insert(len(rows))), params)
+            self.conn.commit()
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chat_history").fetchone()[0]
+
+
+def make_row(i):
+    return {"user_id": f"u{i % 50}", "message": f"pesan {i}", "answer": "jawaban " * 20, "chat_id": str(uuid.uuid4())}
+
+
+async def drive(save, n_requests, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def request(i):
+        async with sem:
+            t0 = time.perf_counter()
+            await save(make_row(i))
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(request(i) for i in range(n_requests)))
+    return np.array(latencies) * 1000
+
+
+async def per_message(db, n_requests, concurrency):
+    async def save(row):
+        await asyncio.to_thread(db.insert_rows, [row])
+
+    t0 = time.perf_counter()
+    lat = await drive(save, n_requests, concurrency)
+    return lat, time.perf_counter() - t0, {}
+
+
+async def write_behind(db, n_requests, concurrency, batch_size, flush_ms):
+    async def insert_batch(rows):
+        await asyncio.to_thread(db.insert_rows, rows)
+
+    writer = ChatHistoryWriter(insert_batch, batch_size=batch_size, flush_interval_ms=flush_ms)
+    t0 = time.perf_counter()
+    lat = await drive(writer.enqueue, n_requests, concurrency)
+    await writer.close()  # drain: semua row benar-benar tertulis
+    return lat, time.perf_counter() - t0, writer.stats()
+
+
+async def failure_check(db):
+    async def broken(rows):
+        raise RuntimeError("db async down")
+
+    def broken_sync(rows):
+        raise RuntimeError("db sync down")
+
+    writer = ChatHistoryWriter(broken, batch_size=10, flush_interval_ms=5, max_retries=2, fallback=db.insert_rows)
+    for i in range(25):
+        await writer.enqueue(make_row(i))
+    await writer.close()
+    stats = writer.stats()
+    assert stats["fallback_written"] == 25 and stats["failed"] == 0, stats
+    assert db.count() == 25, "row fallback tidak tertulis"
+
+    writer = ChatHistoryWriter(broken, batch_size=10, flush_interval_ms=5, max_retries=1, fallback=broken_sync)
+    for i in range(5):
+        await writer.enqueue(make_row(i))
+    await writer.close()
+    assert writer.stats()["failed"] == 5, writer.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--flush-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'inserts/s':>11}{'req p50 ms':>12}{'req p99 ms':>12}{'rows':>7}{'avg batch':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(failure_check(SQLiteStandIn(os.path.join(tmp, "failure.sqlite"))))
+        for name in ("per-message", "write-behind"):
+            db = SQLiteStandIn(os.path.join(tmp, f"{name}.sqlite"))
+            if name == "per-message":
+                lat, wall, stats = asyncio.run(per_message(db, args.requests, args.concurrency))
+            else:
+                lat, wall, stats = asyncio.run(
+                    write_behind(db, args.requests, args.concurrency, args.batch_size, args.flush_ms))
+            rows = db.count()
+            assert rows == args.requests, "ada write yang hilang"
+            print(f"{name:<14}{rows / wall:>11.0f}{np.percentile(lat, 50):>12.3f}{np.percentile(lat, 99):>12.3f}"
+                  f"{rows:>7}{stats.get('avg_batch_size', 1.0):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_incremental_refresh.py
+# Refresh data mining setelah ada shipment baru: reload penuh (SELECT * +
+# bangun ulang calculator) vs MiningDataRefresher (hanya baris >= high-water
+# mark + append feature store). Juga mengukur latency simulasi yang berjalan
+# bersamaan selama refresh dan memverifikasi hasil fitur identik dengan reload.
+# DB di-stand-in dengan SQLite in-memory berisi Mining_Clean3.csv yang direplikasi.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_incremental_refresh
+import argparse
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from agent.refresher import MiningDataRefresher
+from agent.router import ChatRouter, add_delay_hours
+from benchmarks.stubs import ROOT
+from model.calculator import MiningValueCalculator
+
+DATE_COLUMNS = ["departure_date", "arrival_estimate", "arrival_estimate_new", "week_start"]
+
+
+def synthetic_table(rows):
+    base = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"), parse_dates=DATE_COLUMNS)
+    parts = []
+    for k in range(rows // len(base) + 1):
+        part = base.copy()
+        for col in DATE_COLUMNS:
+            part[col] = part[col] + pd.Timedelta(days=k)
+        parts.append(part)
+    df = pd.concat(parts, ignore_index=True).sort_values("departure_date", kind="stable")
+    return df.iloc[:rows].reset_index(drop=True)
+
+
+def reader_loop(calculator, stop, latencies, week):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        calculator.make_week_features(week)
+        latencies.append(time.perf_counter() - t0)
+
+
+def timed_with_readers(calculator, fn, week):
+    """Jalankan fn sambil thread pembaca terus menghitung fitur mingguan."""
+    stop = threading.Event()
+    latencies = []
+    reader = threading.Thread(target=reader_loop, args=(calculator, stop, latencies, week))
+    reader.start()
+    time.sleep(0.05)
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    reader.join()
+    return result, elapsed, np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--new-rows", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    table = synthetic_table(args.rows + args.new_rows)
+    initial, new = table.iloc[:args.rows], table.iloc[args.rows:]
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    initial.to_sql("mining_clean2", engine, index=False, chunksize=10000)
+
+    router = ChatRouter(df_path='dummy', model_paths=None)
+    router.engine = engine
+    calculator = MiningValueCalculator(df=add_delay_hours(router.fetch_mining_rows_since(None)), model_path=None)
+    refresher = MiningDataRefresher(calculator, router.fetch_mining_rows_since, prepare=add_delay_hours)
+    hwm = refresher.high_water_mark()
+    print(f"rows awal: {len(calculator.df)}, high-water mark: {hwm.date()}, "
+          f"baris baru: {len(new)} ({int((new['departure_date'] == hwm).sum())} di tanggal high-water mark)")
+
+    new.to_sql("mining_clean2", engine, index=False, if_exists="append")
+    week = new["departure_date"].max()
+
+    def full_reload():
+        return MiningValueCalculator(df=add_delay_hours(router.fetch_mining_rows_since(None)), model_path=None)
+
+    reloaded, full_s, full_lat = timed_with_readers(calculator, full_reload, week)
+    added, incr_s, incr_lat = timed_with_readers(calculator, refresher.refresh_once, week)
+
+    print(f"\n{'mode':<14}{'refresh ms':>12}{'rows':>9}{'reader p50 ms':>15}{'reader p99 ms':>15}")
+    print(f"{'full reload':<14}{full_s * 1000:>12.1f}{len(reloaded.df):>9}"
+          f"{np.percentile(full_lat, 50):>15.3f}{np.percentile(full_lat, 99):>15.3f}")
+    print(f"{'incremental':<14}{incr_s * 1000:>12.1f}{len(calculator.df):>9}"
+          f"{np.percentile(incr_lat, 50):>15.3f}{np.percentile(incr_lat, 99):>15.3f}")
+
+    weeks = pd.date_range(week - pd.Timedelta(weeks=8), week + pd.Timedelta(weeks=5), freq="D")
+    identical = all(
+        np.array_equal(calculator.feature_store.window_means(w), reloaded.feature_store.window_means(w), equal_nan=True)
+        for w in weeks
+    )
+    assert added == len(new) and len(calculator.df) == len(reloaded.df) and identical
+    print(f"\nbaris ditambah: {added}, data_version: {calculator.data_version}, fitur identik dengan reload: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_intent_classifier.py
+# Cek IntentClassifier terhadap corpus tabel (intent + tonase + tanggal) dan
+# terhadap implementasi keyword lama untuk pesan acak, lalu ukur throughput
+# (pesan/detik) cara lama (7x lower + loop keyword + 2 regex) vs satu pass.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_intent_classifier
+import argparse
+import random
+import re
+import time
+
+from agent.intents import INTENT_KEYWORDS, IntentClassifier
+
+# (pesan, intent yang diharapkan, tonase, tanggal)
+CORPUS = [
+    ("Simulasi produksi 5000 ton minggu 2024-03-04",
+     {"simulation", "production_target", "weekly_prediction"}, 5000.0, "2024-03-04"),
+    ("prediksi minggu depan", {"simulation", "weekly_prediction"}, 10000.0, None),
+    ("Berapa DELAY kapal MV Sejahtera?", {"simulation", "shipping"}, 10000.0, None),
+    ("cuaca hari ini bagaimana", {"weather"}, 10000.0, None),
+    ("halo", set(), 10000.0, None),
+    ("", set(), 10000.0, None),
+    ("tingkat efisiensi alat berat", {"efficiency", "capacity"}, 10000.0, None),
+    ("kapasitas 12 unit mesin", {"simulation", "capacity"}, 12.0, None),
+    ("target 2024-01-08 sebanyak 7000", {"simulation", "production_target"}, 2024.0, "2024-01-08"),
+    ("vessel arrival after rain", {"shipping", "weather"}, 10000.0, None),
+    ("weekly output", {"weekly_prediction", "production_target"}, 10000.0, None),
+    ("kapalat", {"shipping", "capacity"}, 10000.0, None),
+    ("weatherate", {"weather", "efficiency"}, 10000.0, None),
+    ("tanggal 12024-01-01", set(), 12024.0, "2024-01-01"),
+    ("Persentase hasil besok 300", {"efficiency", "production_target", "weather"}, 300.0, None),
+    ("departure shipping 2023-12-31 dan 2024-01-07", {"shipping"}, 2023.0, "2023-12-31"),
+]
+
+SAMPLE_WORDS = sorted({w for words in INTENT_KEYWORDS.values() for w in words}) + [
+    "tolong", "berapa", "untuk", "batubara", "pit", "A", "Kalimantan", "2024-02-05", "8000", "ton.",
+    "Minggu", "KAPAL", "jadwal", "operator", "alat-berat", "tahun", "hariini"
+]
+
+
+class LegacyParser:
+    """Salinan logika is_*_related + parse_simulation_input sebelum classifier (weather sudah diperbaiki)."""
+
+    def __init__(self):
+        self.keyword_lists = dict(INTENT_KEYWORDS)
+
+    def classify(self, message):
+        intents = {name for name, words in self.keyword_lists.items() if any(k in message.lower() for k in words)}
+        ton_match = re.findall(r"\d+", message)
+        target_ton = float(ton_match[0]) if ton_match else 10000.0
+        date_match = re.findall(r"\d{4}-\d{2}-\d{2}", message)
+        return intents, target_ton, date_match[0] if date_match else None
+
+
+def random_messages(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(1, 14))) for _ in range(n)]
+
+
+def check(classifier, legacy, messages):
+    for message, intents, ton, date in CORPUS:
+        parsed = classifier.classify(message)
+        assert (set(parsed.intents), parsed.target_ton, parsed.date_text) == (intents, ton, date), (message, parsed)
+    for message in messages:
+        parsed = classifier.classify(message)
+        assert (set(parsed.intents), parsed.target_ton, parsed.date_text) == legacy.classify(message), message
+
+
+def throughput(fn, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - t0)
+    return len(messages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    classifier = IntentClassifier()
+    legacy = LegacyParser()
+    messages = random_messages(args.messages)
+    check(classifier, legacy, messages)
+    print(f"corpus: {len(CORPUS)} kasus tabel + {len(messages)} pesan acak identik dengan parser lama")
+
+    rates = {
+        "legacy": throughput(legacy.classify, messages, args.repeat),
+        "compiled": throughput(classifier.classify, messages, args.repeat),
+    }
+    print(f"{'mode':<10}{'msg/s':>12}{'us/msg':>9}")
+    for name, rate in rates.items():
+        print(f"{name:<10}{rate:>12.0f}{1e6 / rate:>9.2f}")
+    print(f"speedup: {rates['compiled'] / rates['legacy']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_llm_cache.py
+# Latency ask_gemini dengan dan tanpa response cache memakai FakeLLMBackend,
+# untuk campuran prompt berulang (simulasi dengan input yang sama) dan unik.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_llm_cache
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from agent.llm import FakeLLMBackend, LLMClient
+from agent.llm_cache import ResponseCache
+
+
+def run(client, prompts):
+    latencies = []
+    for prompt in prompts:
+        t0 = time.perf_counter()
+        client.ask(prompt)
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat-share", type=float, default=0.7, help="porsi prompt yang berulang")
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    common = [f"HASIL PREDIKSI SHIPPING: Prediksi Delay Hours: {h} jam." for h in range(5)]
+    prompts = [
+        common[rng.integers(len(common))] if rng.random() < args.repeat_share else f"pertanyaan unik {i}"
+        for i in range(args.requests)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disk_path = os.path.join(tmp, "llm_cache.sqlite")
+        setups = [
+            ("no cache", None),
+            ("memory", ResponseCache(max_entries=1024, ttl_seconds=3600)),
+            ("memory+disk", ResponseCache(max_entries=1024, ttl_seconds=3600, disk_path=disk_path)),
+        ]
+        print(f"{'cache':<14}{'p50 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'LLM calls':>11}{'hit rate':>10}")
+        for name, cache in setups:
+            backend = FakeLLMBackend(latency=args.llm_latency)
+            lat = run(LLMClient(backend, cache), prompts)
+            hit_rate = cache.stats()["hit_rate"] if cache else 0.0
+            print(f"{name:<14}{np.percentile(lat, 50):>9.2f}{np.percentile(lat, 99):>9.2f}"
+                  f"{lat.mean():>9.2f}{backend.calls:>11}{hit_rate:>10.2f}")
+
+        # Restart: cache memori baru, tier disk tetap berisi
+        backend = FakeLLMBackend(latency=args.llm_latency)
+        restarted = ResponseCache(max_entries=1024, ttl_seconds=3600, disk_path=disk_path)
+        lat = run(LLMClient(backend, restarted), prompts)
+        print(f"{'after restart':<14}{np.percentile(lat, 50):>9.2f}{np.percentile(lat, 99):>9.2f}"
+              f"{lat.mean():>9.2f}{backend.calls:>11}{restarted.stats()['hit_rate']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
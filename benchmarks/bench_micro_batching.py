@@ -0,0 +1,83 @@
+# benchmarks/bench_micro_batching.py
+# Bandingkan model.predict per request (single-row) dengan MicroBatcher
+# saat banyak thread meminta prediksi bersamaan. Sebelumnya dicek: batch yang
+# gagal disusun tidak mematikan worker (error sampai ke pemanggil, request
+# berikutnya tetap dilayani).
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_micro_batching
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model.batching import MicroBatcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(predict, rows, concurrency):
+    latencies = []
+
+    def call(row):
+        t0 = time.perf_counter()
+        predict(row)
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, rows))
+    wall = time.perf_counter() - t0
+    return np.array(latencies) * 1000, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "models", "mining_simulation_rf.pkl"), "rb") as f:
+        model = pickle.load(f)
+    rows = np.random.default_rng(0).random((args.requests, model.n_features_in_)) * 100
+
+    def direct(row):
+        return float(model.predict(row.reshape(1, -1))[0])
+
+    # Sanity check: hasil batch sama dengan predict langsung
+    batcher = MicroBatcher(model, args.max_batch_size, args.max_wait_ms, name="bench")
+    assert all(batcher.predict_one(r) == direct(r) for r in rows[:20])
+    batcher.close()
+
+    # feature_names tidak cocok -> pd.DataFrame gagal di worker; error harus sampai ke pemanggil
+    batcher = MicroBatcher(model, args.max_batch_size, args.max_wait_ms, feature_names=["x"], name="bench",
+                           result_timeout_seconds=5.0)
+    for bad in (lambda: batcher.predict_one(rows[0]), lambda: batcher.predict_one(rows[0][:3])):
+        try:
+            bad()
+            raise AssertionError("batch gagal tidak melempar error")
+        except ValueError:
+            pass
+    batcher.feature_names = None
+    assert batcher.predict_one(rows[0]) == direct(rows[0]), "worker mati setelah batch gagal"
+    batcher.close()
+
+    print(f"{'mode':<8}{'conc':>6}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'avg batch':>11}{'wait p99':>10}")
+    for conc in args.concurrency:
+        lat, wall = run(direct, rows, conc)
+        print(f"{'direct':<8}{conc:>6}{len(rows) / wall:>9.0f}{np.percentile(lat, 50):>9.2f}{np.percentile(lat, 99):>9.2f}")
+
+        batcher = MicroBatcher(model, args.max_batch_size, args.max_wait_ms, name="bench")
+        lat, wall = run(batcher.predict_one, rows, conc)
+        stats = batcher.stats()
+        batcher.close()
+        print(f"{'batched':<8}{conc:>6}{len(rows) / wall:>9.0f}{np.percentile(lat, 50):>9.2f}{np.percentile(lat, 99):>9.2f}"
+              f"{stats['avg_batch_size']:>11.1f}{stats['queue_wait_ms']['p99']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_mining_snapshot.py
+# Cold start load mining_clean2 per worker: SELECT * + parse tanggal (cara lama)
+# vs TableSnapshot (.npy per kolom, mmap). DB di-stand-in dengan file SQLite
+# berisi Mining_Clean3.csv yang direplikasi. Setiap worker adalah proses baru
+# (spawn); RSS dipisah jadi anon (privat per worker) dan file (page mmap yang
+# dibagi antar worker).
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_mining_snapshot
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_kb():
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                name, value = line.split(":")
+                fields[name] = int(value.split()[0])
+    return fields
+
+
+def worker(mode, db_path, snapshot_dir, results):
+    from model.calculator import MiningValueCalculator
+    from model.snapshot import TableSnapshot
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    before = rss_kb()
+    t0 = time.perf_counter()
+    if mode == "db":
+        df = pd.read_sql_query("SELECT * FROM mining_clean2;", engine)
+    else:
+        df = TableSnapshot(snapshot_dir).load_or_refresh(engine)
+    # Sama dengan ChatRouter.__init__: delay_hours + index fitur mingguan
+    df["delay_hours"] = (
+        (pd.to_datetime(df["arrival_estimate"]) - pd.to_datetime(df["departure_date"])).dt.total_seconds() / 3600
+    ).clip(lower=0).fillna(0)
+    MiningValueCalculator(df=df, model_path=None)
+    elapsed = time.perf_counter() - t0
+    after = rss_kb()
+    results.put((mode, elapsed, (after["RssAnon"] - before["RssAnon"]) / 1024, after["RssFile"] / 1024))
+
+
+def seed_db(db_path, rows):
+    base = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"))
+    df = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+    df.to_sql("mining_clean2", create_engine(f"sqlite:///{db_path}"), index=False, chunksize=10000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "mining.sqlite")
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        seed_db(db_path, args.rows)
+
+        from model.snapshot import TableSnapshot
+        t0 = time.perf_counter()
+        TableSnapshot(snapshot_dir).load_or_refresh(create_engine(f"sqlite:///{db_path}"))
+        print(f"rows: {args.rows}, tulis snapshot pertama: {time.perf_counter() - t0:.2f}s\n")
+
+        print(f"{'mode':<10}{'cold start s':>14}{'anon MB':>10}{'file MB':>10}")
+        for mode in ("db", "snapshot"):
+            results = ctx.Queue()
+            procs = [ctx.Process(target=worker, args=(mode, db_path, snapshot_dir, results))
+                     for _ in range(args.workers)]
+            for p in procs:
+                p.start()
+            rows = [results.get() for _ in procs]
+            for p in procs:
+                p.join()
+            elapsed, anon, file_mb = (np.mean([r[i] for r in rows]) for i in (1, 2, 3))
+            print(f"{mode:<10}{elapsed:>14.3f}{anon:>10.1f}{file_mb:>10.1f}")
+        print("\nanon = memori privat per worker; file = page file (termasuk mmap snapshot) yang dibagi antar worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_model_reload.py
+# Hot-swap model lewat ModelRegistry sambil request prediksi terus berjalan:
+# latency request sebelum/selama reload, jumlah error, dan waktu load + warm-up
+# model baru, dibandingkan dengan biaya restart (load ulang calculator + model).
+# Deploy versi baru disimulasikan dengan menulis ulang pickle + manifest.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_model_reload
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+from model.calculator import MiningValueCalculator
+from model.registry import ModelRegistry
+
+
+def request_loop(calculator, stop, latencies, errors, week):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            calculator.run_mining_simulation(50000.0, week)
+        except Exception:
+            errors.append(1)
+        latencies.append((time.perf_counter(), time.perf_counter() - t0))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    warnings.filterwarnings("ignore")
+
+    df = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"), parse_dates=["departure_date"])
+    week = df["departure_date"].max()
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "mining_simulation_rf.pkl")
+        manifest_path = os.path.join(tmp, "manifest.json")
+        shutil.copy(os.path.join(ROOT, "models", "mining_simulation_rf.pkl"), model_path)
+
+        calculator = MiningValueCalculator(df=df, model_path=None)
+        registry = ModelRegistry(manifest_path=manifest_path, poll_seconds=0.05)
+        registry.register("mining", model_path, len(calculator.features), activate=calculator.set_model)
+        registry.check_once()
+        print(f"versi awal: {registry.stats()['mining']['version']}")
+
+        stop = threading.Event()
+        latencies, errors = [], []
+        workers = [threading.Thread(target=request_loop, args=(calculator, stop, latencies, errors, week))
+                   for _ in range(args.threads)]
+        for w in workers:
+            w.start()
+        registry.start()
+        time.sleep(args.seconds)
+
+        # Deploy: tulis pickle baru (atomik via rename) + naikkan versi di manifest
+        swap_started = time.perf_counter()
+        shutil.copy(model_path, model_path + ".tmp")
+        os.replace(model_path + ".tmp", model_path)
+        with open(manifest_path, "w") as f:
+            json.dump({"models": {"mining": {"version": "v2", "path": "mining_simulation_rf.pkl"}}}, f)
+        while registry.stats()["mining"]["version"] != "v2":
+            time.sleep(0.005)
+        swap_done = time.perf_counter()
+        time.sleep(args.seconds)
+        stop.set()
+        for w in workers:
+            w.join()
+        registry.stop()
+        calculator.predictor.close()
+
+        stats = registry.stats()["mining"]
+        before = np.array([lat for t, lat in latencies if t < swap_started]) * 1000
+        during = np.array([lat for t, lat in latencies if swap_started <= t <= swap_done]) * 1000
+        after = np.array([lat for t, lat in latencies if t > swap_done]) * 1000
+
+        t0 = time.perf_counter()
+        restarted = MiningValueCalculator(df=pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"),
+                                                         parse_dates=["departure_date"]), model_path=model_path)
+        restart_ms = (time.perf_counter() - t0) * 1000
+        restarted.predictor.close()
+
+    print(f"versi aktif: {stats['version']}, reloads: {stats['reloads']}, errors request: {len(errors)}")
+    print(f"swap: load {stats['load_ms']:.1f} ms + warm-up {stats['warm_ms']:.1f} ms "
+          f"(deploy -> aktif {(swap_done - swap_started) * 1000:.1f} ms); restart calculator: {restart_ms:.1f} ms\n")
+    print(f"{'fase':<10}{'requests':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, lat in (("sebelum", before), ("selama", during), ("sesudah", after)):
+        if len(lat):
+            print(f"{name:<10}{len(lat):>10}{np.percentile(lat, 50):>9.3f}{np.percentile(lat, 99):>9.3f}{lat.max():>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_outlook.py
+# Prediksi mingguan lewat tabel outlook (model/outlook.py) vs hitung per request
+# (make_week_features + inference RF lewat MicroBatcher): latency
+# calculate_optimal_value untuk week_start acak dalam horizon, serial dan dari
+# banyak thread sekaligus. Hasil kedua cara dicek identik. Data CSV historis,
+# jadi horizon di-anchor beberapa minggu sebelum departure_date terakhir.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_outlook
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model.calculator import MiningValueCalculator
+from model.outlook import WeeklyOutlook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def requests_in_horizon(anchor, horizon_weeks, n, rng):
+    # Campuran week_start jam 00:00 (tanggal eksplisit) dan jam acak (datetime.today())
+    days = rng.integers(0, horizon_weeks * 7, n)
+    hours = np.where(rng.random(n) < 0.5, 0, rng.integers(1, 24, n))
+    week_starts = [(anchor + pd.Timedelta(days=int(d), hours=int(h))).to_pydatetime() for d, h in zip(days, hours)]
+    targets = rng.choice([5000.0, 8000.0, 12000.0, 20000.0], n)
+    return list(zip(targets, week_starts))
+
+
+def run(calc, reqs, threads):
+    def one(req):
+        t0 = time.perf_counter()
+        calc.calculate_optimal_value(*req)
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if threads == 1:
+        lat = [one(r) for r in reqs]
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            lat = list(pool.map(one, reqs))
+    wall = time.perf_counter() - t0
+    return np.array(lat) * 1000.0, len(reqs) / wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--horizon-weeks", type=int, default=8)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    df = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"), parse_dates=["departure_date"])
+    model_path = os.path.join(ROOT, "models", "mining_simulation_rf.pkl")
+    plain = MiningValueCalculator(df=df, model_path=model_path)
+    cached = MiningValueCalculator(df=df, model_path=model_path)
+    anchor = df["departure_date"].max() - pd.Timedelta(weeks=args.horizon_weeks // 2)
+    outlook = WeeklyOutlook(cached, horizon_weeks=args.horizon_weeks, anchor=anchor)
+    cached.outlook = outlook
+    outlook.start()
+    stats = outlook.stats()
+    print(f"outlook {args.horizon_weeks} minggu dari {stats['anchor']}: {stats['entries']} window unik, "
+          f"build {stats['last_build_ms']:.1f} ms\n")
+
+    reqs = requests_in_horizon(anchor, args.horizon_weeks, args.requests, np.random.default_rng(0))
+    for req in reqs[:200]:
+        assert repr(plain.calculate_optimal_value(*req)) == repr(cached.calculate_optimal_value(*req)), "hasil berbeda"
+
+    print(f"{'mode':<14}{'threads':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for threads in args.threads:
+        for label, calc in (("per request", plain), ("outlook", cached)):
+            lat, rps = run(calc, reqs, threads)
+            print(f"{label:<14}{threads:>8}{np.percentile(lat, 50):>10.3f}{np.percentile(lat, 99):>10.3f}{rps:>10.0f}")
+    stats = outlook.stats()
+    print(f"\nlookup: {stats['hits']} hit, {stats['misses']} miss, {stats['stale']} stale")
+    outlook.stop()
+    plain.predictor.close()
+    cached.predictor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_resilience.py
+# Deadline per request + pengaman LLM (timeout, hedging di p95, circuit
+# breaker) dengan FakeLLMBackend yang lambat/gagal:
+# - "ekor lambat": sebagian kecil panggilan LLM jauh lebih lambat dari biasanya
+# - "outage": semua panggilan LLM error (breaker harus berhenti memanggil backend)
+# Setiap skenario dijalankan tanpa pengaman vs dengan pengaman; dihitung
+# latency per request, jumlah panggilan backend dan jawaban fallback (template).
+# Sebelumnya dicek: panggilan percobaan half-open yang diputus pemanggil (stream
+# ditutup konsumen / task dibatalkan) tidak boleh mengunci breaker.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_resilience
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from agent.llm import OK, FakeLLMBackend, LLMClient, set_llm_client
+from benchmarks.stubs import build_stub_router
+
+MESSAGES = [
+    "simulasi produksi 12000 ton minggu 2025-01-06",
+    "prediksi delay kapal 5000",
+    "halo, bagaimana operasi minggu ini?",
+]
+
+UNGUARDED = {"timeout_seconds": 60.0, "hedge": False, "breaker_failures": 0}
+
+
+async def burst(router, n_requests, concurrency, deadline_ms):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, fallbacks = [], {}
+
+    async def one(i):
+        async with semaphore:
+            t0 = time.perf_counter()
+            result = await router.handle_message_async(MESSAGES[i % len(MESSAGES)], f"u{i}", deadline_ms=deadline_ms)
+            latencies.append(time.perf_counter() - t0)
+            reason = result.get("llm_fallback")
+            if reason:
+                fallbacks[reason] = fallbacks.get(reason, 0) + 1
+
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return np.array(latencies) * 1000.0, fallbacks
+
+
+async def cancelled_trial_check():
+    """Setiap panggilan percobaan half-open diputus di tengah jalan; panggilan berikutnya harus tetap OK."""
+    backend = FakeLLMBackend(latency=0.05, token_latency=0.01)
+    client = LLMClient(backend, cache=None,
+                       policy={"hedge": False, "breaker_failures": 1, "breaker_cooldown_seconds": 0.0})
+    client.breaker.record_failure()  # sirkuit terbuka; cooldown 0 -> panggilan berikut = percobaan half-open
+
+    # 1) konsumen berhenti di tengah stream (aclose di yield -> GeneratorExit)
+    stream = client.stream_async("stream diputus")
+    await stream.__anext__()
+    await stream.aclose()
+
+    # 2) task stream / complete_async dibatalkan saat menunggu backend (CancelledError)
+    async def consume():
+        async for _ in client.stream_async("stream dibatalkan"):
+            pass
+    for coro in (consume(), client.complete_async("complete dibatalkan")):
+        task = asyncio.ensure_future(coro)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    statuses = [(await client.complete_async(f"setelah {i}"))[1] for i in range(3)]
+    assert statuses == [OK] * 3, f"breaker terkunci setelah percobaan half-open dibatalkan: {statuses}"
+    return client.breaker.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency-ms", type=float, default=100.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency-ms", type=float, default=3000.0)
+    parser.add_argument("--deadline-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    print(f"percobaan half-open dibatalkan: breaker {asyncio.run(cancelled_trial_check())}\n")
+
+    guarded = {"timeout_seconds": args.deadline_ms / 1000.0, "hedge": True, "hedge_percentile": 95,
+               "hedge_min_delay_ms": args.llm_latency_ms * 1.5, "breaker_failures": 5,
+               "breaker_cooldown_seconds": 30.0}
+    scenarios = [
+        ("ekor lambat", dict(slow_rate=args.slow_rate, slow_latency=args.slow_latency_ms / 1000.0)),
+        ("outage", dict(error_rate=1.0)),
+    ]
+    modes = [("tanpa pengaman", UNGUARDED, None), ("deadline+hedge", guarded, args.deadline_ms)]
+
+    print(f"{args.requests} request, concurrency {args.concurrency}, LLM {args.llm_latency_ms:.0f}ms "
+          f"(ekor: {args.slow_rate:.0%} x {args.slow_latency_ms:.0f}ms), deadline {args.deadline_ms:.0f}ms\n")
+    print(f"{'skenario':<13}{'mode':<16}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'LLM call':>10}{'hedged':>8}  fallback")
+    for scenario, backend_kwargs in scenarios:
+        for label, policy, deadline_ms in modes:
+            backend = FakeLLMBackend(latency=args.llm_latency_ms / 1000.0, seed=1, **backend_kwargs)
+            client = LLMClient(backend, cache=None, policy=policy)
+            set_llm_client(client)
+            router = build_stub_router(db_latency=0.002)
+            router.request_budget_ms = None  # tanpa deadline default; mode guarded memberi deadline_ms sendiri
+            lat, fallbacks = asyncio.run(burst(router, args.requests, args.concurrency, deadline_ms))
+            print(f"{scenario:<13}{label:<16}{np.percentile(lat, 50):>9.1f}{np.percentile(lat, 99):>9.1f}"
+                  f"{lat.max():>9.1f}{backend.calls:>10}{client.counters['hedged']:>8}  {fallbacks or '-'}")
+        print(f"{'':<13}breaker: {client.breaker.stats()}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_rules.py
+# Tabel rule rekomendasi (model/rules.py): evaluasi per row (evaluate_one,
+# setara rantai if/else lama per dict fitur) vs satu pass mask NumPy
+# (RuleSet.evaluate) untuk grid minggu x target (rule "mining") dan row
+# shipping (rule "shipping"). Hasil kedua cara dicek identik.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_rules
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from model.calculator import MINING_FEATURES, MiningValueCalculator
+from model.rules import DEFAULT_RULES, RuleSet
+
+ROWS = [1000, 10000, 100000]
+
+
+def mining_columns(calc, n_rows, rng):
+    # Fitur mingguan nyata (acak dari data) + pencapaian/peluang acak per row
+    weeks = pd.to_datetime(calc.df["departure_date"]).sample(n_rows, replace=True, random_state=1)
+    X = calc.feature_store.week_feature_matrix(list(weeks), MINING_FEATURES)
+    columns = {f: X[:, j] for j, f in enumerate(MINING_FEATURES)}
+    columns["achievement_pct"] = rng.uniform(40, 160, n_rows)
+    columns["target_probability"] = rng.uniform(0, 1, n_rows)
+    return columns
+
+
+def shipping_columns(n_rows, rng):
+    return {
+        "wave_height_m": rng.uniform(0, 3, n_rows),
+        "wind_speed_kmh": rng.uniform(0, 40, n_rows),
+        "actual_speed": rng.uniform(5, 15, n_rows),
+        "base_speed": rng.choice([0.0, 10.0, 12.0], n_rows),
+        "delay_hours": np.maximum(rng.normal(0.5, 2, n_rows), 0),
+    }
+
+
+def compare(label, ruleset, columns, params):
+    n = len(next(iter(columns.values())))
+    t0 = time.perf_counter()
+    per_row = [ruleset.evaluate_one({k: v[i] for k, v in columns.items()}, params)[:2] for i in range(n)]
+    loop_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = ruleset.evaluate(columns, params)
+    mask_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rows = [result.row(i) for i in range(n)]
+    format_s = time.perf_counter() - t0
+
+    assert rows == per_row, "hasil evaluate tidak sama dengan evaluate_one"
+    print(f"{label:<10}{n:>8}{loop_s * 1000:>12.1f}{mask_s * 1000:>12.2f}{(mask_s + format_s) * 1000:>14.1f}"
+          f"{loop_s / mask_s:>10.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=ROWS)
+    args = parser.parse_args()
+
+    df = pd.read_csv("Mining_Clean3.csv", parse_dates=["departure_date"])
+    calc = MiningValueCalculator(df=df, model_path=None)
+    mining, shipping = RuleSet(DEFAULT_RULES["mining"], "mining"), RuleSet(DEFAULT_RULES["shipping"], "shipping")
+    rng = np.random.default_rng(0)
+
+    print(f"{'tabel':<10}{'rows':>8}{'per row ms':>12}{'mask ms':>12}{'mask+teks ms':>14}{'speedup':>11}")
+    for n in args.rows:
+        for threshold in (None, 0.5):
+            label = "mining" if threshold is None else "mining/p"
+            compare(label, mining, mining_columns(calc, n, rng), {"target_probability_threshold": threshold})
+        compare("shipping", shipping, shipping_columns(n, rng), {})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_session_cache.py
+# Jumlah query DB dan latency per turn dengan SessionStore vs tanpa cache
+# (setiap turn query users + chat_history), untuk banyak user dengan
+# percakapan berulang. DB di-stub dengan latency tetap.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_session_cache
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+
+import numpy as np
+
+from agent.llm import FakeLLMBackend, LLMClient, set_llm_client
+from agent.session import SessionStore
+from benchmarks.stubs import build_stub_router
+
+
+def attach_counting_db(router, db_latency):
+    """Stub DB yang menghitung query dan menyimpan chat_history di memori."""
+    counts = {"reads": 0, "writes": 0}
+    history = {}
+
+    async def get_user_info_async(user_id):
+        counts["reads"] += 1
+        await asyncio.sleep(db_latency)
+        return {"user_id": user_id, "username": f"user-{user_id}"}
+
+    async def get_recent_chat_history_async(user_id, hours=24):
+        counts["reads"] += 1
+        await asyncio.sleep(db_latency)
+        rows = list(reversed(history.get(user_id, [])))
+        return rows or None
+
+    async def save_chat_history_async(user_id, message, answer, chat_id=None):
+        counts["writes"] += 1
+        await asyncio.sleep(db_latency)
+        history.setdefault(user_id, []).append(
+            {"message": message, "answer": answer, "created_at": datetime.datetime.now()}
+        )
+        router.sessions.record_turn(user_id, message, answer)
+
+    router.get_user_info_async = get_user_info_async
+    router.get_recent_chat_history_async = get_recent_chat_history_async
+    router.save_chat_history_async = save_chat_history_async
+    return counts
+
+
+async def conversation(router, users, turns):
+    latencies = []
+    for turn in range(turns):
+        for user_id in users:
+            t0 = time.perf_counter()
+            await router.handle_message_async(f"pertanyaan ke-{turn}", user_id)
+            latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--db-latency", type=float, default=0.003)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    set_llm_client(LLMClient(FakeLLMBackend(), cache=None))
+    users = [str(i) for i in range(args.users)]
+
+    print(f"{'mode':<12}{'DB reads':>10}{'DB writes':>11}{'p50 ms':>9}{'p99 ms':>9}{'hit rate':>10}")
+    for name, ttl in (("no cache", 0.0), ("session", 300.0)):
+        router = build_stub_router()
+        router.sessions = SessionStore(max_users=args.users, max_turns=50, ttl_seconds=ttl)
+        counts = attach_counting_db(router, args.db_latency)
+        lat = asyncio.run(conversation(router, users, args.turns))
+        print(f"{name:<12}{counts['reads']:>10}{counts['writes']:>11}{np.percentile(lat, 50):>9.2f}"
+              f"{np.percentile(lat, 99):>9.2f}{router.sessions.stats()['hit_rate']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_shipping_batch.py
+# Bandingkan simulasi shipping per row (iterrows + run_shipping_simulation)
+# dengan ShippingBatchSimulation, termasuk verifikasi hasil identik.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_shipping_batch
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model.calculator import MiningValueCalculator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATE_COLUMNS = ["departure_date", "arrival_estimate", "arrival_estimate_new"]
+
+
+def same(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return type(a) == type(b) and a == b
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"), parse_dates=DATE_COLUMNS)
+    calc = MiningValueCalculator(df=base, model_path=None)
+
+    print(f"{'rows':>8}{'scalar s':>10}{'batch s':>10}{'+dicts s':>10}{'speedup':>9}  identical")
+    for n in args.rows:
+        df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+        # Variasi: base_speed 0, NaN cuaca, NaT arrival
+        df.loc[rng.random(n) < 0.01, "base_speed"] = 0.0
+        df.loc[rng.random(n) < 0.01, "wave_height_m"] = np.nan
+        df.loc[rng.random(n) < 0.01, "arrival_estimate_new"] = pd.NaT
+
+        t0 = time.perf_counter()
+        scalar = [calc.run_shipping_simulation(row) for _, row in df.iterrows()]
+        t_scalar = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = calc.run_shipping_simulations_batch(df)
+        t_batch = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        rows = batch.to_list()
+        t_dicts = time.perf_counter() - t0
+
+        identical = same(scalar, rows)
+        print(f"{n:>8}{t_scalar:>10.2f}{t_batch:>10.4f}{t_dicts:>10.2f}{t_scalar / t_batch:>9.0f}  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_simulation_cache.py
+# Burst simulasi identik (target default 10000 ton minggu ini, dan shipping
+# dengan input hardcoded) dari banyak user bersamaan: tanpa vs dengan
+# SimulationCache (single-flight + TTL) dan single-flight LLM. Menghitung
+# berapa kali simulasi & LLM benar-benar dijalankan, plus latency per request.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_simulation_cache
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import numpy as np
+
+from agent.llm import FakeLLMBackend, LLMClient, set_llm_client
+from agent.llm_cache import ResponseCache
+from agent.simulation_cache import SimulationCache
+from benchmarks.stubs import build_stub_router
+
+MESSAGES = [
+    "simulasi produksi minggu ini",            # target default 10000 ton, week_start = sekarang
+    "simulasi produksi minggu ini",
+    "simulasi produksi minggu ini",
+    "prediksi delay kapal minggu ini",          # shipping, input hardcoded
+    "simulasi produksi 12000 ton minggu ini",
+]
+
+
+async def burst(router, n_requests, concurrency, seed):
+    rng = random.Random(seed)
+    messages = [rng.choice(MESSAGES) for _ in range(n_requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await router.handle_message_async(messages[i], f"u{i % 100}")
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return time.perf_counter() - t0, np.array(latencies) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{args.requests} request, concurrency {args.concurrency}, LLM {args.llm_latency_ms:.0f}ms\n")
+    print(f"{'mode':<12}{'simulasi':>10}{'LLM call':>10}{'wall s':>9}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for label, enabled in (("tanpa cache", False), ("cache", True)):
+        backend = FakeLLMBackend(latency=args.llm_latency_ms / 1000.0)
+        # Tanpa cache: setiap request menghitung simulasi dan memanggil LLM sendiri
+        set_llm_client(LLMClient(backend, ResponseCache() if enabled else None))
+        router = build_stub_router(db_latency=0.002)
+        router.simulation_cache = SimulationCache() if enabled else None
+
+        computes = {"n": 0}
+        for obj, name in ((router.mining_calculator, "calculate_optimal_value"), (router, "predict_shipping_delay")):
+            original = getattr(obj, name)
+
+            def counted(*a, _original=original, **k):
+                computes["n"] += 1
+                return _original(*a, **k)
+            setattr(obj, name, counted)
+
+        wall, lat = asyncio.run(burst(router, args.requests, args.concurrency, seed=1))
+        print(f"{label:<12}{computes['n']:>10}{backend.calls:>10}{wall:>9.2f}{args.requests / wall:>9.1f}"
+              f"{np.percentile(lat, 50):>9.1f}{np.percentile(lat, 99):>9.1f}")
+        if router.simulation_cache is not None:
+            print(f"\nsimulation_cache: {router.simulation_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
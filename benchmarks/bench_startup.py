@@ -0,0 +1,128 @@
+# benchmarks/bench_startup.py
+# Profil startup service, setiap pengukuran di proses Python baru:
+# 1. Import time: app.py (lazy, ChatRouter di-load di lifespan) vs modul berat
+#    yang dulu ikut ter-import saat import app (agent.router + SDK Gemini).
+# 2. Inisialisasi ChatRouter: load mining_clean2 (TableSnapshot), load + warm-up
+#    model mining & shipping (ModelRegistry.prepare_entry) dan client LLM,
+#    berurutan vs paralel (agent/startup.py). DB di-stand-in file SQLite berisi
+#    Mining_Clean3.csv yang direplikasi; "cold" = snapshot belum ada (SELECT *
+#    penuh + tulis snapshot), "warm" = snapshot sudah ada.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_startup
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TARGETS = [
+    ("app", "import app"),
+    ("app (import eager lama)", "import app, agent.router, google.generativeai"),
+    ("agent.router", "import agent.router"),
+    ("google.generativeai", "import google.generativeai"),
+    ("sklearn.ensemble", "import sklearn.ensemble"),
+    ("pandas", "import pandas"),
+    ("sqlalchemy", "import sqlalchemy"),
+]
+
+
+def run_python(code: str) -> str:
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def import_ms(statement: str) -> float:
+    code = f"import time; t0 = time.perf_counter(); {statement}; print((time.perf_counter() - t0) * 1000)"
+    return float(run_python(code))
+
+
+def child_startup(parallel: bool, db_path: str, snapshot_dir: str):
+    """Satu startup di proses ini (dipanggil lewat --child); cetak profile sebagai JSON."""
+    t0 = time.perf_counter()
+    from sqlalchemy import create_engine
+    from agent.llm import warm_up_llm_client
+    from agent.startup import run_startup_tasks
+    from model.calculator import MINING_FEATURES
+    from model.registry import ModelRegistry
+    from model.shipping_batch import SHIPPING_FEATURES
+    from model.snapshot import TableSnapshot
+    imports = (time.perf_counter() - t0) * 1000.0
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    registry = ModelRegistry()
+    registry.register("mining", os.path.join(ROOT, "models", "mining_simulation_rf.pkl"),
+                      len(MINING_FEATURES), activate=lambda model: None)
+    registry.register("shipping", os.path.join(ROOT, "models", "shipping_simulation_rf.pkl"),
+                      len(SHIPPING_FEATURES), activate=lambda model: None, feature_names=list(SHIPPING_FEATURES))
+    tasks = {"mining_data": lambda: TableSnapshot(snapshot_dir).load_or_refresh(engine)}
+    for name, entry in registry.entries.items():
+        tasks[f"model_{name}"] = lambda entry=entry: registry.prepare_entry(entry)
+    tasks["llm_client"] = warm_up_llm_client
+
+    results, profile = run_startup_tasks(tasks, parallel=parallel)
+    profile["import_ms"] = imports
+    profile["total_ms"] = (time.perf_counter() - t0) * 1000.0
+    profile["models_ok"] = [name for name in registry.entries if results[f"model_{name}"] is not None]
+    print(json.dumps(profile))
+
+
+def startup_profile(parallel: bool, db_path: str, snapshot_dir: str) -> dict:
+    code = (f"from benchmarks.bench_startup import child_startup; "
+            f"child_startup({parallel}, {db_path!r}, {snapshot_dir!r})")
+    return json.loads(run_python(code))
+
+
+def seed_db(db_path, rows):
+    import pandas as pd
+    from sqlalchemy import create_engine
+
+    base = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"))
+    df = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+    df.to_sql("mining_clean2", create_engine(f"sqlite:///{db_path}"), index=False, chunksize=10000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Import time (median {args.repeat} proses baru)")
+    print(f"{'modul':<28}{'ms':>10}")
+    for label, statement in IMPORT_TARGETS:
+        samples = [import_ms(statement) for _ in range(args.repeat)]
+        print(f"{label:<28}{statistics.median(samples):>10.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "mining.sqlite")
+        seed_db(db_path, args.rows)
+        warm_dir = os.path.join(tmp, "snapshot-warm")
+        startup_profile(False, db_path, warm_dir)  # tulis snapshot untuk kasus warm
+
+        print(f"\nInisialisasi ChatRouter, rows={args.rows} (median {args.repeat} proses baru, ms)")
+        header = ["mining_data", "model_mining", "model_shipping", "llm_client"]
+        print(f"{'snapshot':<10}{'mode':<12}" + "".join(f"{h:>16}" for h in header) + f"{'wall':>10}{'total':>10}")
+        for snapshot in ("cold", "warm"):
+            for parallel in (False, True):
+                runs = []
+                for i in range(args.repeat):
+                    snapshot_dir = warm_dir if snapshot == "warm" else os.path.join(tmp, f"cold-{parallel}-{i}")
+                    runs.append(startup_profile(parallel, db_path, snapshot_dir))
+                tasks = [statistics.median(r["tasks_ms"][h] for r in runs) for h in header]
+                wall = statistics.median(r["wall_ms"] for r in runs)
+                total = statistics.median(r["total_ms"] for r in runs)
+                mode = "paralel" if parallel else "berurutan"
+                print(f"{snapshot:<10}{mode:<12}" + "".join(f"{t:>16.1f}" for t in tasks) + f"{wall:>10.1f}{total:>10.1f}")
+        print(f"\nmodel aktif: {runs[-1]['models_ok']} (model yang gagal validasi tetap diukur waktu load-nya)")
+        print(f"core: {os.cpu_count()}; wall = inisialisasi saja, total = termasuk import modul startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_streaming.py
+# Time-to-first-byte /chat (jawaban penuh) vs /chat/stream (SSE) dengan
+# FakeLLMBackend streaming: latency token pertama + latency per token.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_streaming
+import argparse
+import asyncio
+import time
+
+import app as app_module
+from agent.llm import FakeLLMBackend, LLMClient, set_llm_client
+from benchmarks.stubs import build_stub_router
+
+MESSAGES = ["Halo, jelaskan operasi minggu ini", "simulasi produksi 150 ton minggu 2024-12-02"]
+
+
+async def measure_chat(req):
+    t0 = time.perf_counter()
+    await app_module.chat_endpoint(req)
+    return time.perf_counter() - t0
+
+
+async def measure_stream(req):
+    t0 = time.perf_counter()
+    response = await app_module.chat_stream_endpoint(req)
+    first_event = first_token = None
+    async for chunk in response.body_iterator:
+        now = time.perf_counter() - t0
+        if first_event is None:
+            first_event = now
+        # Token greeting ("Hai ...!") dikirim sebelum LLM; yang diukur token LLM pertama
+        if first_token is None and chunk.startswith("event: token") and '"Hai ' not in chunk:
+            first_token = now
+    return first_event, first_token, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--tokens", type=int, default=150)
+    args = parser.parse_args()
+
+    answer = " ".join(f"kata{i}" for i in range(args.tokens))
+    backend = FakeLLMBackend(
+        responder=lambda prompt: answer,
+        first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency,
+    )
+    # Tanpa cache supaya setiap request benar-benar menunggu backend
+    set_llm_client(LLMClient(backend, cache=None))
+    backend.latency = args.first_token_latency + args.token_latency * (args.tokens - 1)
+    app_module.router = build_stub_router(db_latency=0.002)
+
+    print(f"{'message':<46}{'/chat TTFB':>12}{'stream 1st evt':>16}{'stream 1st LLM tok':>20}{'stream total':>14}")
+    for msg in MESSAGES:
+        req = app_module.ChatRequest(message=msg, user_id="u1")
+        chat = asyncio.run(measure_chat(req))
+        first_event, first_token, total = asyncio.run(measure_stream(req))
+        print(f"{msg:<46}{chat * 1000:>10.0f}ms{first_event * 1000:>14.0f}ms"
+              f"{first_token * 1000:>18.0f}ms{total * 1000:>12.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
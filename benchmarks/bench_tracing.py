@@ -0,0 +1,77 @@
+# benchmarks/bench_tracing.py
+# Overhead timer per stage (model/tracing.py): handle_message_async dengan
+# tracing aktif (span + histogram + field timings) vs NullTrace, pada path
+# terpendek (DB stub & LLM palsu tanpa latency, sesi hangat) supaya overhead
+# tidak tertutup I/O. Juga biaya satu span dan render /metrics.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_tracing
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from agent.llm import FakeLLMBackend, LLMClient, set_llm_client
+from benchmarks.stubs import build_stub_router
+from model.tracing import METRICS, NULL_TRACE, Trace
+
+MESSAGES = [
+    "simulasi produksi 12000 ton minggu 2025-01-06",
+    "halo, apa kabar tim tambang hari ini?",
+    "prediksi delay kapal 5000",
+]
+
+
+async def run_turns(router, n, include_timings):
+    latencies = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        await router.handle_message_async(MESSAGES[i % len(MESSAGES)], "u1", include_timings=include_timings)
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1e6
+
+
+def span_cost(trace, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with trace.span("stage"):
+            pass
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    set_llm_client(LLMClient(FakeLLMBackend(), cache=None))
+    router = build_stub_router(db_latency=0.0)
+    asyncio.run(run_turns(router, 50, False))  # warm-up + sesi hangat
+
+    modes = [("tracing off", False, False), ("tracing on", True, False), ("on + timings", True, True)]
+    results = {label: [] for label, _, _ in modes}
+    # Mode diselang per round supaya drift mesin terbagi rata
+    for _ in range(args.rounds):
+        for label, enabled, include_timings in modes:
+            router.tracing_enabled = enabled
+            results[label].append(asyncio.run(run_turns(router, args.turns, include_timings)))
+
+    print(f"turns: {args.turns} x {args.rounds} round, DB/LLM tanpa latency\n")
+    print(f"{'mode':<16}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'overhead':>10}")
+    base = np.mean(np.concatenate(results["tracing off"]))
+    for label, _, _ in modes:
+        lat = np.concatenate(results[label])
+        print(f"{label:<16}{lat.mean():>10.1f}{np.percentile(lat, 50):>10.1f}{np.percentile(lat, 99):>10.1f}"
+              f"{(lat.mean() / base - 1) * 100:>9.1f}%")
+
+    print(f"\nbiaya per span: Trace {span_cost(Trace(), 200000):.0f} ns, NullTrace {span_cost(NULL_TRACE, 200000):.0f} ns")
+    t0 = time.perf_counter()
+    body = METRICS.render()
+    print(f"render /metrics: {(time.perf_counter() - t0) * 1000:.2f} ms, {len(body.splitlines())} baris")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_week_features.py
+# Bandingkan make_week_features versi scan (boolean mask + ~15x .mean())
+# dengan WeeklyFeatureStore (binary search + satu slice), sekaligus cek hasil
+# identik, untuk tabel sintetis yang tumbuh sampai jutaan baris.
+#
+# Jalankan dari root repo:  python -m benchmarks.bench_week_features
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model.calculator import MiningValueCalculator
+from model.feature_store import BASE_COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synth_frame(base: pd.DataFrame, n_rows: int, rows_per_day: int, rng) -> pd.DataFrame:
+    """Resample baris asli dan sebar departure_date dengan kepadatan tetap per hari."""
+    df = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    n_days = max(1, n_rows // rows_per_day)
+    df['departure_date'] = pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit='D')
+    # Sisipkan NaN supaya fallback NaN -> 0 ikut teruji
+    for col in ('rainfall_mm', 'wsi'):
+        df.loc[rng.random(n_rows) < 0.01, col] = np.nan
+    return df
+
+
+def time_per_call(fn, week_starts):
+    t0 = time.perf_counter()
+    for ws in week_starts:
+        fn(ws)
+    return (time.perf_counter() - t0) / len(week_starts) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--rows-per-day", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"))[['departure_date'] + BASE_COLUMNS]
+
+    print(f"{'rows':>10}{'scan ms':>10}{'store ms':>10}{'speedup':>9}{'build s':>9}  identical")
+    for n in args.rows:
+        df = synth_frame(base, n, args.rows_per_day, rng)
+        t0 = time.perf_counter()
+        calc = MiningValueCalculator(df=df, model_path=None)
+        build = time.perf_counter() - t0
+
+        lo, hi = df['departure_date'].min(), df['departure_date'].max() + pd.Timedelta(weeks=5)
+        week_starts = [lo + (hi - lo) * f for f in rng.random(args.queries)]
+        week_starts += [lo - pd.Timedelta(weeks=1)]  # window kosong
+
+        identical = all(
+            calc.make_week_features(ws) == calc.make_week_features(ws, df_source=df)
+            for ws in week_starts
+        )
+        scan = time_per_call(lambda ws: calc.make_week_features(ws, df_source=df), week_starts)
+        store = time_per_call(calc.make_week_features, week_starts)
+        print(f"{n:>10}{scan:>10.2f}{store:>10.3f}{scan / store:>9.0f}{build:>9.2f}  {identical}")
+
+
+if __name__ == "__main__":
+    main()
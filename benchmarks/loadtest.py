@@ -0,0 +1,336 @@
+# benchmarks/loadtest.py
+# Load test end-to-end: app FastAPI asli (uvicorn, lifespan, /chat, /chat/stream,
+# /simulate) dijalankan di proses terpisah dengan stand-in lokal (lihat
+# benchmarks/standins.py): SQLite untuk users/chat_history/mining_clean2 dan LLM
+# palsu ber-latency. Driver mengirim trafik campuran chat/simulasi/stream dari
+# banyak user (closed loop, N koneksi bersamaan) lalu melaporkan throughput,
+# persentil latency per jenis request, error, memori server (RSS) dan rata-rata
+# durasi per stage dari /metrics.
+#
+# Dipakai sebagai gate regresi performa:
+#   python -m benchmarks.loadtest --json hasil.json                 (simpan baseline)
+#   python -m benchmarks.loadtest --baseline hasil.json --max-regression-pct 10
+# exit code 1 jika throughput turun / p99 naik lebih dari batas terhadap baseline.
+#
+# Jalankan dari root repo:  python -m benchmarks.loadtest
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHAT_MESSAGES = [
+    "halo, apa kabar?",
+    "jelaskan status armada hari ini",
+    "apa saja rekomendasi keselamatan kerja di area tambang?",
+    "bagaimana cuaca besok untuk operasi?",
+    "ringkas percakapan kita tadi",
+    "apa arti weather factor?",
+]
+MINING_TEMPLATE = "simulasi produksi {target} ton minggu {date}"
+SHIPPING_TEMPLATE = "prediksi delay kapal muatan {target} ton"
+
+
+# SERVER
+# ==========================
+def serve(args):
+    """Jalankan app.py asli dengan ChatRouter di atas stand-in SQLite + LLM palsu."""
+    import uvicorn
+
+    import app
+    import config
+    from agent.llm import FakeLLMBackend, LLMClient, set_llm_client
+    from agent.llm_cache import ResponseCache
+    from benchmarks.standins import SQLiteChatRouter
+
+    config.SNAPSHOT_CONFIG['directory'] = os.path.join(args.workdir, "snapshot")
+    cache = None
+    if args.llm_cache:
+        cache = ResponseCache(max_entries=config.LLM_CACHE_CONFIG['max_entries'],
+                              ttl_seconds=config.LLM_CACHE_CONFIG['ttl_seconds'])
+    latency = args.llm_latency_ms / 1000.0
+    set_llm_client(LLMClient(FakeLLMBackend(
+        latency=latency, first_token_latency=latency * 0.3,
+        token_latency=latency * 0.7 / 40  # ~40 token per jawaban
+    ), cache))
+
+    def build_router():
+        started = time.perf_counter()
+        router = SQLiteChatRouter(os.path.join(args.workdir, "db.sqlite"), app.DEFAULT_MODEL_PATHS,
+                                  db_latency=args.db_latency_ms / 1000.0)
+        app.startup_state["profile"] = {
+            "import_ms": 0.0, "total_ms": (time.perf_counter() - started) * 1000.0, "router": router.startup_profile
+        }
+        return router
+
+    app.build_router = build_router
+    uvicorn.run(app.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+# DRIVER
+# ==========================
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def read_memory_kb(pid: int) -> dict:
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS", "VmHWM")):
+                    name, value = line.split(":")
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+def make_request(rng: random.Random, kind: str):
+    """(method path, payload) untuk satu request jenis kind."""
+    if kind == "chat" or kind == "stream":
+        message = rng.choice(CHAT_MESSAGES) if kind == "chat" or rng.random() < 0.5 else None
+    else:
+        message = None
+    if message is None:
+        if rng.random() < 0.8:
+            week = np.datetime64("2025-01-06") + np.timedelta64(7 * rng.randrange(0, 40), "D")
+            message = MINING_TEMPLATE.format(target=rng.randrange(2000, 20000, 500), date=str(week))
+        else:
+            message = SHIPPING_TEMPLATE.format(target=rng.randrange(1000, 8000, 250))
+    path = {"chat": "/chat", "simulation": "/simulate", "stream": "/chat/stream"}[kind]
+    return path, message
+
+
+async def one_request(client, kind, path, message, user_id):
+    """Return (status, latency detik, time-to-first-token detik atau None)."""
+    payload = {"message": message, "user_id": user_id}
+    started = time.perf_counter()
+    if kind != "stream":
+        response = await client.post(path, json=payload)
+        return response.status_code, time.perf_counter() - started, None
+    first_token = None
+    async with client.stream("POST", path, json=payload) as response:
+        async for line in response.aiter_lines():
+            if first_token is None and line.startswith("event: token"):
+                first_token = time.perf_counter() - started
+    return response.status_code, time.perf_counter() - started, first_token
+
+
+async def drive(base_url, user_ids, args, pid):
+    import httpx
+
+    mix = {kind: float(weight) for kind, weight in (item.split("=") for item in args.mix.split(","))}
+    kinds, weights = list(mix), list(mix.values())
+    samples = []
+    errors = {}
+    memory = []
+    stop_at = None
+    measure_from = None
+
+    async def worker(worker_id):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        while time.perf_counter() < stop_at:
+            kind = rng.choices(kinds, weights)[0]
+            path, message = make_request(rng, kind)
+            try:
+                status, latency, ttft = await one_request(client, kind, path, message, rng.choice(user_ids))
+            except Exception as e:
+                status, latency, ttft = type(e).__name__, None, None
+            if time.perf_counter() < measure_from:
+                continue
+            if status != 200:
+                errors[f"{kind}:{status}"] = errors.get(f"{kind}:{status}", 0) + 1
+            else:
+                samples.append((kind, latency, ttft))
+
+    async def sample_memory():
+        while time.perf_counter() < stop_at:
+            memory.append(read_memory_kb(pid).get("VmRSS", 0))
+            await asyncio.sleep(0.5)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        idle_rss = read_memory_kb(pid).get("VmRSS", 0)
+        measure_from = time.perf_counter() + args.warmup
+        stop_at = measure_from + args.duration
+        await asyncio.gather(sample_memory(), *(worker(i) for i in range(args.concurrency)))
+        metrics_text = (await client.get("/metrics")).text
+        health = (await client.get("/health")).json()
+    peak = read_memory_kb(pid).get("VmHWM", 0)
+    return samples, errors, {"idle_rss_mb": idle_rss / 1024, "max_rss_mb": max(memory, default=0) / 1024,
+                             "peak_rss_mb": peak / 1024}, metrics_text, health
+
+
+def stage_means(metrics_text: str) -> dict:
+    """Rata-rata durasi per stage (ms) dari histogram chat_stage_duration_seconds."""
+    sums, counts = {}, {}
+    for name, stage, value in re.findall(r'^chat_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$',
+                                         metrics_text, re.M):
+        (sums if name == "sum" else counts)[stage] = float(value)
+    return {stage: sums[stage] / counts[stage] * 1000.0 for stage in sums if counts.get(stage)}
+
+
+def summarize(samples, errors, memory, duration, stages) -> dict:
+    summary = {"duration_s": duration, "requests": len(samples), "errors": errors,
+               "throughput_rps": len(samples) / duration, "memory": memory, "stages_ms": stages, "kinds": {}}
+    groups = {"all": samples}
+    for kind in sorted({s[0] for s in samples}):
+        groups[kind] = [s for s in samples if s[0] == kind]
+    for kind, rows in groups.items():
+        lat = np.array([r[1] for r in rows]) * 1000.0
+        entry = {"count": len(rows), "rps": len(rows) / duration}
+        if len(lat):
+            entry.update({f"p{q}_ms": float(np.percentile(lat, q)) for q in (50, 90, 99)})
+            entry["max_ms"] = float(lat.max())
+        ttft = [r[2] for r in rows if r[2] is not None]
+        if ttft:
+            entry["ttft_p50_ms"] = float(np.percentile(ttft, 50) * 1000.0)
+            entry["ttft_p99_ms"] = float(np.percentile(ttft, 99) * 1000.0)
+        summary["kinds"][kind] = entry
+    return summary
+
+
+def print_summary(summary, args, startup):
+    print(f"durasi {summary['duration_s']:.0f}s, concurrency {args.concurrency}, "
+          f"LLM {args.llm_latency_ms:.0f}ms, DB {args.db_latency_ms:.1f}ms/query, mix {args.mix}")
+    if startup:
+        print(f"startup router: {startup.get('total_ms', 0):.0f} ms")
+    print(f"\n{'jenis':<12}{'count':>8}{'req/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ttft p50':>10}")
+    for kind, e in summary["kinds"].items():
+        if "p50_ms" not in e:
+            continue
+        ttft = f"{e['ttft_p50_ms']:>10.1f}" if "ttft_p50_ms" in e else f"{'-':>10}"
+        print(f"{kind:<12}{e['count']:>8}{e['rps']:>9.1f}{e['p50_ms']:>10.1f}{e['p90_ms']:>10.1f}"
+              f"{e['p99_ms']:>10.1f}{e['max_ms']:>10.1f}{ttft}")
+    print(f"\nerror: {summary['errors'] or 'tidak ada'}")
+    m = summary["memory"]
+    print(f"memori server: idle {m['idle_rss_mb']:.0f} MB, maks saat load {m['max_rss_mb']:.0f} MB, "
+          f"peak {m['peak_rss_mb']:.0f} MB")
+    if summary["stages_ms"]:
+        print("rata-rata per stage (ms): " + ", ".join(
+            f"{stage} {ms:.2f}" for stage, ms in sorted(summary["stages_ms"].items(), key=lambda kv: -kv[1])))
+
+
+def check_regression(summary, baseline_path, max_pct) -> list:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    problems = []
+    base_rps, rps = baseline["throughput_rps"], summary["throughput_rps"]
+    if rps < base_rps * (1 - max_pct / 100.0):
+        problems.append(f"throughput {rps:.1f} req/s < baseline {base_rps:.1f} (-{max_pct}%)")
+    for kind, entry in summary["kinds"].items():
+        base = baseline["kinds"].get(kind, {})
+        if "p99_ms" in entry and "p99_ms" in base and entry["p99_ms"] > base["p99_ms"] * (1 + max_pct / 100.0):
+            problems.append(f"{kind} p99 {entry['p99_ms']:.1f} ms > baseline {base['p99_ms']:.1f} (+{max_pct}%)")
+    if summary["errors"] and not baseline.get("errors"):
+        problems.append(f"error baru: {summary['errors']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test end-to-end app FastAPI dengan stand-in lokal.")
+    parser.add_argument("mode", nargs="?", default="run", choices=["run", "serve"])
+    parser.add_argument("--rows", type=int, default=20000, help="jumlah baris mining_clean2")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--history", type=int, default=5, help="chat_history awal per user")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", default="chat=0.45,simulation=0.45,stream=0.1")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--no-llm-cache", dest="llm_cache", action="store_false")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="(internal) direktori DB + snapshot untuk mode serve")
+    parser.add_argument("--json", default=None, help="simpan ringkasan sebagai JSON (baseline)")
+    parser.add_argument("--baseline", default=None, help="JSON hasil sebelumnya untuk gate regresi")
+    parser.add_argument("--max-regression-pct", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        return serve(args)
+
+    from agent.intents import IntentClassifier
+    from benchmarks.standins import seed_database
+
+    classifier = IntentClassifier()
+    assert not any(classifier.classify(m).has("simulation") for m in CHAT_MESSAGES), "pesan chat memicu simulasi"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        user_ids = seed_database(os.path.join(workdir, "db.sqlite"), rows=args.rows, users=args.users,
+                                 history_per_user=args.history)
+        print(f"seed SQLite: {args.rows} baris mining_clean2, {args.users} user ({time.perf_counter() - started:.1f}s)")
+
+        port = args.port or free_port()
+        command = [sys.executable, "-m", "benchmarks.loadtest", "serve", "--workdir", workdir, "--port", str(port),
+                   "--llm-latency-ms", str(args.llm_latency_ms), "--db-latency-ms", str(args.db_latency_ms)]
+        if not args.llm_cache:
+            command.append("--no-llm-cache")
+        log = open(os.path.join(workdir, "server.log"), "w")
+        server = subprocess.Popen(command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+                                  env=dict(os.environ, PYTHONWARNINGS="ignore"))
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            startup = wait_ready(base_url, server, timeout=120.0)
+            samples, errors, memory, metrics_text, health = asyncio.run(drive(base_url, user_ids, args, server.pid))
+        except Exception:
+            log.flush()
+            with open(os.path.join(workdir, "server.log")) as f:
+                print(f.read()[-4000:])
+            raise
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            log.close()
+
+    summary = summarize(samples, errors, memory, args.duration, stage_means(metrics_text))
+    summary["config"] = {k: v for k, v in vars(args).items() if k not in ("mode", "workdir", "json", "baseline")}
+    summary["history_writer"] = health.get("history_writer")
+    print_summary(summary, args, startup)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2, default=str)
+        print(f"\nringkasan ditulis ke {args.json}")
+    if args.baseline:
+        problems = check_regression(summary, args.baseline, args.max_regression_pct)
+        print("\nregresi terhadap baseline: " + ("; ".join(problems) if problems else "tidak ada"))
+        if problems:
+            sys.exit(1)
+
+
+def wait_ready(base_url, server, timeout):
+    """Tunggu /health/ready = 200; return profile startup dari /health."""
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server berhenti saat startup (exit {server.returncode})")
+        try:
+            if httpx.get(f"{base_url}/health/ready", timeout=2.0).status_code == 200:
+                profile = httpx.get(f"{base_url}/health", timeout=5.0).json().get("startup", {}).get("profile")
+                return profile or {}
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError("server tidak ready dalam batas waktu")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/standins.py
+# Stand-in lokal untuk menjalankan ChatRouter + app FastAPI tanpa PostgreSQL dan
+# tanpa Gemini: satu file SQLite berisi users, chat_history dan mining_clean2
+# (dari Mining_Clean3.csv, direplikasi), plus LLM palsu ber-latency.
+# Dipakai oleh benchmarks/loadtest.py.
+import asyncio
+import datetime
+import os
+import sqlite3
+import time
+import uuid
+
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+
+from agent.router import ChatRouter, build_chat_history_insert
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCHEMA = [
+    "CREATE TABLE users (user_id TEXT PRIMARY KEY, username TEXT NOT NULL)",
+    """CREATE TABLE chat_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        message TEXT,
+        answer TEXT,
+        chat_id TEXT,
+        created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') || '000')
+    )""",
+    # Sama dengan migrations/001_chat_history_keyset_index.sql (tanpa CONCURRENTLY)
+    "CREATE INDEX idx_chat_history_user_created_chat ON chat_history (user_id, created_at DESC, chat_id DESC)",
+]
+
+# created_at disimpan sebagai teks; semua timestamp (default kolom, data seed dan
+# parameter datetime) memakai format yang sama dengan 6 digit mikrodetik supaya
+# urutan teks = urutan waktu (range 24 jam dan cursor /history)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+sqlite3.register_adapter(datetime.datetime, lambda value: value.strftime(TIMESTAMP_FORMAT))
+
+
+def sqlite_engine(db_path: str):
+    engine = create_engine(f"sqlite:///{db_path}", pool_size=16, max_overflow=16)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    return engine
+
+
+def mining_rows(rows: int) -> pd.DataFrame:
+    """Mining_Clean3.csv direplikasi sampai rows baris; tiap replika digeser 1 hari (tanggal tetap realistis)."""
+    base = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"))
+    date_columns = ["departure_date", "arrival_estimate", "arrival_estimate_new", "week_start"]
+    parts = []
+    for k in range(rows // len(base) + 1):
+        part = base.copy()
+        for col in date_columns:
+            part[col] = (pd.to_datetime(part[col]) + pd.Timedelta(days=k)).dt.strftime("%Y-%m-%d")
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True).iloc[:rows]
+
+
+def seed_database(db_path: str, rows: int = 20000, users: int = 200, history_per_user: int = 0):
+    """Buat file SQLite stand-in; return daftar user_id."""
+    engine = sqlite_engine(db_path)
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+    user_ids = [str(uuid.UUID(int=i + 1)) for i in range(users)]
+    pd.DataFrame({"user_id": user_ids, "username": [f"user{i}" for i in range(users)]}).to_sql(
+        "users", engine, if_exists="append", index=False
+    )
+    if history_per_user:
+        now = datetime.datetime.now()
+        history = pd.DataFrame([
+            {"user_id": uid, "message": f"pesan lama {j}", "answer": f"jawaban lama {j}", "chat_id": str(uuid.uuid4()),
+             "created_at": (now - datetime.timedelta(minutes=j + 1)).strftime(TIMESTAMP_FORMAT)}
+            for uid in user_ids for j in range(history_per_user)
+        ])
+        history.to_sql("chat_history", engine, if_exists="append", index=False, chunksize=5000)
+    mining_rows(rows).to_sql("mining_clean2", engine, if_exists="replace", index=False, chunksize=10000)
+    engine.dispose()
+    return user_ids
+
+
+class SQLiteChatRouter(ChatRouter):
+    """
+    ChatRouter dengan semua tabel di SQLite. Path async (users, chat_history)
+    menjalankan query sync di thread (SQLite tidak punya driver async terpasang),
+    ditambah db_latency detik per query untuk meniru round-trip jaringan ke DB.
+    Sisanya (snapshot, registry model, refresher, write-behind, tracing) adalah
+    kode produksi apa adanya.
+    """
+
+    def __init__(self, db_path: str, model_paths=None, db_latency: float = 0.0):
+        self.db_latency = db_latency
+        super().__init__(df_path=None, model_paths=model_paths, engine=sqlite_engine(db_path))
+
+    def _query(self, fn, *args):
+        if self.db_latency:
+            time.sleep(self.db_latency)
+        return fn(*args)
+
+    async def get_user_info_async(self, user_id):
+        return await asyncio.to_thread(self._query, self.get_user_info, user_id)
+
+    def get_recent_chat_history(self, user_id, hours=24):
+        rows = super().get_recent_chat_history(user_id, hours)
+        # SQLite mengembalikan TIMESTAMP sebagai teks; PostgreSQL sebagai datetime
+        for row in rows or []:
+            row["created_at"] = datetime.datetime.fromisoformat(row["created_at"])
+        return rows
+
+    async def get_recent_chat_history_async(self, user_id, hours=24):
+        return await asyncio.to_thread(self._query, self.get_recent_chat_history, user_id, hours)
+
+    def get_chat_history_page(self, user_id, limit=None, cursor=None):
+        page = super().get_chat_history_page(user_id, limit, cursor)
+        for item in page["items"]:
+            item["created_at"] = datetime.datetime.fromisoformat(item["created_at"])
+        return page
+
+    async def get_chat_history_page_async(self, user_id, limit=None, cursor=None):
+        return await asyncio.to_thread(self._query, self.get_chat_history_page, user_id, limit, cursor)
+
+    def _insert_batch(self, rows):
+        params = {}
+        for i, row in enumerate(rows):
+            params.update({f"{k}_{i}": v for k, v in row.items()})
+        with self.engine.begin() as conn:
+            conn.execute(build_chat_history_insert(len(rows)), params)
+
+    async def insert_chat_history_batch_async(self, rows):
+        await asyncio.to_thread(self._query, self._insert_batch, rows)
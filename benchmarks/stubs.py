@@ -0,0 +1,54 @@
+# benchmarks/stubs.py
+# Stand-in DB untuk benchmark: ChatRouter mode 'dummy' + data & model lokal,
+# dengan query users/chat_history diganti fungsi ber-latency tetap.
+import asyncio
+import os
+import time
+
+import pandas as pd
+
+from agent.router import ChatRouter
+from model.calculator import MiningValueCalculator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_stub_router(db_latency: float = 0.002, username: str = "bench") -> ChatRouter:
+    df = pd.read_csv(os.path.join(ROOT, "Mining_Clean3.csv"), parse_dates=["departure_date"])
+    router = ChatRouter(df_path='dummy', model_paths=None)
+    router.mining_calculator = MiningValueCalculator(
+        df=df, model_path=os.path.join(ROOT, "models", "mining_simulation_rf.pkl")
+    )
+    user = {"user_id": "u1", "username": username}
+
+    # Stub DB sync
+    def get_user_info(user_id):
+        time.sleep(db_latency)
+        return user
+
+    def get_recent_chat_history(user_id, hours=24):
+        time.sleep(db_latency)
+        return None
+
+    def save_chat_history(user_id, message, answer, chat_id=None):
+        time.sleep(db_latency)
+
+    # Stub DB async
+    async def get_user_info_async(user_id):
+        await asyncio.sleep(db_latency)
+        return user
+
+    async def get_recent_chat_history_async(user_id, hours=24):
+        await asyncio.sleep(db_latency)
+        return None
+
+    async def save_chat_history_async(user_id, message, answer, chat_id=None):
+        await asyncio.sleep(db_latency)
+
+    router.get_user_info = get_user_info
+    router.get_recent_chat_history = get_recent_chat_history
+    router.save_chat_history = save_chat_history
+    router.get_user_info_async = get_user_info_async
+    router.get_recent_chat_history_async = get_recent_chat_history_async
+    router.save_chat_history_async = save_chat_history_async
+    return router
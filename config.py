@@ -4,4 +4,136 @@ DB_CONFIG = {
     'database': 'mining_operational_db',
     'user': 'postgres',
     'password': 'nikitacantik'
-}
\ No newline at end of file
+}
+
+# Snapshot kolumnar mining_clean2 (lihat model/snapshot.py): .npy per kolom, di-mmap
+# bersama oleh semua worker dan ditulis ulang hanya jika tabel berubah.
+SNAPSHOT_CONFIG = {
+    'enabled': True,
+    'directory': 'cache/snapshots/mining_clean2'
+}
+
+# Refresh inkremental mining_clean2 (lihat agent/refresher.py): tarik baris dengan
+# departure_date >= high-water mark setiap interval_seconds.
+REFRESH_CONFIG = {
+    'enabled': True,
+    'interval_seconds': 60
+}
+
+# Registry model (lihat model/registry.py): cek models/ atau manifest setiap poll_seconds
+# dan tukar model baru tanpa restart. enabled=False = hanya load sekali saat start.
+MODEL_REGISTRY_CONFIG = {
+    'enabled': True,
+    'poll_seconds': 30,
+    'manifest_path': 'models/manifest.json'
+}
+
+# Tabel rule rekomendasi (lihat model/rules.py). Jika file ada, tabel di dalamnya
+# menimpa default dan di-reload otomatis saat file berubah (dicek paling sering
+# tiap check_interval_seconds). Titik awal: python -m model.rules > models/rules.json
+RULES_CONFIG = {
+    'path': 'models/rules.json',
+    'check_interval_seconds': 5
+}
+
+# Startup (lihat agent/startup.py dan app.py): data, model dan client LLM di-load
+# paralel (parallel=False = berurutan, untuk debug/profiling). wait_for_ready=False:
+# server langsung menerima koneksi (liveness) dan /health/ready = 503 sampai
+# inisialisasi selesai; True = lifespan menunggu inisialisasi sebelum server siap.
+STARTUP_CONFIG = {
+    'parallel': True,
+    'max_workers': 4,
+    'wait_for_ready': False
+}
+
+# Timer per stage pemrosesan chat (lihat model/tracing.py): histogram di GET /metrics
+# dan field timings di respons jika diminta (?timings=true). enabled=False = no-op.
+TRACING_CONFIG = {
+    'enabled': True
+}
+
+# Single-flight + cache hasil simulasi identik (lihat agent/simulation_cache.py).
+# Key memuat versi data & model, jadi refresh data / reload model otomatis invalidasi.
+SIMULATION_CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 512,
+    'ttl_seconds': 300
+}
+
+# Tabel prediksi mingguan (lihat model/outlook.py): fitur + prediksi RF untuk semua
+# week_start dalam horizon_weeks ke depan dihitung saat start dan di-build ulang di
+# background setelah refresh data / reload model (dicek juga tiap check_interval_seconds
+# untuk pergantian hari). persist_path=None = hanya in-memory.
+OUTLOOK_CONFIG = {
+    'enabled': True,
+    'horizon_weeks': 8,
+    'check_interval_seconds': 60,
+    'persist_path': None  # contoh: 'cache/weekly_outlook.pkl'
+}
+
+# Micro-batching inference RF (lihat model/batching.py)
+INFERENCE_BATCH_CONFIG = {
+    'max_batch_size': 32,
+    'max_wait_ms': 2.0,
+    'result_timeout_seconds': 30.0  # batas tunggu pemanggil sync (None = tanpa batas)
+}
+
+# Ambang peluang (0-1) mencapai target untuk rule target mining, dihitung dari
+# output per-tree RF. None = pakai rule lama (pencapaian < 85%).
+TARGET_PROBABILITY_THRESHOLD = None
+
+# Cache jawaban LLM (lihat agent/llm_cache.py). disk_path=None = hanya cache in-process.
+LLM_CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 1024,
+    'ttl_seconds': 3600,
+    'disk_path': None  # contoh: 'cache/llm_cache.sqlite'
+}
+
+# Deadline per request dan pengaman panggilan LLM (lihat agent/resilience.py dan
+# LLMClient di agent/llm.py). Jika budget habis / LLM timeout / breaker terbuka,
+# request simulasi dijawab dengan template dari rekomendasi & justifikasi simulasi.
+RESILIENCE_CONFIG = {
+    'request_budget_ms': 10000,      # default budget per request (override: ?deadline_ms=)
+    'timeout_seconds': 8.0,          # hard timeout per panggilan LLM
+    'hedge': False,                  # opsional: kirim request kedua jika yang pertama lebih lambat dari p95
+    'hedge_percentile': 95,
+    'hedge_min_delay_ms': 500,
+    'breaker_failures': 5,           # kegagalan berturut-turut sebelum sirkuit terbuka
+    'breaker_cooldown_seconds': 30
+}
+
+# Cache sesi per user (lihat agent/session.py)
+SESSION_CACHE_CONFIG = {
+    'max_users': 10000,
+    'max_turns': 50,
+    'ttl_seconds': 300
+}
+
+# Pagination GET /history (lihat ChatRouter.get_chat_history_page). Butuh index
+# migrations/001_chat_history_keyset_index.sql agar waktu query tetap datar.
+# identity_header: nama header identitas yang di-set gateway/proxy (mis. 'X-User-Id');
+# jika diisi, /history hanya melayani user_id yang sama dengan header tsb (403 selain itu).
+# None = user_id dipercaya apa adanya seperti di /chat, jadi siapa pun yang bisa
+# menjangkau API bisa membaca history user lain.
+HISTORY_API_CONFIG = {
+    'default_limit': 50,
+    'max_limit': 200,
+    'identity_header': None
+}
+
+# Budget konteks chat (lihat agent/context.py), dalam karakter (~4 karakter per token):
+# max_chars untuk turn verbatim, summary_max_chars untuk ringkasan turn lama.
+CONTEXT_CONFIG = {
+    'max_chars': 4000,
+    'summary_max_chars': 1000,
+    'summary_line_chars': 120
+}
+
+# Write-behind insert chat_history (lihat agent/history_writer.py)
+HISTORY_WRITER_CONFIG = {
+    'enabled': True,
+    'batch_size': 100,
+    'flush_interval_ms': 50,
+    'max_queue': 10000
+}
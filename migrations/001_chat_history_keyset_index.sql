@@ -0,0 +1,16 @@
+-- migrations/001_chat_history_keyset_index.sql
+-- Index untuk pagination keyset GET /history (ChatRouter.get_chat_history_page):
+--   WHERE user_id = ? AND (created_at, chat_id) < (?, ?)
+--   ORDER BY created_at DESC, chat_id DESC LIMIT ?
+-- Urutan kolom sama dengan ORDER BY sehingga satu halaman = satu range scan
+-- sepanjang LIMIT row, tanpa sort dan tanpa membaca halaman sebelumnya.
+-- Query 24 jam terakhir (get_recent_chat_history) juga memakai prefix index ini.
+--
+-- message/answer sengaja tidak di-INCLUDE: jawaban LLM bisa melebihi batas
+-- ukuran tuple btree, dan per halaman hanya LIMIT row yang diambil dari heap.
+--
+-- CONCURRENTLY: tidak mengunci tabel untuk INSERT selama build; jalankan di luar
+-- transaksi, mis.  psql "$DATABASE_URL" -f migrations/001_chat_history_keyset_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_history_user_created_chat
+    ON chat_history (user_id, created_at DESC, chat_id DESC);
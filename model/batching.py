@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from model.forest import QUANTILES, predict_distribution
+
+
+class MicroBatcher:
+    """
+    Kumpulkan request prediksi single-row dari banyak thread menjadi batch kecil.
+
+    Worker thread mengambil request pertama di antrean, lalu menunggu paling lama
+    max_wait_ms (dihitung dari saat request itu masuk) atau sampai max_batch_size
+    row terkumpul, kemudian menjalankan satu model.predict vektor untuk semua row
+    dan mengirim hasilnya ke masing-masing pemanggil lewat Future.
+
+    Hasil per row berupa dict {"mean", "p10", "p50", "p90", "trees"}; quantile dan
+    output per-tree hanya terisi untuk CompiledForest (dihitung di pass yang sama).
+
+    Error saat menyusun/memprediksi batch diteruskan ke semua Future di batch itu
+    dan worker tetap jalan; pemanggil sync menunggu paling lama result_timeout_seconds.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 feature_names: Optional[List[str]] = None, name: str = "model",
+                 result_timeout_seconds: Optional[float] = 30.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.result_timeout = result_timeout_seconds
+        self.feature_names = feature_names
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self._queue_waits = deque(maxlen=4096)
+        self._predict_time_total = 0.0
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit(self, row) -> Future:
+        """Masukkan satu row fitur ke antrean, kembalikan Future berisi dict prediksi."""
+        row = np.asarray(row, dtype=np.float64).ravel()
+        # Row dengan jumlah fitur salah ditolak di thread pemanggil, bukan menggagalkan batch orang lain
+        n_features = getattr(self.model, "n_features_in_", None)
+        if n_features is not None and len(row) != n_features:
+            raise ValueError(f"{self.name}: row berisi {len(row)} fitur, model butuh {n_features}")
+        future = Future()
+        self._queue.put((row, time.perf_counter(), future))
+        self._ensure_worker()
+        return future
+
+    def predict_one(self, row) -> float:
+        """Prediksi single-row (blocking) lewat batch."""
+        return self.submit(row).result(timeout=self.result_timeout)["mean"]
+
+    def predict_one_distribution(self, row) -> Dict[str, Any]:
+        """Seperti predict_one, tapi mengembalikan mean + P10/P50/P90 + output per-tree."""
+        return self.submit(row).result(timeout=self.result_timeout)
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = first[1] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Sinyal stop: proses batch terakhir dulu, lalu berhenti
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+
+            # Semua langkah batch di dalam try: satu batch gagal tidak boleh mematikan
+            # worker (Future yang tersisa tidak akan pernah selesai)
+            try:
+                X = np.vstack([item[0] for item in batch])
+                if self.feature_names is not None:
+                    X = pd.DataFrame(X, columns=self.feature_names)
+                means, quantiles, trees = predict_distribution(self.model, X)
+                results = []
+                for i in range(len(batch)):
+                    result = {"mean": float(means[i]), "trees": trees[i] if trees is not None else None}
+                    for q, name in enumerate(f"p{p}" for p in QUANTILES):
+                        result[name] = float(quantiles[i, q]) if quantiles is not None else None
+                    results.append(result)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._record(batch, started)
+
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _record(self, batch, started):
+        now = time.perf_counter()
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+            self._queue_waits.extend(started - enqueued for _, enqueued, _ in batch)
+            self._predict_time_total += now - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Ringkasan batch-size dan queue-wait (ms) untuk monitoring."""
+        with self._stats_lock:
+            waits = np.array(self._queue_waits) * 1000.0
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+                "queue_wait_ms": {
+                    "avg": float(waits.mean()) if len(waits) else 0.0,
+                    "p50": float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                    "p99": float(np.percentile(waits, 99)) if len(waits) else 0.0,
+                    "max": float(waits.max()) if len(waits) else 0.0,
+                },
+                "avg_predict_ms": self._predict_time_total / self.batches * 1000.0 if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
@@ -1,16 +1,37 @@
 import pandas as pd
 import numpy as np
 import pickle
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
+from model.feature_store import WeeklyFeatureStore
+from model.shipping_batch import ShippingBatchSimulation
+from model.batching import MicroBatcher
+from model.forest import load_model, predict_distribution
+from model.rules import RuleBook, get_rule_book
+from model.tracing import span
+
+# Fitur model mining (urutan kolom saat training, lihat model/train.py)
+MINING_FEATURES = [
+    'distance', 'capacity_ton', 'rainfall_mm', 'wind_speed_kmh',
+    'wave_height_m', 'temperature_c', 'humidity_percent', 'wsi',
+    'load_ratio', 'base_speed', 'weather_factor', 'actual_speed',
+    'duration', 'is_extreme'
+]
 
 class MiningValueCalculator:
-    def __init__(self, df_path: str = None, df: pd.DataFrame = None, model_path: str = None):
+    def __init__(self, df_path: str = None, df: pd.DataFrame = None, model_path: str = None,
+                 batch_config: Dict[str, Any] = None, target_probability_threshold: Optional[float] = None,
+                 rule_book: RuleBook = None):
         """
         Inisialisasi kalkulator dengan data mining dan model RF.
         - df_path: Path ke CSV data mining.
         - df: DataFrame langsung (prioritas jika diberikan).
         - model_path: Path ke model RF (misalnya, 'mining_simulation_rf.pkl').
+        - batch_config: Parameter MicroBatcher (max_batch_size, max_wait_ms).
+        - target_probability_threshold: Jika diisi (0-1), rule target memakai peluang
+          mencapai target (dari output per-tree) alih-alih ambang pencapaian 85%.
+        - rule_book: Tabel rule rekomendasi (model/rules.py); default dari config.RULES_CONFIG.
         """
         if df is not None:
             self.df = df
@@ -19,20 +40,76 @@ class MiningValueCalculator:
         else:
             raise ValueError("Harus berikan df_path atau df.")
         
-        # Load model RF untuk mining
+        # Load model RF untuk mining (artefak compiled/mmap jika tersedia, lihat model/forest.py)
         if model_path:
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
+            self.model = load_model(model_path)
         else:
             self.model = None  # Jika tidak ada model, gunakan rule-based saja
         
         # Fitur untuk mining (sesuaikan berdasarkan data Anda)
-        self.features = [
-            'distance', 'capacity_ton', 'rainfall_mm', 'wind_speed_kmh', 
-            'wave_height_m', 'temperature_c', 'humidity_percent', 'wsi', 
-            'load_ratio', 'base_speed', 'weather_factor', 'actual_speed', 
-            'duration', 'is_extreme'
-        ]
+        self.features = list(MINING_FEATURES)
+        
+        # Index fitur mingguan (sorted + binary search), dibangun sekali saat load
+        self.feature_store = WeeklyFeatureStore.from_frame(self.df)
+        # Naik setiap kali data ditambah (append_data); dipakai sebagai bagian key cache
+        self.data_version = 0
+        # Naik setiap set_model, dipakai key cache simulasi (lihat simulation_key)
+        self.model_version = 0
+        self._data_lock = threading.Lock()
+        
+        self.target_probability_threshold = target_probability_threshold
+        self.rule_book = rule_book or get_rule_book()
+        
+        # Request single-row dari banyak thread digabung jadi satu predict per batch
+        self.batch_config = batch_config or {}
+        self.predictor = MicroBatcher(self.model, name="mining", **self.batch_config) if self.model else None
+        
+        # Tabel prediksi N minggu ke depan (model/outlook.py), dipasang oleh ChatRouter
+        self.outlook = None
+    
+    def set_model(self, model):
+        """
+        Ganti model mining saat runtime (dipanggil ModelRegistry). Predictor diisi
+        dulu baru self.model, sehingga request yang melihat model baru selalu
+        punya predictor; batch yang sedang jalan selesai dengan model lama.
+        """
+        if self.predictor is None:
+            self.predictor = MicroBatcher(model, name="mining", **self.batch_config)
+        else:
+            self.predictor.model = model
+        self.model = model
+        self.model_version += 1
+        if self.outlook is not None:
+            self.outlook.request_rebuild()
+    
+    # DATA REFRESH
+    # ==========================
+    def append_data(self, new_rows: pd.DataFrame) -> int:
+        """
+        Tambahkan baris baru (misal dari refresher) tanpa memblokir pembaca.
+        DataFrame dan feature_store baru dibangun di samping yang lama lalu
+        ditukar dengan assignment atribut; simulasi yang sedang berjalan tetap
+        memegang objek lama sampai selesai.
+        """
+        if new_rows is None or len(new_rows) == 0:
+            return 0
+        with self._data_lock:
+            new_rows = new_rows.copy()
+            for col in new_rows.columns:
+                # Samakan dtype tanggal dengan data lama (snapshot sudah datetime64)
+                if col in self.df.columns and pd.api.types.is_datetime64_any_dtype(self.df[col].dtype):
+                    new_rows[col] = pd.to_datetime(new_rows[col])
+            df = pd.concat([self.df, new_rows], ignore_index=True) if len(self.df) else new_rows.reset_index(drop=True)
+            if self.feature_store is not None and len(self.df):
+                store = self.feature_store.append(new_rows)
+            else:
+                store = WeeklyFeatureStore.from_frame(df)
+            self.feature_store = store
+            self.df = df
+            self.data_version += 1
+        if self.outlook is not None:
+            self.outlook.request_rebuild()
+        return len(new_rows)
     
     # HELPER FUNCTIONS
     # ==========================
@@ -71,47 +148,20 @@ class MiningValueCalculator:
         Jalankan simulasi shipping berdasarkan satu row data.
         Mengembalikan dict dengan bagian_1 (data), bagian_2 (status & rekomendasi).
         """
-        recs, justifications = [], []
-        
-        risk = self.calculate_risk_level(row["wave_height_m"], row["wind_speed_kmh"])
-        speed_status = self.get_speed_status(row["actual_speed"], row["base_speed"])
         delay_hours = self.calculate_delay_hours(
             row.get("arrival_estimate"), 
             row.get("arrival_estimate_new")
         )
         
-        # Rekomendasi risk
-        if risk == "High":
-            recs.append("Cuaca berat → gelombang & angin tinggi, jadwal kapal berpotensi terganggu.")
-            justifications.append("Risk level High (gelombang >2 m, angin >30 km/h).")
-        elif risk == "Medium":
-            recs.append("Cuaca cukup berpengaruh → pertimbangkan buffer waktu keberangkatan.")
-            justifications.append("Risk level Medium (gelombang >1 m).")
-        else:
-            recs.append("Cuaca aman → operasional normal.")
-            justifications.append("Risk level Low (gelombang & angin normal).")
-        
-        # Rekomendasi speed
-        if speed_status == "Slow":
-            recs.append("Kecepatan kapal rendah → evaluasi rute/maintenance.")
-            justifications.append("Aktual speed < 80% baseline.")
-        elif speed_status == "Fast":
-            recs.append("Kecepatan kapal tinggi → percepatan jadwal kedatangan.")
-            justifications.append("Aktual speed > 120% baseline.")
-        else:
-            recs.append("Kecepatan kapal normal → estimasi kedatangan sesuai standar.")
-            justifications.append("Aktual speed dalam kisaran normal (80–120%).")
-        
-        # Rekomendasi delay
-        if delay_hours > 2:
-            recs.append(f"Perkiraan delay {delay_hours:.1f} jam → siapkan notifikasi pelabuhan.")
-            justifications.append("Selisih signifikan antara estimated arrival awal dan baru.")
-        elif delay_hours > 0:
-            recs.append(f"Perkiraan delay ringan {delay_hours:.1f} jam → tetap dipantau.")
-            justifications.append("Delay minor terdeteksi.")
-        else:
-            recs.append("Tidak ada delay → jadwal tetap on time.")
-            justifications.append("Arrival estimate tidak berubah.")
+        # Rekomendasi risk, speed & delay dari tabel rule "shipping" (label case = risk/speed status)
+        recs, justifications, labels = self.rule_book.get("shipping").evaluate_one({
+            "wave_height_m": row["wave_height_m"],
+            "wind_speed_kmh": row["wind_speed_kmh"],
+            "actual_speed": row["actual_speed"],
+            "base_speed": row["base_speed"],
+            "delay_hours": delay_hours,
+        })
+        risk, speed_status = labels["risk"], labels["speed"]
         
         status_operasional = "Delay" if delay_hours > 0 else "On track"
         
@@ -140,15 +190,26 @@ class MiningValueCalculator:
         Jalankan simulasi shipping untuk semua row di shipping_df.
         Mengembalikan list hasil simulasi.
         """
-        return [self.run_shipping_simulation(row) for idx, row in shipping_df.iterrows()]
+        return self.run_shipping_simulations_batch(shipping_df).to_list()
+    
+    def run_shipping_simulations_batch(self, shipping_df: pd.DataFrame) -> ShippingBatchSimulation:
+        """
+        Versi kolumnar untuk laporan fleet-wide: semua row dihitung dengan operasi vektor,
+        dict per row (bagian_1/bagian_2) hanya dibangun saat diakses.
+        """
+        return ShippingBatchSimulation(shipping_df, self.rule_book.get("shipping"))
     
     # SIMULASI MINING
     # ==========================
     def make_week_features(self, week_start: datetime, df_source: pd.DataFrame = None) -> Dict[str, float]:
         """
         Buat fitur mingguan berdasarkan data historis 4 minggu sebelum week_start.
+        Jika df_source tidak diberikan, fitur diambil dari feature_store (tanpa scan tabel).
         """
         if df_source is None:
+            store = self.feature_store  # satu referensi: aman walau append_data menukar store
+            if store is not None:
+                return store.week_features(week_start)
             df_source = self.df
         
         ws = pd.to_datetime(week_start)
@@ -190,65 +251,39 @@ class MiningValueCalculator:
         Jalankan simulasi mining dengan RF model + rules.
         Mengembalikan dict dengan prediksi, rekomendasi, dll.
         """
-        feats = self.make_week_features(week_start)
+        # Minggu dalam horizon outlook: fitur + distribusi prediksi sudah dihitung di background
+        outlook = self.outlook
+        cached = outlook.lookup(week_start) if outlook is not None else None
+        if cached is not None:
+            feats, dist = cached
+        else:
+            with span("week_features"):
+                feats = self.make_week_features(week_start)
+            dist = None
         
         # Prediksi menggunakan RF model jika ada
+        # Prediksi + band P10/P50/P90 dari output per-tree (satu pass yang sama)
+        quantiles = None
+        target_probability = None
         if self.model:
-            X_input = np.array([feats[f] for f in self.features]).reshape(1, -1)
-            predicted = float(self.model.predict(X_input)[0])
+            if dist is None:
+                with span("model_predict"):
+                    dist = self.predictor.predict_one_distribution([feats[f] for f in self.features])
+            predicted = dist["mean"]
+            if dist["trees"] is not None:
+                quantiles = {"p10": dist["p10"], "p50": dist["p50"], "p90": dist["p90"]}
+                target_probability = float(np.mean(dist["trees"] >= target_ton))
         else:
             # Fallback: estimasi sederhana berdasarkan kapasitas
             predicted = feats['capacity_ton'] * 0.8  # Placeholder
         
         achievement_pct = predicted / (target_ton + 1e-9) * 100.0
         
-        recs = []
-        justifications = []
-        
-        # RULE CUACA (weather_factor)
-        if feats['weather_factor'] > 70:
-            recs.append("Cuaca sangat berat (angin/gelombang/hujan tinggi) → risiko operasional meningkat, siapkan mitigasi.")
-            justifications.append("Weather factor tinggi sehingga berpotensi menghambat operasi.")
-        elif feats['weather_factor'] > 40:
-            recs.append("Cuaca cukup berpengaruh minggu ini → potensi keterlambatan 5–10%.")
-            justifications.append("Kondisi cuaca cukup menekan performa logistik.")
-        else:
-            recs.append("Kondisi cuaca relatif aman untuk operasi minggu ini.")
-            justifications.append("Cuaca mendukung sehingga operasi dapat berjalan optimal.")
-        
-        # RULE KELAIKAN ARMADA (fleet_health_index)
-        if feats['base_speed'] > 0:
-            fleet_health_index = feats['actual_speed'] / feats['base_speed']
-        else:
-            fleet_health_index = 1.0
-        
-        if fleet_health_index < 0.6:
-            recs.append("Kesehatan armada rendah → kecepatan kapal rata-rata drop signifikan, perlu maintenance.")
-            justifications.append("Fleet health rendah yang dapat menurunkan kecepatan kapal.")
-        elif fleet_health_index < 0.8:
-            recs.append("Performa armada menurun → cek jadwal maintenance dan kapasitas kapal.")
-            justifications.append("Fleet health menurun sehingga efisiensi kapal berkurang.")
-        else:
-            recs.append("Status armada sehat → performa mendukung target minggu ini.")
-            justifications.append("Armada dalam kondisi optimal untuk produksi.")
-        
-        # RULE EXTREME WEATHER
-        if feats['is_extreme'] > 0.3:
-            recs.append("Cuaca ekstrem sering terjadi → evaluasi jadwal kapal dan slot bongkar.")
-            justifications.append("Frekuensi cuaca ekstrem cukup tinggi.")
-        
-        # RULE LOAD RATIO
-        if feats['load_ratio'] > 1.15:
-            recs.append("Load ratio tinggi → risiko over-utilization armada.")
-            justifications.append("Load ratio di atas normal sehingga risiko overload meningkat.")
-        
-        # TARGET ACHIEVEMENT
-        if achievement_pct < 85:
-            recs.append(f"Pencapaian diperkirakan {achievement_pct:.1f}% → target berisiko tidak tercapai.")
-            justifications.append("Prediksi produksi di bawah 85% dari target.")
-        else:
-            recs.append(f"Pencapaian diperkirakan {achievement_pct:.1f}% → target realistis.")
-            justifications.append("Prediksi produksi memenuhi atau melampaui target minggu ini.")
+        # Rule cuaca, kelaikan armada, cuaca ekstrem, load ratio dan target (tabel "mining")
+        recs, justifications, _ = self.rule_book.get("mining").evaluate_one(
+            {**feats, "achievement_pct": achievement_pct, "target_probability": target_probability},
+            {"target_probability_threshold": self.target_probability_threshold}
+        )
         
         full_justification = " ".join(justifications)
         
@@ -256,12 +291,16 @@ class MiningValueCalculator:
             "features": feats,
             "predicted_weekly_production": predicted,
             "achievement_pct": achievement_pct,
+            "production_quantiles": quantiles,
+            "target_probability": target_probability,
             "justification": full_justification
         }
         
         return {
             "predicted_production_ton": predicted,
+            "predicted_production_quantiles": quantiles,
             "achievement_percent": achievement_pct,
+            "target_probability": target_probability,
             "recommendations": recs,
             "justification": full_justification,
             "simulation_context": simulation_context
@@ -274,6 +313,85 @@ class MiningValueCalculator:
         """
         return self.run_mining_simulation(target_ton, week_start)
     
+    def simulation_key(self, target_ton: float, week_start: datetime) -> tuple:
+        """
+        Key memo untuk calculate_optimal_value. Hasilnya hanya bergantung pada
+        baris di window 4 minggu (bukan jam pada week_start), jadi dengan
+        feature_store key memakai index window [lo, hi); ditambah versi data, versi
+        model dan versi rule sehingga append_data/set_model/reload rule otomatis
+        membuat key baru.
+        """
+        data_version, model_version = self.data_version, self.model_version
+        rules_version = self.rule_book.refresh()
+        store = self.feature_store
+        window = store.window_bounds(week_start) if store is not None else str(pd.Timestamp(week_start))
+        return float(target_ton), window, data_version, model_version, rules_version
+    
+    def calculate_target_sweep(self, week_start: datetime, n_weeks: int, targets: List[float],
+                               include_recommendations: bool = False) -> Dict[str, Any]:
+        """
+        What-if untuk banyak minggu x banyak target tonase.
+        Fitur semua minggu dibangun dalam satu pass lalu diprediksi dengan satu
+        batch model.predict; pencapaian per target hanya aritmetika di atas hasilnya.
+        include_recommendations=True menambahkan rekomendasi & justifikasi per
+        (minggu, target), dari satu evaluasi tabel rule untuk seluruh grid.
+        """
+        ws0 = pd.to_datetime(week_start)
+        week_starts = [ws0 + pd.Timedelta(weeks=i) for i in range(n_weeks)]
+        targets_arr = np.asarray(targets, dtype=np.float64)
+        
+        store = self.feature_store
+        if store is not None:
+            X = store.week_feature_matrix(week_starts, self.features)
+        else:
+            X = np.array([[self.make_week_features(ws)[f] for f in self.features] for ws in week_starts])
+        
+        quantiles = trees = None
+        if self.model:
+            predicted, quantiles, trees = predict_distribution(self.model, X)
+        else:
+            # Fallback: estimasi sederhana berdasarkan kapasitas
+            predicted = X[:, self.features.index('capacity_ton')] * 0.8
+        
+        achievement = predicted[:, None] / (targets_arr[None, :] + 1e-9) * 100.0
+        probability = (trees[:, :, None] >= targets_arr[None, None, :]).mean(axis=1) if trees is not None else None
+        
+        # Target dianggap feasible dengan kriteria yang sama dengan rule target di run_mining_simulation
+        if self.target_probability_threshold is not None and probability is not None:
+            feasible = probability >= self.target_probability_threshold
+        else:
+            feasible = achievement >= 85
+        best_target = [
+            float(targets_arr[row].max()) if row.any() else None
+            for row in feasible
+        ]
+        
+        result = {
+            "weeks": [ws.date().isoformat() for ws in week_starts],
+            "targets": targets_arr.tolist(),
+            "predicted_production_ton": predicted.tolist(),
+            "production_quantiles": [
+                {"p10": q[0], "p50": q[1], "p90": q[2]} for q in quantiles.tolist()
+            ] if quantiles is not None else None,
+            "achievement_percent": achievement.tolist(),
+            "target_probability": probability.tolist() if probability is not None else None,
+            "feasible": feasible.tolist(),
+            "best_feasible_target": best_target
+        }
+        if include_recommendations:
+            # Grid minggu x target diratakan jadi n_weeks * n_targets row
+            n_targets = len(targets_arr)
+            columns = {f: np.repeat(X[:, j], n_targets) for j, f in enumerate(self.features)}
+            columns["achievement_pct"] = achievement.ravel()
+            columns["target_probability"] = probability.ravel() if probability is not None else np.full(achievement.size, np.nan)
+            rules = self.rule_book.get("mining").evaluate(
+                columns, {"target_probability_threshold": self.target_probability_threshold}
+            )
+            rows = [rules.row(i) for i in range(len(rules))]
+            result["recommendations"] = [[rows[w * n_targets + t][0] for t in range(n_targets)] for w in range(n_weeks)]
+            result["justification"] = [[" ".join(rows[w * n_targets + t][1]) for t in range(n_targets)] for w in range(n_weeks)]
+        return result
+    
     # TAMBAHAN: METHOD UNTUK SHIPPING (JIKA DIPERLUKAN OLEH CHATROUTER)
     def calculate_shipping_delay(self, input_features: Dict[str, float]) -> Dict[str, Any]:
         """
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Kolom mentah yang dirata-rata untuk fitur mingguan (weather_factor diturunkan dari kolom ini)
+BASE_COLUMNS = [
+    'distance', 'capacity_ton', 'rainfall_mm', 'wind_speed_kmh',
+    'wave_height_m', 'temperature_c', 'humidity_percent', 'wsi',
+    'load_ratio', 'base_speed', 'actual_speed', 'duration', 'is_extreme'
+]
+
+WINDOW = pd.Timedelta(weeks=4)
+
+
+class WeeklyFeatureStore:
+    """
+    Index fitur mingguan yang dibangun sekali saat load.
+
+    departure_date diurutkan sekali (argsort) dan disimpan bersama posisi baris
+    aslinya, plus prefix count nilai non-NaN per kolom. Window 4 minggu untuk
+    week_start dicari dengan binary search, lalu semua mean dihitung sekaligus
+    dari matriks kolom (NaN diganti 0). Baris di dalam window dijumlahkan dalam
+    urutan baris asli (bukan selisih prefix sum) agar hasilnya bit-identik
+    dengan Series.mean() di make_week_features versi scan.
+    """
+
+    def __init__(self, dates: np.ndarray, positions: np.ndarray, values: np.ndarray, columns: List[str]):
+        self.columns = list(columns)
+        self.dates = dates          # departure_date terurut
+        self.positions = positions  # posisi baris asli untuk tiap tanggal terurut
+        # Satu baris per kolom fitur (C-order) dalam urutan baris asli
+        self.values_t = np.ascontiguousarray(np.nan_to_num(values, nan=0.0).T)
+        valid = (~np.isnan(values[positions])).astype(np.int64)
+        self.valid_prefix = np.vstack([np.zeros((1, len(columns)), dtype=np.int64), np.cumsum(valid, axis=0)])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: List[str] = BASE_COLUMNS) -> Optional["WeeklyFeatureStore"]:
+        """Bangun store dari DataFrame mining. None jika kolom yang dibutuhkan tidak ada."""
+        if 'departure_date' not in df.columns or any(c not in df.columns for c in columns):
+            return None
+        try:
+            dates = pd.to_datetime(df['departure_date']).to_numpy(dtype='datetime64[ns]')
+            values = df[columns].to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            return None
+
+        # Baris tanpa departure_date tidak pernah masuk window mana pun
+        positions = np.flatnonzero(~np.isnat(dates))
+        positions = positions[np.argsort(dates[positions], kind='stable')]
+        return cls(dates[positions], positions, values, columns)
+
+    def append(self, df_new: pd.DataFrame) -> "WeeklyFeatureStore":
+        """
+        Store baru = store ini + baris df_new (posisi baris melanjutkan yang lama).
+        Store lama tidak diubah, jadi pembaca yang sedang memakainya tetap konsisten.
+        Matriks nilai hanya ditambah kolom baru dan prefix count dihitung ulang mulai
+        dari tanggal baru paling awal saja (window minggu yang terdampak); hasilnya
+        sama dengan from_frame atas DataFrame gabungan.
+        """
+        dates_new = pd.to_datetime(df_new['departure_date']).to_numpy(dtype='datetime64[ns]')
+        values_new = df_new[self.columns].to_numpy(dtype=np.float64)
+        n_old = self.values_t.shape[1]
+
+        keep = np.flatnonzero(~np.isnat(dates_new))
+        keep = keep[np.argsort(dates_new[keep], kind='stable')]
+        dates = np.concatenate([self.dates, dates_new[keep]])
+        positions = np.concatenate([self.positions, keep + n_old])
+        valid = np.vstack([np.diff(self.valid_prefix, axis=0), (~np.isnan(values_new[keep])).astype(np.int64)])
+
+        # Baris baru biasanya lebih baru dari semua baris lama -> cukup append di ujung
+        start = len(self.dates)
+        if len(keep) and len(self.dates) and dates_new[keep[0]] < self.dates[-1]:
+            start = int(np.searchsorted(self.dates, dates_new[keep[0]], side='right'))
+            order = np.concatenate([np.arange(start), start + np.argsort(dates[start:], kind='stable')])
+            dates, positions, valid = dates[order], positions[order], valid[order]
+
+        store = object.__new__(WeeklyFeatureStore)
+        store.columns = self.columns
+        store.dates = dates
+        store.positions = positions
+        store.values_t = np.ascontiguousarray(np.hstack([self.values_t, np.nan_to_num(values_new, nan=0.0).T]))
+        store.valid_prefix = np.vstack([
+            self.valid_prefix[:start + 1],
+            self.valid_prefix[start] + np.cumsum(valid[start:], axis=0)
+        ])
+        return store
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def window_bounds(self, week_start: datetime) -> Tuple[int, int]:
+        """Index [lo, hi) baris dengan ws - 4 minggu <= departure_date < ws."""
+        ws = pd.to_datetime(week_start)
+        lo = np.searchsorted(self.dates, np.datetime64(ws - WINDOW, 'ns'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(ws, 'ns'), side='left')
+        return int(lo), int(hi)
+
+    def window_means(self, week_start: datetime) -> np.ndarray:
+        """Mean semua kolom pada window 4 minggu (NaN jika window/kolom kosong)."""
+        lo, hi = self.window_bounds(week_start)
+        counts = self.valid_prefix[hi] - self.valid_prefix[lo]
+        if hi <= lo:
+            return np.full(len(self.columns), np.nan)
+        rows = np.sort(self.positions[lo:hi])
+        # np.take menjaga layout C-order sehingga tiap kolom dijumlah pairwise seperti Series.sum
+        sums = np.take(self.values_t, rows, axis=1).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def week_feature_matrix(self, week_starts: List[datetime], features: List[str]) -> np.ndarray:
+        """Matriks fitur (n_weeks, len(features)) untuk banyak week_start sekaligus."""
+        rows = [self.week_features(ws) for ws in week_starts]
+        return np.array([[row[f] for f in features] for row in rows], dtype=np.float64).reshape(len(rows), len(features))
+
+    def week_features(self, week_start: datetime) -> Dict[str, float]:
+        """Setara dengan MiningValueCalculator.make_week_features (termasuk fallback NaN -> 0)."""
+        means = dict(zip(self.columns, self.window_means(week_start)))
+        feats = {
+            'distance': means['distance'],
+            'capacity_ton': means['capacity_ton'],
+            'rainfall_mm': means['rainfall_mm'],
+            'wind_speed_kmh': means['wind_speed_kmh'],
+            'wave_height_m': means['wave_height_m'],
+            'temperature_c': means['temperature_c'],
+            'humidity_percent': means['humidity_percent'],
+            'wsi': means['wsi'],
+            'load_ratio': means['load_ratio'],
+            'base_speed': means['base_speed'],
+            'weather_factor': (
+                means['rainfall_mm'] * 0.2 +
+                means['wind_speed_kmh'] * 0.4 +
+                means['wave_height_m'] * 0.4
+            ),
+            'actual_speed': means['actual_speed'],
+            'duration': means['duration'],
+            'is_extreme': means['is_extreme']
+        }
+
+        # Pastikan semua NaN jadi 0
+        return {k: 0.0 if pd.isna(v) else float(v) for k, v in feats.items()}
@@ -0,0 +1,272 @@
+import datetime
+import json
+import os
+import pickle
+import shutil
+import uuid
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+# Node arrays yang disimpan per forest (satu file .npy per array agar bisa di-mmap)
+NODE_ARRAYS = ["feature", "threshold", "children", "missing_left", "value", "roots"]
+
+# Quantile default untuk band ketidakpastian (P10/P50/P90)
+QUANTILES = (10, 50, 90)
+
+
+class CompiledForest:
+    """
+    Representasi kompak RandomForestRegressor sklearn dalam array NumPy kontigu.
+
+    Semua node dari semua tree digabung: feature index (int32), threshold
+    (float32, dibulatkan ke bawah sehingga x <= threshold tetap sama dengan
+    sklearn untuk input float32), offset child kiri/kanan (int32 shape (n, 2),
+    absolut), arah missing value dan nilai leaf (float64). Leaf menunjuk ke
+    dirinya sendiri sehingga traversal bisa dilakukan serentak untuk semua
+    row x tree sebanyak max_depth langkah.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, value, roots,
+                 max_depth: int, n_features_in_: int, feature_names_in_: Optional[List[str]] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in_
+        self.feature_names_in_ = feature_names_in_
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Flatten semua estimator (DecisionTreeRegressor) menjadi satu set array."""
+        features, thresholds, children, missing, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            idx = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            thr64 = tree.threshold.astype(np.float64)
+            thr32 = thr64.astype(np.float32)
+            # Pastikan float32(thr) <= thr supaya (x <= thr) tidak berubah untuk x float32
+            thr32 = np.where(thr32.astype(np.float64) > thr64, np.nextafter(thr32, np.float32(-np.inf)), thr32)
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.float32(np.inf), thr32).astype(np.float32))
+            children.append(np.stack([
+                np.where(is_leaf, idx, tree.children_left),
+                np.where(is_leaf, idx, tree.children_right)
+            ], axis=1).astype(np.int32) + offset)
+            mgl = getattr(tree, "missing_go_to_left", None)
+            missing.append(np.asarray(mgl, dtype=np.uint8) if mgl is not None else np.ones(n, dtype=np.uint8))
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        names = getattr(model, "feature_names_in_", None)
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=int(max_depth),
+            n_features_in_=int(model.n_features_in_),
+            feature_names_in_=list(names) if names is not None else None,
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in NODE_ARRAYS)
+
+    def tree_predictions(self, X) -> np.ndarray:
+        """Output tiap tree untuk tiap row, shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        flat_x = X.ravel()
+        flat_children = self.children.reshape(-1)
+        row_offset = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+        has_nan = bool(np.isnan(flat_x).any())
+
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat_x[row_offset + self.feature[nodes]]
+            go_right = ~(x <= self.threshold[nodes])
+            if has_nan:
+                go_right &= ~(np.isnan(x) & (self.missing_left[nodes] == 1))
+            nodes = flat_children[nodes * 2 + go_right]
+        return self.value[nodes]
+
+    def predict(self, X) -> np.ndarray:
+        """Rata-rata output semua tree (setara RandomForestRegressor.predict)."""
+        return self.tree_predictions(X).mean(axis=1)
+
+    def predict_with_quantiles(self, X, quantiles=QUANTILES):
+        """Mean + quantile antar-tree dari satu traversal: (mean (n,), quantiles (n, q), per-tree (n, T))."""
+        trees = self.tree_predictions(X)
+        return trees.mean(axis=1), tree_quantiles(trees, quantiles), trees
+
+    # PERSISTENCE
+    # ==========================
+    def save(self, directory: str, keep_versions: int = 2) -> str:
+        """
+        Simpan sebagai versi baru: satu file .npy per array + meta.json di
+        subdirektori versi, lalu CURRENT diganti atomik via os.replace (seperti
+        TableSnapshot). File yang mungkin sedang di-mmap worker tidak pernah
+        ditimpa; versi lama hanya di-unlink (aman di POSIX). Return path versi.
+        """
+        # Mikrodetik di nama versi: urutan nama = urutan tulis, dipakai saat cleanup
+        version = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f") + "-" + uuid.uuid4().hex[:8]
+        version_dir = os.path.join(directory, version)
+        os.makedirs(version_dir)
+        for name in NODE_ARRAYS:
+            np.save(os.path.join(version_dir, f"{name}.npy"), getattr(self, name))
+        meta = {
+            "max_depth": self.max_depth,
+            "n_features_in_": self.n_features_in_,
+            "feature_names_in_": self.feature_names_in_,
+            "n_estimators": self.n_estimators,
+            "version": version,
+        }
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        current = os.path.join(directory, "CURRENT")
+        tmp = f"{current}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            f.write(version)
+        os.replace(tmp, current)
+        _cleanup_versions(directory, keep=version, keep_versions=keep_versions)
+        return version_dir
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "CompiledForest":
+        """Load versi CURRENT dengan mmap_mode='r' sehingga page dibagi antar proses worker."""
+        version_dir = current_version_dir(directory)
+        with open(os.path.join(version_dir, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in NODE_ARRAYS
+        }
+        return cls(
+            **arrays,
+            max_depth=meta["max_depth"],
+            n_features_in_=meta["n_features_in_"],
+            feature_names_in_=meta.get("feature_names_in_"),
+        )
+
+
+def current_version_dir(directory: str) -> str:
+    """Subdirektori versi yang ditunjuk CURRENT; directory itu sendiri untuk artefak lama (flat)."""
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return directory
+
+
+def compiled_meta_path(forest_dir: str) -> str:
+    """meta.json versi aktif sebuah artefak compiled (dipakai untuk cek mtime / fingerprint)."""
+    return os.path.join(current_version_dir(forest_dir), "meta.json")
+
+
+def _cleanup_versions(directory: str, keep: str, keep_versions: int):
+    """Hapus versi lama (selain keep_versions terbaru) dan file artefak flat lama; hanya unlink, tidak pernah truncate."""
+    for name in NODE_ARRAYS + ["meta"]:
+        path = os.path.join(directory, f"{name}.json" if name == "meta" else f"{name}.npy")
+        if os.path.isfile(path):
+            os.remove(path)
+    versions = sorted(
+        d for d in os.listdir(directory)
+        if os.path.isdir(os.path.join(directory, d)) and d != keep
+    )
+    for old in versions[:max(0, len(versions) - (keep_versions - 1))]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+def tree_quantiles(trees: np.ndarray, quantiles=QUANTILES) -> np.ndarray:
+    """
+    Quantile per row (interpolasi linear, sama dengan np.percentile default) dari
+    matriks output per-tree. Satu sort per row lalu indexing langsung; jauh lebih
+    ringan dari np.percentile untuk batch kecil.
+    """
+    lo, hi, frac = _quantile_index(trees.shape[1], tuple(quantiles))
+    ordered = np.sort(trees, axis=1)
+    a = ordered[:, lo]
+    return a + (ordered[:, hi] - a) * frac
+
+
+@lru_cache(maxsize=32)
+def _quantile_index(n_trees: int, quantiles: tuple):
+    pos = np.asarray(quantiles, dtype=np.float64) / 100.0 * (n_trees - 1)
+    lo = np.floor(pos).astype(np.intp)
+    return lo, np.minimum(lo + 1, n_trees - 1), pos - lo
+
+
+def compiled_path(model_path: str) -> str:
+    """Lokasi artefak compiled untuk sebuah pickle, misal models/x.pkl -> models/x.forest/."""
+    return os.path.splitext(model_path)[0] + ".forest"
+
+
+def load_model(model_path: str):
+    """
+    Load model untuk inference: pakai artefak compiled (mmap) jika ada dan tidak lebih
+    lama dari pickle-nya. Jika tidak ada, pickle sklearn di-load lalu forest-nya
+    di-compile di memori (model non-forest dikembalikan apa adanya).
+    """
+    forest_dir = compiled_path(model_path)
+    meta_path = compiled_meta_path(forest_dir)
+    if os.path.exists(meta_path) and (
+        not os.path.exists(model_path) or os.path.getmtime(meta_path) >= os.path.getmtime(model_path)
+    ):
+        return CompiledForest.load(forest_dir)
+    model = load_pickled_model(model_path)
+    if hasattr(model, "estimators_") and all(hasattr(est, "tree_") for est in model.estimators_):
+        return CompiledForest.from_sklearn(model)
+    return model
+
+
+def predict_distribution(model, X, quantiles=QUANTILES):
+    """
+    Prediksi + quantile untuk model apa pun: CompiledForest memberi quantile dari
+    output per-tree tanpa inference kedua; model lain hanya punya mean (quantile None).
+    """
+    if isinstance(model, CompiledForest):
+        return model.predict_with_quantiles(X, quantiles)
+    return np.asarray(model.predict(X), dtype=np.float64), None, None
+
+
+def load_pickled_model(model_path: str):
+    """Load model sklearn dari pickle biasa (try.py) atau format joblib (model shipping)."""
+    try:
+        with open(model_path, 'rb') as f:
+            return pickle.load(f)
+    except pickle.UnpicklingError:
+        import joblib
+        return joblib.load(model_path)
+
+
+if __name__ == "__main__":
+    # Konversi: python -m model.forest models/mining_simulation_rf.pkl models/shipping_simulation_rf.pkl
+    import sys
+
+    for path in sys.argv[1:]:
+        model = load_pickled_model(path)
+        forest = CompiledForest.from_sklearn(model)
+        forest.save(compiled_path(path))
+        print(f"{path} -> {compiled_path(path)} ({forest.n_estimators} trees, "
+              f"{len(forest.value)} nodes, {forest.nbytes / 1e6:.2f} MB)")
@@ -0,0 +1,282 @@
+import os
+import pickle
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model.forest import QUANTILES, predict_distribution
+
+# Dua titik per hari: tengah malam (week_start dari tanggal eksplisit) dan
+# siang (week_start = datetime.today(), jam berapa pun); departure_date bertipe
+# tanggal, jadi jam selain 00:00 selalu menghasilkan window yang sama.
+DAY_OFFSETS = (pd.Timedelta(0), pd.Timedelta(hours=12))
+
+
+class OutlookTable:
+    """Hasil satu build: window [lo, hi) -> (fitur mingguan, distribusi prediksi)."""
+
+    def __init__(self, store, model, anchor: pd.Timestamp, horizon_weeks: int,
+                 entries: Dict[Tuple[int, int], Tuple[Dict[str, float], Optional[Dict[str, Any]]]],
+                 data_version: int, model_version: int):
+        self.store = store
+        self.model = model
+        self.anchor = anchor
+        self.horizon_weeks = horizon_weeks
+        self.entries = entries
+        self.data_version = data_version
+        self.model_version = model_version
+
+
+class WeeklyOutlook:
+    """
+    Tabel in-memory fitur mingguan + prediksi RF untuk N minggu ke depan.
+
+    Pertanyaan "prediksi minggu depan" selalu jatuh di beberapa minggu ke depan,
+    jadi make_week_features + inference per request hanya mengulang hitungan yang
+    sama. Tabel dibangun sekali (satu batch predict untuk semua window unik di
+    horizon) saat start, dan dibangun ulang di thread background setiap data
+    bertambah (append_data), model diganti (set_model) atau tanggal berganti.
+    run_mining_simulation tinggal lookup lalu menghitung pencapaian, peluang
+    target dan rule di atas hasilnya.
+
+    Key tabel adalah window [lo, hi) dari feature_store yang dipakai saat build,
+    sama dengan simulation_key. Tabel hanya dipakai jika feature_store dan model
+    calculator masih objek yang sama dengan saat build; selain itu lookup miss
+    (hitung biasa) dan build ulang dijadwalkan.
+
+    persist_path (opsional): tabel ditulis ke pickle setelah build dan dipakai
+    saat start jika data sama (jumlah baris + departure_date terakhir, seperti
+    TableSnapshot) dan model memberi output per-tree identik untuk satu row probe.
+
+    anchor: awal horizon tetap (mis. untuk benchmark di data historis); None = hari ini.
+    """
+
+    def __init__(self, calculator, horizon_weeks: int = 8, check_interval_seconds: float = 60.0,
+                 persist_path: Optional[str] = None, anchor: Optional[datetime] = None):
+        self.calculator = calculator
+        self.horizon_weeks = horizon_weeks
+        self.anchor = pd.Timestamp(anchor).normalize() if anchor is not None else None
+        self.check_interval_seconds = check_interval_seconds
+        self.persist_path = persist_path
+
+        self._table: Optional[OutlookTable] = None
+        self._build_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Metrics
+        self.builds = 0
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_build_at = None
+        self.last_build_ms = 0.0
+
+    # BUILD
+    # ==========================
+    def week_starts(self, anchor: pd.Timestamp):
+        """Semua week_start yang mungkin diminta dalam horizon (per hari, dua titik)."""
+        for day in range(self.horizon_weeks * 7):
+            for offset in DAY_OFFSETS:
+                yield anchor + pd.Timedelta(days=day) + offset
+
+    def current_anchor(self) -> pd.Timestamp:
+        return self.anchor if self.anchor is not None else pd.Timestamp.today().normalize()
+
+    def is_current(self, table: Optional[OutlookTable]) -> bool:
+        calc = self.calculator
+        return (table is not None and table.store is calc.feature_store and table.model is calc.model
+                and table.anchor == self.current_anchor())
+
+    def build(self) -> OutlookTable:
+        """Hitung tabel untuk horizon mulai current_anchor() tanpa mempublikasikannya."""
+        calc = self.calculator
+        # Versi dibaca sebelum store/model: jika berubah di tengah build, tabel
+        # memegang objek lama dan is_current langsung false
+        data_version, model_version = calc.data_version, calc.model_version
+        store, model = calc.feature_store, calc.model
+        if store is None:
+            raise ValueError("feature_store tidak tersedia.")
+        anchor = self.current_anchor()
+
+        windows = {}
+        for ws in self.week_starts(anchor):
+            windows.setdefault(store.window_bounds(ws), ws)
+        keys = list(windows)
+        feats = [store.week_features(windows[key]) for key in keys]
+
+        dists = [None] * len(keys)
+        if model is not None and keys:
+            X = np.array([[f[name] for name in calc.features] for f in feats], dtype=np.float64)
+            dists = distribution_rows(*predict_distribution(model, X))
+        entries = dict(zip(keys, zip(feats, dists)))
+        return OutlookTable(store, model, anchor, self.horizon_weeks, entries, data_version, model_version)
+
+    def rebuild(self, force: bool = False) -> bool:
+        """Build + publish jika tabel sudah tidak berlaku (atau force). Return True jika tabel baru terpasang."""
+        with self._build_lock:
+            if not force and self.is_current(self._table):
+                return False
+            started = time.perf_counter()
+            try:
+                table = self.build()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Warning: Build weekly outlook gagal ({str(e)}).")
+                return False
+            self._table = table
+            self.builds += 1
+            self.last_build_at = time.time()
+            self.last_build_ms = (time.perf_counter() - started) * 1000.0
+        if self.persist_path:
+            try:
+                self.save(table)
+            except Exception as e:
+                print(f"Warning: Simpan weekly outlook gagal ({str(e)}).")
+        return True
+
+    def request_rebuild(self):
+        """Jadwalkan build ulang di thread background (beberapa sinyal digabung jadi satu build)."""
+        self._wake.set()
+
+    # LOOKUP
+    # ==========================
+    def lookup(self, week_start: datetime) -> Optional[Tuple[Dict[str, float], Optional[Dict[str, Any]]]]:
+        """(fitur, distribusi prediksi) untuk week_start, atau None jika tidak ada di tabel yang berlaku."""
+        table = self._table  # satu referensi: aman walau rebuild menukar tabel
+        if not self.is_current(table):
+            self.stale += 1
+            self.request_rebuild()
+            return None
+        entry = table.entries.get(table.store.window_bounds(week_start))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        feats, dist = entry
+        return dict(feats), (dict(dist) if dist is not None else None)
+
+    # PERSISTENCE
+    # ==========================
+    def data_fingerprint(self, store) -> Dict[str, Any]:
+        return {"rows": len(store), "last_date": str(store.dates[-1]) if len(store) else None}
+
+    def save(self, table: OutlookTable):
+        """Tulis tabel ke persist_path (atomik via os.replace)."""
+        probe = None
+        if table.model is not None and table.entries:
+            key = next(iter(table.entries))
+            feats, dist = table.entries[key]
+            probe = {"row": [feats[f] for f in self.calculator.features], "trees": dist["trees"], "mean": dist["mean"]}
+        payload = {
+            "data": self.data_fingerprint(table.store),
+            "anchor": table.anchor,
+            "horizon_weeks": table.horizon_weeks,
+            "has_model": table.model is not None,
+            "probe": probe,
+            "entries": table.entries,
+        }
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.persist_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.persist_path)
+
+    def load(self) -> bool:
+        """Pasang tabel dari persist_path jika masih cocok dengan data, model dan tanggal sekarang."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return False
+        calc = self.calculator
+        data_version, model_version = calc.data_version, calc.model_version
+        store, model = calc.feature_store, calc.model
+        try:
+            with open(self.persist_path, "rb") as f:
+                payload = pickle.load(f)
+            anchor = self.current_anchor()
+            if (store is None or payload["data"] != self.data_fingerprint(store) or payload["anchor"] != anchor
+                    or payload["horizon_weeks"] != self.horizon_weeks or payload["has_model"] != (model is not None)):
+                return False
+            probe = payload["probe"]
+            if probe is not None:
+                mean, _, trees = predict_distribution(model, np.asarray([probe["row"]], dtype=np.float64))
+                if float(mean[0]) != probe["mean"] or not np.array_equal(
+                        trees[0] if trees is not None else None, probe["trees"]):
+                    return False
+        except Exception as e:
+            print(f"Warning: Load weekly outlook gagal ({str(e)}).")
+            return False
+        with self._build_lock:
+            self._table = OutlookTable(store, model, anchor, self.horizon_weeks, payload["entries"],
+                                       data_version, model_version)
+            self.loads += 1
+        return True
+
+    # BACKGROUND
+    # ==========================
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.check_interval_seconds)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.rebuild()
+
+    def start(self):
+        """Build awal (atau load dari persist_path) secara sinkron, lalu thread rebuild di background."""
+        if not self.load():
+            self.rebuild(force=True)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weekly-outlook", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        table = self._table
+        return {
+            "entries": len(table.entries) if table else 0,
+            "anchor": table.anchor.date().isoformat() if table else None,
+            "horizon_weeks": self.horizon_weeks,
+            "current": self.is_current(table),
+            "data_version": table.data_version if table else None,
+            "model_version": table.model_version if table else None,
+            "builds": self.builds,
+            "loads": self.loads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_build_at": self.last_build_at,
+            "last_build_ms": self.last_build_ms
+        }
+
+
+def distribution_rows(means, quantiles, trees):
+    """Hasil predict_distribution batch -> list dict per row, format sama dengan MicroBatcher."""
+    rows = []
+    for i in range(len(means)):
+        row = {"mean": float(means[i]), "trees": None}
+        if trees is not None:
+            row["trees"] = np.array(trees[i])
+            row["trees"].flags.writeable = False
+        for q, name in enumerate(f"p{p}" for p in QUANTILES):
+            row[name] = float(quantiles[i, q]) if quantiles is not None else None
+        rows.append(row)
+    return rows
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from model.forest import compiled_meta_path, compiled_path, load_model
+
+
+class ModelEntry:
+    """Satu model terdaftar: path, validasi, callback aktivasi, dan status versi aktif."""
+
+    def __init__(self, name: str, path: str, n_features: int,
+                 activate: Callable[[Any], None], validate: Callable[[Any], None] = None,
+                 feature_names: Optional[List[str]] = None):
+        self.name = name
+        self.path = path
+        self.n_features = n_features
+        self.feature_names = feature_names
+        self.activate = activate
+        self.validate = validate
+
+        self.version = None
+        self.fingerprint = None
+        self.loaded_at = None
+        self.load_ms = None
+        self.warm_ms = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.failed_fingerprint = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms,
+            "warm_ms": self.warm_ms,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class ModelRegistry:
+    """
+    Registry model mining/shipping dengan reload tanpa downtime.
+
+    Thread background memeriksa models/ setiap poll_seconds: versi diambil dari
+    manifest (models/manifest.json, {"models": {"<nama>": {"version", "path"}}}) jika ada,
+    jika tidak dari mtime + ukuran pickle dan artefak compiled-nya. Saat versi
+    berubah, model baru di-load, divalidasi (jumlah fitur + validasi tambahan),
+    dipanaskan dengan satu prediksi, lalu diaktifkan lewat callback activate.
+    Model lama tetap melayani request selama proses itu; jika gagal, model lama
+    tetap aktif dan versi yang gagal tidak dicoba ulang sampai file berubah lagi.
+    """
+
+    def __init__(self, manifest_path: Optional[str] = None, poll_seconds: float = 30.0):
+        self.manifest_path = manifest_path
+        self.poll_seconds = poll_seconds
+        self.entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, path: str, n_features: int,
+                 activate: Callable[[Any], None], validate: Callable[[Any], None] = None,
+                 feature_names: Optional[List[str]] = None) -> ModelEntry:
+        entry = ModelEntry(name, path, n_features, activate, validate, feature_names)
+        self.entries[name] = entry
+        return entry
+
+    # VERSIONING
+    # ==========================
+    def _manifest(self) -> Dict[str, Any]:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f).get("models", {})
+        except (OSError, ValueError):
+            return {}
+
+    def resolve(self, entry: ModelEntry, manifest: Dict[str, Any]):
+        """(path, versi, fingerprint) model saat ini di disk; path None jika file tidak ada."""
+        info = manifest.get(entry.name)
+        path = entry.path
+        if info and info.get("path"):
+            path = info["path"]
+            if not os.path.isabs(path):
+                path = os.path.join(os.path.dirname(os.path.abspath(self.manifest_path)), path)
+        if not os.path.exists(path):
+            return None, None, None
+        stamps = [path, compiled_meta_path(compiled_path(path))]
+        fingerprint = tuple(
+            (os.path.getmtime(p), os.path.getsize(p)) if os.path.exists(p) else None for p in stamps
+        )
+        if info and info.get("version"):
+            version = str(info["version"])
+            fingerprint = (version,) + fingerprint
+        else:
+            version = f"mtime-{int(fingerprint[0][0])}"
+        return path, version, fingerprint
+
+    # LOAD + SWAP
+    # ==========================
+    def _load(self, entry: ModelEntry, path: str):
+        started = time.perf_counter()
+        model = load_model(path)
+        load_ms = (time.perf_counter() - started) * 1000.0
+
+        n_features = getattr(model, "n_features_in_", entry.n_features)
+        if n_features != entry.n_features:
+            raise ValueError(f"model butuh {n_features} fitur, aplikasi mengirim {entry.n_features}")
+        if entry.validate is not None:
+            entry.validate(model)
+
+        # Warm-up: satu prediksi (memicu page-in mmap + cek output valid) sebelum dipakai request
+        started = time.perf_counter()
+        X = np.zeros((1, entry.n_features))
+        if entry.feature_names is not None:
+            X = pd.DataFrame(X, columns=entry.feature_names)
+        output = np.asarray(model.predict(X), dtype=np.float64)
+        if output.shape != (1,) or not np.isfinite(output).all():
+            raise ValueError(f"prediksi warm-up tidak valid: {output!r}")
+        warm_ms = (time.perf_counter() - started) * 1000.0
+        return model, load_ms, warm_ms
+
+    def prepare_entry(self, entry: ModelEntry, manifest: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """
+        Load + validasi + warm-up model jika versinya berubah, tanpa mengaktifkannya.
+        None jika tidak ada versi baru atau load gagal. Aman dijalankan paralel
+        (satu thread per model) karena tidak menyentuh model aktif.
+        """
+        path, version, fingerprint = self.resolve(entry, self._manifest() if manifest is None else manifest)
+        if path is None or fingerprint in (entry.fingerprint, entry.failed_fingerprint):
+            return None
+        try:
+            model, load_ms, warm_ms = self._load(entry, path)
+        except Exception as e:
+            entry.failures += 1
+            entry.last_error = str(e)
+            entry.failed_fingerprint = fingerprint
+            print(f"Warning: Model {entry.name} versi {version} gagal load ({str(e)}). Model aktif tidak diubah.")
+            return None
+        return {"model": model, "path": path, "version": version, "fingerprint": fingerprint,
+                "load_ms": load_ms, "warm_ms": warm_ms}
+
+    def activate_entry(self, entry: ModelEntry, prepared: Optional[Dict[str, Any]]) -> bool:
+        """Aktifkan hasil prepare_entry. True jika model baru diaktifkan."""
+        if prepared is None:
+            return False
+        with self._lock:
+            entry.activate(prepared["model"])
+            if entry.fingerprint is not None:
+                entry.reloads += 1
+            entry.path, entry.version, entry.fingerprint = prepared["path"], prepared["version"], prepared["fingerprint"]
+            entry.loaded_at = time.time()
+            entry.load_ms, entry.warm_ms = prepared["load_ms"], prepared["warm_ms"]
+            entry.last_error = None
+        return True
+
+    def check_entry(self, entry: ModelEntry, manifest: Dict[str, Any] = None) -> bool:
+        """Load + aktifkan model jika versinya berubah. True jika model baru diaktifkan."""
+        return self.activate_entry(entry, self.prepare_entry(entry, manifest))
+
+    def check_once(self) -> Dict[str, bool]:
+        manifest = self._manifest()
+        return {name: self.check_entry(entry, manifest) for name, entry in self.entries.items()}
+
+    # BACKGROUND WATCHER
+    # ==========================
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.check_once()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: entry.stats() for name, entry in self.entries.items()}
@@ -1,22 +1,494 @@
 # rules.py
+import json
+import logging
+import os
+import string
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-def apply_general_rules(features):
+import operator
+
+import numpy as np
+
+# TABEL RULE
+# ==========================
+# Satu tabel = list grup. Grup dievaluasi berurutan seperti rantai if/elif/else:
+# case pertama yang kondisinya terpenuhi menang; case tanpa "all"/"any" adalah
+# else. Grup tanpa else boleh tidak menghasilkan apa-apa untuk suatu row.
+# - "all": semua klausa benar (AND), "any": minimal satu benar (OR)
+# - klausa: [fitur, op, nilai] atau [fitur, "notnull"]; nilai berupa angka,
+#   nama fitur lain, atau "$param" (parameter evaluasi; None = kondisi False)
+# - perbandingan dengan NaN selalu False (sama dengan if/else Python)
+# - "recommendation"/"justification" boleh memakai {fitur:format}
+# - "label" opsional, mis. risk_level untuk shipping
+# Tabel bisa ditimpa lewat file JSON (lihat RuleBook), format sama.
+
+MINING_RULES = [
+    {"name": "cuaca", "cases": [
+        {"all": [["weather_factor", ">", 70]],
+         "recommendation": "Cuaca sangat berat (angin/gelombang/hujan tinggi) → risiko operasional meningkat, siapkan mitigasi.",
+         "justification": "Weather factor tinggi sehingga berpotensi menghambat operasi."},
+        {"all": [["weather_factor", ">", 40]],
+         "recommendation": "Cuaca cukup berpengaruh minggu ini → potensi keterlambatan 5–10%.",
+         "justification": "Kondisi cuaca cukup menekan performa logistik."},
+        {"recommendation": "Kondisi cuaca relatif aman untuk operasi minggu ini.",
+         "justification": "Cuaca mendukung sehingga operasi dapat berjalan optimal."},
+    ]},
+    {"name": "kelaikan_armada", "cases": [
+        {"all": [["fleet_health_index", "<", 0.6]],
+         "recommendation": "Kesehatan armada rendah → kecepatan kapal rata-rata drop signifikan, perlu maintenance.",
+         "justification": "Fleet health rendah yang dapat menurunkan kecepatan kapal."},
+        {"all": [["fleet_health_index", "<", 0.8]],
+         "recommendation": "Performa armada menurun → cek jadwal maintenance dan kapasitas kapal.",
+         "justification": "Fleet health menurun sehingga efisiensi kapal berkurang."},
+        {"recommendation": "Status armada sehat → performa mendukung target minggu ini.",
+         "justification": "Armada dalam kondisi optimal untuk produksi."},
+    ]},
+    {"name": "cuaca_ekstrem", "cases": [
+        {"all": [["is_extreme", ">", 0.3]],
+         "recommendation": "Cuaca ekstrem sering terjadi → evaluasi jadwal kapal dan slot bongkar.",
+         "justification": "Frekuensi cuaca ekstrem cukup tinggi."},
+    ]},
+    {"name": "load_ratio", "cases": [
+        {"all": [["load_ratio", ">", 1.15]],
+         "recommendation": "Load ratio tinggi → risiko over-utilization armada.",
+         "justification": "Load ratio di atas normal sehingga risiko overload meningkat."},
+    ]},
+    # Peluang mencapai target (output per-tree) jika $target_probability_threshold diisi,
+    # selain itu ambang pencapaian 85%
+    {"name": "target", "cases": [
+        {"all": [["target_probability", "<", "$target_probability_threshold"]],
+         "recommendation": "Peluang mencapai target {target_probability_pct:.0f}% (pencapaian diperkirakan {achievement_pct:.1f}%) → target berisiko tidak tercapai.",
+         "justification": "Kurang dari {target_probability_threshold_pct:.0f}% tree model memprediksi produksi memenuhi target."},
+        {"all": [["target_probability", "notnull"], ["target_probability_threshold", "notnull"]],
+         "recommendation": "Peluang mencapai target {target_probability_pct:.0f}% (pencapaian diperkirakan {achievement_pct:.1f}%) → target realistis.",
+         "justification": "Mayoritas tree model memprediksi produksi memenuhi atau melampaui target minggu ini."},
+        {"all": [["achievement_pct", "<", 85]],
+         "recommendation": "Pencapaian diperkirakan {achievement_pct:.1f}% → target berisiko tidak tercapai.",
+         "justification": "Prediksi produksi di bawah 85% dari target."},
+        {"recommendation": "Pencapaian diperkirakan {achievement_pct:.1f}% → target realistis.",
+         "justification": "Prediksi produksi memenuhi atau melampaui target minggu ini."},
+    ]},
+]
+
+SHIPPING_RULES = [
+    {"name": "risk", "cases": [
+        {"any": [["wave_height_m", ">", 2], ["wind_speed_kmh", ">", 30]], "label": "High",
+         "recommendation": "Cuaca berat → gelombang & angin tinggi, jadwal kapal berpotensi terganggu.",
+         "justification": "Risk level High (gelombang >2 m, angin >30 km/h)."},
+        {"any": [["wave_height_m", ">", 1], ["wind_speed_kmh", ">", 20]], "label": "Medium",
+         "recommendation": "Cuaca cukup berpengaruh → pertimbangkan buffer waktu keberangkatan.",
+         "justification": "Risk level Medium (gelombang >1 m)."},
+        {"label": "Low",
+         "recommendation": "Cuaca aman → operasional normal.",
+         "justification": "Risk level Low (gelombang & angin normal)."},
+    ]},
+    {"name": "speed", "cases": [
+        {"all": [["speed_ratio", "<", 0.8]], "label": "Slow",
+         "recommendation": "Kecepatan kapal rendah → evaluasi rute/maintenance.",
+         "justification": "Aktual speed < 80% baseline."},
+        {"all": [["speed_ratio", ">", 1.2]], "label": "Fast",
+         "recommendation": "Kecepatan kapal tinggi → percepatan jadwal kedatangan.",
+         "justification": "Aktual speed > 120% baseline."},
+        {"label": "Normal",
+         "recommendation": "Kecepatan kapal normal → estimasi kedatangan sesuai standar.",
+         "justification": "Aktual speed dalam kisaran normal (80–120%)."},
+    ]},
+    {"name": "delay", "cases": [
+        {"all": [["delay_hours", ">", 2]],
+         "recommendation": "Perkiraan delay {delay_hours:.1f} jam → siapkan notifikasi pelabuhan.",
+         "justification": "Selisih signifikan antara estimated arrival awal dan baru."},
+        {"all": [["delay_hours", ">", 0]],
+         "recommendation": "Perkiraan delay ringan {delay_hours:.1f} jam → tetap dipantau.",
+         "justification": "Delay minor terdeteksi."},
+        {"recommendation": "Tidak ada delay → jadwal tetap on time.",
+         "justification": "Arrival estimate tidak berubah."},
+    ]},
+]
+
+# Rules tambahan yang bersifat knowledge-base (fitur agregat avg_wind, avg_wave, ...)
+GENERAL_RULES = [
+    {"name": "angin", "cases": [
+        {"all": [["avg_wind", ">", 45]],
+         "recommendation": "Kecepatan angin tinggi → potensi gangguan stabilitas kapal."},
+    ]},
+    {"name": "gelombang", "cases": [
+        {"all": [["avg_wave", ">", 3]],
+         "recommendation": "Tinggi gelombang di atas 3 meter → aktivitas bongkar muat berisiko."},
+    ]},
+    {"name": "hujan", "cases": [
+        {"all": [["avg_rainfall", ">", 80]],
+         "recommendation": "Curah hujan sangat tinggi → potensi delay operasional."},
+    ]},
+    {"name": "shipment", "cases": [
+        {"all": [["shipments", "<", 3]],
+         "recommendation": "Jumlah shipment rendah → periksa distribusi dan jadwal kapal."},
+    ]},
+]
+
+DEFAULT_RULES = {"mining": MINING_RULES, "shipping": SHIPPING_RULES, "general": GENERAL_RULES}
+
+
+# FITUR TURUNAN
+# ==========================
+# nama -> (kolom yang dibutuhkan, fn(kolom, params) -> array). Hanya dihitung jika
+# dipakai tabel dan tidak diberikan langsung oleh pemanggil.
+def _speed_ratio(cols, params, positive_only: bool):
+    actual, base = cols["actual_speed"], cols["base_speed"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = actual / base
+    # fleet_health_index: base_speed <= 0 -> 1.0; speed_ratio: base_speed == 0 -> 1.0 (status Normal)
+    return np.where(base > 0 if positive_only else base != 0, ratio, 1.0)
+
+
+def _param_column(cols, params, name: str, scale: float = 1.0):
+    n = len(next(iter(cols.values()))) if cols else 1
+    value = params.get(name)
+    return np.full(n, np.nan if value is None else value * scale, dtype=np.float64)
+
+
+DERIVED_FEATURES: Dict[str, Tuple[List[str], Callable]] = {
+    "fleet_health_index": (["actual_speed", "base_speed"], lambda c, p: _speed_ratio(c, p, True)),
+    "speed_ratio": (["actual_speed", "base_speed"], lambda c, p: _speed_ratio(c, p, False)),
+    "target_probability_pct": (["target_probability"], lambda c, p: c["target_probability"] * 100),
+    "target_probability_threshold": ([], lambda c, p: _param_column(c, p, "target_probability_threshold")),
+    "target_probability_threshold_pct": ([], lambda c, p: _param_column(c, p, "target_probability_threshold", 100)),
+}
+
+_OPS = {
+    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+# Versi scalar untuk evaluate_one (semantik NaN sama: perbandingan selalu False)
+_SCALAR_OPS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+    "==": operator.eq, "!=": operator.ne,
+}
+
+
+class _Case:
+    __slots__ = ("all", "any", "recommendation", "justification", "label", "fields")
+
+    def __init__(self, spec: Dict[str, Any], where: str):
+        self.all = [_compile_clause(c, where) for c in spec.get("all", [])]
+        self.any = [_compile_clause(c, where) for c in spec.get("any", [])]
+        self.recommendation = spec.get("recommendation")
+        self.justification = spec.get("justification")
+        self.label = spec.get("label")
+        self.fields = set()
+        for text in (self.recommendation, self.justification):
+            if text:
+                self.fields.update(name for _, name, _, _ in string.Formatter().parse(text) if name)
+
+    @property
+    def is_default(self) -> bool:
+        return not self.all and not self.any
+
+
+def _compile_clause(clause, where: str):
+    if not isinstance(clause, (list, tuple)) or len(clause) not in (2, 3) or not isinstance(clause[0], str):
+        raise ValueError(f"{where}: klausa tidak valid {clause!r}")
+    if len(clause) == 2:
+        if clause[1] != "notnull":
+            raise ValueError(f"{where}: operator unary tidak dikenal {clause[1]!r}")
+        return clause[0], "notnull", None
+    feature, op, value = clause
+    if op not in _OPS:
+        raise ValueError(f"{where}: operator tidak dikenal {op!r}")
+    if not isinstance(value, (int, float, str)) or isinstance(value, bool):
+        raise ValueError(f"{where}: nilai pembanding tidak valid {value!r}")
+    return feature, op, value
+
+
+class RuleSet:
     """
-    Rules tambahan yang bersifat knowledge-base.
+    Tabel rule yang sudah di-compile. evaluate() menghitung semua grup untuk
+    banyak row sekaligus dengan mask NumPy; teks rekomendasi baru di-format
+    per row saat diakses (lihat RuleResult).
+    """
+
+    def __init__(self, groups: List[Dict[str, Any]], name: str = "rules"):
+        self.name = name
+        self.group_names: List[str] = []
+        self.groups: List[List[_Case]] = []
+        for g, group in enumerate(groups):
+            group_name = group.get("name", f"group_{g}")
+            cases = [_Case(spec, f"{name}.{group_name}[{i}]") for i, spec in enumerate(group.get("cases", []))]
+            if not cases:
+                raise ValueError(f"{name}.{group_name}: grup tanpa case")
+            self.group_names.append(group_name)
+            self.groups.append(cases)
+
+        # Fitur & parameter yang dibutuhkan tabel (untuk validasi input dan fitur turunan)
+        names, self.params = set(), set()
+        for cases in self.groups:
+            for case in cases:
+                names.update(case.fields)
+                for feature, op, value in case.all + case.any:
+                    names.add(feature)
+                    if isinstance(value, str):
+                        (self.params.add(value[1:]) if value.startswith("$") else names.add(value))
+        self.features = sorted(names)
+        self.inputs = set(names).union(*(DERIVED_FEATURES[f][0] for f in names if f in DERIVED_FEATURES))
+
+    def _columns(self, columns: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        cols = {k: np.asarray(columns[k], dtype=np.float64) for k in self.inputs if k in columns}
+        for name in self.features:
+            if name in cols:
+                continue
+            if name not in DERIVED_FEATURES:
+                raise KeyError(f"{self.name}: fitur '{name}' tidak tersedia")
+            deps, fn = DERIVED_FEATURES[name]
+            missing = [d for d in deps if d not in cols]
+            if missing:
+                raise KeyError(f"{self.name}: fitur {missing} dibutuhkan untuk '{name}'")
+            cols[name] = fn(cols, params)
+        return cols
+
+    def _mask(self, clause, cols, params, n: int) -> np.ndarray:
+        feature, op, value = clause
+        left = cols[feature]
+        if op == "notnull":
+            return ~np.isnan(left)
+        if isinstance(value, str):
+            if value.startswith("$"):
+                value = params.get(value[1:])
+                if value is None:
+                    return np.zeros(n, dtype=bool)
+            else:
+                value = cols[value]
+        return _OPS[op](left, value)
+
+    def evaluate(self, columns: Dict[str, Any], params: Dict[str, Any] = None) -> "RuleResult":
+        """
+        columns: nama fitur -> array (atau DataFrame), satu elemen per row.
+        Return RuleResult dengan index case yang menang per grup per row (-1 = tidak ada).
+        """
+        params = params or {}
+        cols = self._columns(columns, params)
+        n = len(next(iter(cols.values()))) if cols else 0
+        codes = np.full((len(self.groups), n), -1, dtype=np.int16)
+        for g, cases in enumerate(self.groups):
+            open_rows = np.ones(n, dtype=bool)
+            for i, case in enumerate(cases):
+                mask = open_rows.copy()
+                for clause in case.all:
+                    mask &= self._mask(clause, cols, params, n)
+                if case.any:
+                    any_mask = np.zeros(n, dtype=bool)
+                    for clause in case.any:
+                        any_mask |= self._mask(clause, cols, params, n)
+                    mask &= any_mask
+                codes[g][mask] = i
+                open_rows &= ~mask
+                if not open_rows.any():
+                    break
+        return RuleResult(self, codes, cols)
+
+    def _test(self, clause, values, params) -> bool:
+        feature, op, value = clause
+        left = values[feature]
+        if op == "notnull":
+            return left == left
+        if isinstance(value, str):
+            if value.startswith("$"):
+                value = params.get(value[1:])
+                if value is None:
+                    return False
+            else:
+                value = values[value]
+        return _SCALAR_OPS[op](left, value)
+
+    def evaluate_one(self, features: Dict[str, Any], params: Dict[str, Any] = None):
+        """
+        Satu dict fitur (simulasi tunggal): return (rekomendasi, justifikasi,
+        label per grup). Tabel dan semantik sama dengan evaluate, tanpa overhead
+        array NumPy per klausa.
+        """
+        params = params or {}
+        values = {k: float("nan") if features[k] is None else float(features[k]) for k in self.inputs if k in features}
+        for name in self.features:
+            if name not in values:
+                if name not in DERIVED_FEATURES:
+                    raise KeyError(f"{self.name}: fitur '{name}' tidak tersedia")
+                deps, fn = DERIVED_FEATURES[name]
+                cols = {d: np.array([values[d]]) for d in deps}
+                values[name] = float(fn(cols, params)[0])
+        recs, justifications, labels = [], [], {}
+        for group_name, cases in zip(self.group_names, self.groups):
+            for case in cases:
+                if all(self._test(c, values, params) for c in case.all) and \
+                        (not case.any or any(self._test(c, values, params) for c in case.any)):
+                    context = {f: values[f] for f in case.fields}
+                    if case.recommendation:
+                        recs.append(case.recommendation.format(**context) if case.fields else case.recommendation)
+                    if case.justification:
+                        justifications.append(case.justification.format(**context) if case.fields else case.justification)
+                    labels[group_name] = case.label
+                    break
+        return recs, justifications, labels
+
+
+class RuleResult:
+    """Hasil RuleSet.evaluate: codes[g, row] = index case grup g yang menang (-1 = tidak ada)."""
+
+    def __init__(self, ruleset: RuleSet, codes: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.ruleset = ruleset
+        self.codes = codes
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return self.codes.shape[1]
+
+    def group_codes(self, group: str) -> np.ndarray:
+        return self.codes[self.ruleset.group_names.index(group)]
+
+    def labels(self, group: str) -> np.ndarray:
+        """Label case yang menang per row (None jika tidak ada / case tanpa label)."""
+        cases = self.ruleset.groups[self.ruleset.group_names.index(group)]
+        table = np.array([case.label for case in cases] + [None], dtype=object)
+        return table[self.group_codes(group)]  # -1 -> elemen terakhir (None)
+
+    def label_codes(self, group: str, label_table) -> np.ndarray:
+        """Label per row sebagai index ke label_table (int8); label tidak dikenal / None -> 0."""
+        index = {label: i for i, label in enumerate(label_table)}
+        cases = self.ruleset.groups[self.ruleset.group_names.index(group)]
+        table = np.array([index.get(case.label, 0) for case in cases] + [0], dtype=np.int8)
+        return table[self.group_codes(group)]
+
+    def counts(self) -> Dict[str, List[int]]:
+        """Jumlah row per case untuk setiap grup (ringkasan fleet-wide tanpa format teks)."""
+        return {
+            name: np.bincount(self.codes[g][self.codes[g] >= 0], minlength=len(cases)).tolist()
+            for g, (name, cases) in enumerate(zip(self.ruleset.group_names, self.ruleset.groups))
+        }
+
+    def row(self, i: int) -> Tuple[List[str], List[str]]:
+        """(rekomendasi, justifikasi) row ke-i, urut sesuai grup."""
+        recs, justifications = [], []
+        for g, cases in enumerate(self.ruleset.groups):
+            code = self.codes[g, i]
+            if code < 0:
+                continue
+            case = cases[code]
+            context = {f: float(self.columns[f][i]) for f in case.fields}
+            if case.recommendation:
+                recs.append(case.recommendation.format(**context) if case.fields else case.recommendation)
+            if case.justification:
+                justifications.append(case.justification.format(**context) if case.fields else case.justification)
+        return recs, justifications
+
+    def recommendations(self) -> List[List[str]]:
+        return [self.row(i)[0] for i in range(len(self))]
+
+
+# RELOAD
+# ==========================
+class RuleBook:
+    """
+    Tabel rule aktif (mining, shipping, general) yang bisa diganti tanpa redeploy.
+
+    Jika path ada, file JSON ({"mining": [...], "shipping": [...], ...}) dibaca
+    dan tabel di dalamnya menimpa default; tabel yang tidak ada di file tetap
+    default. refresh() memeriksa mtime + ukuran file paling sering setiap
+    check_interval_seconds. File yang tidak valid tidak mengganti rule aktif
+    (error dicatat di stats) dan tidak dicoba ulang sampai file berubah lagi.
+    version naik setiap kali rule aktif berganti.
     """
 
-    recs = []
+    def __init__(self, path: Optional[str] = None, check_interval_seconds: float = 5.0,
+                 defaults: Dict[str, List[Dict[str, Any]]] = None):
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self.defaults = defaults or DEFAULT_RULES
+        self.rulesets = {name: RuleSet(groups, name) for name, groups in self.defaults.items()}
+        self.version = 0
+        self.fingerprint = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def _fingerprint(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self, force: bool = False) -> int:
+        """Reload jika file berubah (rate-limited); return version aktif."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval_seconds:
+            return self.version
+        with self._lock:
+            self._checked_at = now
+            fingerprint = self._fingerprint()
+            if fingerprint == self.fingerprint:
+                return self.version
+            try:
+                tables = dict(self.defaults)
+                if fingerprint is not None:
+                    with open(self.path, encoding="utf-8") as f:
+                        tables.update(json.load(f))
+                rulesets = {name: RuleSet(groups, name) for name, groups in tables.items()}
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.fingerprint = fingerprint
+                logging.error(f"Rule file {self.path} tidak valid, rule lama tetap dipakai: {e}")
+                return self.version
+            self.rulesets = rulesets
+            if self.fingerprint is not None or fingerprint is not None:
+                self.version += 1
+                self.reloads += 1
+                logging.info(f"Rule di-load dari {self.path or 'default'} (versi {self.version}).")
+            self.fingerprint = fingerprint
+            self.loaded_at = time.time()
+            self.last_error = None
+            return self.version
+
+    def get(self, name: str) -> RuleSet:
+        self.refresh()
+        return self.rulesets[name]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "tables": {name: len(rs.groups) for name, rs in self.rulesets.items()},
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
 
-    if features['avg_wind'] > 45:
-        recs.append("Kecepatan angin tinggi → potensi gangguan stabilitas kapal.")
 
-    if features['avg_wave'] > 3:
-        recs.append("Tinggi gelombang di atas 3 meter → aktivitas bongkar muat berisiko.")
+_rule_book = None
+_rule_book_lock = threading.Lock()
 
-    if features['avg_rainfall'] > 80:
-        recs.append("Curah hujan sangat tinggi → potensi delay operasional.")
 
-    if features['shipments'] < 3:
-        recs.append("Jumlah shipment rendah → periksa distribusi dan jadwal kapal.")
+def get_rule_book() -> RuleBook:
+    """RuleBook default dari config.RULES_CONFIG, dibuat sekali per proses."""
+    global _rule_book
+    with _rule_book_lock:
+        if _rule_book is None:
+            from config import RULES_CONFIG
+            _rule_book = RuleBook(RULES_CONFIG.get('path'), RULES_CONFIG.get('check_interval_seconds', 5.0))
+    return _rule_book
 
+
+def apply_general_rules(features):
+    """
+    Rules tambahan yang bersifat knowledge-base.
+    """
+    recs, _, _ = get_rule_book().get("general").evaluate_one(features)
     return recs
+
+
+if __name__ == "__main__":
+    # Tulis tabel default sebagai titik awal file rule, mis. python -m model.rules > models/rules.json
+    print(json.dumps(DEFAULT_RULES, indent=2, ensure_ascii=False))
@@ -0,0 +1,161 @@
+import datetime
+import decimal
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# Kolom tanggal yang di-parse sekali saat snapshot ditulis (bukan di setiap start)
+DATETIME_COLUMNS = ["departure_date", "arrival_estimate", "arrival_estimate_new", "week_start"]
+
+
+def _column_kind(series: pd.Series) -> str:
+    if series.name in DATETIME_COLUMNS or pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return "datetime"
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        return "numeric"
+    values = series.dropna()
+    if len(values) and all(isinstance(v, (int, float, decimal.Decimal)) and not isinstance(v, bool) for v in values):
+        return "numeric"  # NUMERIC PostgreSQL datang sebagai Decimal
+    if len(values) and all(isinstance(v, (datetime.date, datetime.datetime)) for v in values):
+        return "datetime"
+    return "string"
+
+
+class TableSnapshot:
+    """
+    Snapshot kolumnar sebuah tabel DB: satu file .npy per kolom + meta.json.
+
+    Kolom numerik dan tanggal (sudah di-parse ke datetime64[ns]) di-load dengan
+    np.load(mmap_mode='c') sehingga page file dibagi antar worker uvicorn dan
+    tulisan (jika ada) hanya menyalin page yang diubah. Kolom teks disimpan
+    sebagai kode int32 + daftar kategori. Setiap versi ditulis ke direktori
+    sendiri lalu file CURRENT diganti secara atomik, jadi worker lain yang
+    sedang membaca tidak pernah melihat snapshot setengah jadi.
+
+    Snapshot dianggap basi jika fingerprint sumber (jumlah baris + max
+    departure_date) berbeda dengan yang tercatat saat ditulis.
+    """
+
+    def __init__(self, directory: str, table: str = "mining_clean2", version_column: str = "departure_date",
+                 keep_versions: int = 2):
+        self.directory = directory
+        self.table = table
+        self.version_column = version_column
+        self.keep_versions = keep_versions
+        self.last_load: Dict[str, Any] = {}
+
+    # SOURCE
+    # ==========================
+    def source_fingerprint(self, engine) -> Dict[str, Any]:
+        """Query ringan (COUNT + MAX) untuk mendeteksi perubahan tabel tanpa membaca semua baris."""
+        query = text(f"SELECT COUNT(*) AS row_count, MAX({self.version_column}) AS max_version FROM {self.table}")
+        with engine.connect() as conn:
+            row = conn.execute(query).mappings().first()
+        max_version = row["max_version"]
+        return {
+            "row_count": int(row["row_count"]),
+            "max_version": str(pd.Timestamp(max_version)) if max_version is not None else None
+        }
+
+    def read_source(self, engine) -> pd.DataFrame:
+        return pd.read_sql_query(f"SELECT * FROM {self.table};", engine)
+
+    # SNAPSHOT FILES
+    # ==========================
+    def _current_file(self) -> str:
+        return os.path.join(self.directory, "CURRENT")
+
+    def current_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._current_file()) as f:
+                version_dir = os.path.join(self.directory, f.read().strip())
+            with open(os.path.join(version_dir, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta["path"] = version_dir
+        return meta
+
+    def write(self, df: pd.DataFrame, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+        """Tulis df sebagai versi baru lalu jadikan CURRENT (atomik via os.replace)."""
+        version = datetime.datetime.now().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        version_dir = os.path.join(self.directory, version)
+        os.makedirs(version_dir)
+
+        columns: List[Dict[str, Any]] = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            kind = _column_kind(series)
+            entry = {"name": str(name), "kind": kind, "file": f"c{i}.npy"}
+            if kind == "datetime":
+                values = pd.to_datetime(series, errors="coerce").to_numpy(dtype="datetime64[ns]")
+            elif kind == "numeric":
+                values = series.to_numpy() if isinstance(series.dtype, np.dtype) and series.dtype != object \
+                    else pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                codes, categories = pd.factorize(series.astype(object), use_na_sentinel=True)
+                values = codes.astype(np.int32)
+                entry["categories"] = [str(c) for c in categories]
+            np.save(os.path.join(version_dir, entry["file"]), np.ascontiguousarray(values))
+            columns.append(entry)
+
+        meta = {
+            "table": self.table,
+            "version": version,
+            "source": fingerprint,
+            "row_count": len(df),
+            "columns": columns,
+        }
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        tmp = f"{self._current_file()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            f.write(version)
+        os.replace(tmp, self._current_file())
+        self._cleanup(keep=version)
+        meta["path"] = version_dir
+        return meta
+
+    def _cleanup(self, keep: str):
+        """Hapus versi lama (selain keep_versions terbaru); worker yang masih mmap tetap aman di POSIX."""
+        versions = sorted(
+            d for d in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, d)) and d != keep
+        )
+        for old in versions[:max(0, len(versions) - (self.keep_versions - 1))]:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+    def load(self, meta: Dict[str, Any] = None, mmap: bool = True) -> pd.DataFrame:
+        meta = meta or self.current_meta()
+        if meta is None:
+            raise FileNotFoundError(f"Belum ada snapshot {self.table} di {self.directory}")
+        data = {}
+        for entry in meta["columns"]:
+            values = np.load(os.path.join(meta["path"], entry["file"]), mmap_mode="c" if mmap else None)
+            if entry["kind"] == "string":
+                categories = np.asarray(entry["categories"] + [None], dtype=object)
+                values = categories[values]  # kode -1 (NULL) -> elemen terakhir (None)
+            data[entry["name"]] = values
+        return pd.DataFrame(data, copy=False)
+
+    def load_or_refresh(self, engine) -> pd.DataFrame:
+        """
+        Load snapshot jika fingerprint sumber masih sama; jika tidak, baca tabel
+        penuh dari DB sekali, tulis snapshot baru, lalu load dari snapshot itu.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fingerprint = self.source_fingerprint(engine)
+        meta = self.current_meta()
+        refreshed = meta is None or meta.get("source") != fingerprint
+        if refreshed:
+            meta = self.write(self.read_source(engine), fingerprint)
+        self.last_load = {"version": meta["version"], "row_count": meta["row_count"], "refreshed": refreshed}
+        return self.load(meta)
+
@@ -0,0 +1,213 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Bucket histogram latency (detik), dari cache hit (sub-ms) sampai panggilan LLM lambat
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus (bucket le, _sum, _count), thread-safe."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # elemen terakhir = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class HistogramFamily:
+    """Satu metric histogram dengan label (misalnya stage="llm")."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> Histogram:
+        return self.child(tuple(str(labels[name]) for name in self.labelnames))
+
+    def child(self, key: Tuple[str, ...]) -> Histogram:
+        """Histogram untuk nilai label berurutan sesuai labelnames (path cepat tanpa kwargs)."""
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(key, Histogram(self.buckets))
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, child in sorted(self.children.items()):
+            counts, total, count = child.snapshot()
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total!r}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """
+    Kumpulan metric yang dirender ke format teks Prometheus (GET /metrics).
+    collectors = fungsi tambahan yang mengembalikan baris metric siap pakai.
+    """
+
+    def __init__(self):
+        self.families: Dict[str, HistogramFamily] = {}
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> HistogramFamily:
+        if name not in self.families:
+            self.families[name] = HistogramFamily(name, help_text, labelnames, buckets)
+        return self.families[name]
+
+    def render(self) -> str:
+        lines = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram(
+    "chat_stage_duration_seconds", "Durasi tiap tahap pemrosesan pesan chat.", ["stage"]
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "chat_request_duration_seconds", "Durasi total pemrosesan pesan chat per tipe respons.", ["type"]
+)
+
+
+class _Span:
+    __slots__ = ("trace", "stage", "started")
+
+    def __init__(self, trace, stage):
+        self.trace = trace
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.record(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_current: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Timer per request: durasi tiap stage (detik, diakumulasi jika stage terulang).
+    Span dibuka eksplisit lewat trace.span(stage); kode yang lebih dalam
+    (calculator) memakai span(stage) modul ini, yang mencatat ke trace aktif
+    thread tersebut (diset oleh trace.run, misalnya di thread executor).
+    """
+
+    __slots__ = ("spans", "started")
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def span(self, stage: str):
+        return _Span(self, stage)
+
+    def record(self, stage: str, seconds: float):
+        """Catat durasi stage yang diukur manual (misalnya time-to-first-token stream)."""
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """Panggil fn dengan trace ini sebagai trace aktif (untuk span() di dalam fn)."""
+        token = _current.set(self)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def timings(self) -> Dict[str, float]:
+        """Durasi per stage + total, dalam ms (untuk field timings di respons)."""
+        timings = {f"{stage}_ms": seconds * 1000.0 for stage, seconds in self.spans.items()}
+        timings["total_ms"] = self.elapsed() * 1000.0
+        return timings
+
+    def finish(self, response_type: str):
+        """Masukkan semua stage + total request ke histogram global."""
+        for stage, seconds in self.spans.items():
+            STAGE_SECONDS.child((stage,)).observe(seconds)
+        REQUEST_SECONDS.child((response_type,)).observe(self.elapsed())
+
+
+class NullTrace:
+    """Trace no-op (tracing dimatikan): tidak mengukur apa pun."""
+
+    __slots__ = ()
+
+    def span(self, stage: str):
+        return _NULL_SPAN
+
+    def record(self, stage: str, seconds: float):
+        pass
+
+    def run(self, fn: Callable, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def timings(self) -> Dict[str, float]:
+        return {}
+
+    def finish(self, response_type: str):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def span(stage: str):
+    """Span pada trace aktif thread ini; no-op jika tidak ada trace aktif."""
+    trace = _current.get()
+    return _NULL_SPAN if trace is None else _Span(trace, stage)
+
@@ -0,0 +1,234 @@
+"""
+Training model mining + shipping dengan beberapa kandidat konfigurasi.
+
+Setiap kandidat RandomForestRegressor dilatih paralel (satu kandidat per core,
+seed tetap), lalu dievaluasi pada holdout yang sama: akurasi (MAE, R2),
+latency inference single-row dan batch lewat CompiledForest (jalur serving),
+serta ukuran model. Kandidat terpilih = akurasi terbaik di antara yang p99
+latency single-row-nya masuk budget; kandidat itu dilatih ulang pada seluruh
+data lalu ditulis ke models/ (pickle + artefak compiled) bersama manifest.json
+yang dibaca ModelRegistry.
+
+    python -m model.train --models mining shipping --latency-budget-ms 2
+"""
+import argparse
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import os
+import pickle
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from model.calculator import MINING_FEATURES
+from model.forest import CompiledForest, compiled_path
+from model.shipping_batch import SHIPPING_FEATURES, add_delay_hours
+
+# Definisi model: fitur, target, dan nama file output di models/
+MODEL_SPECS = {
+    "mining": {"features": MINING_FEATURES, "target": "cargo_volume_ton", "file": "mining_simulation_rf.pkl"},
+    "shipping": {"features": SHIPPING_FEATURES, "target": "delay_hours", "file": "shipping_simulation_rf.pkl"},
+}
+
+# Grid kandidat default (kombinasi penuh)
+DEFAULT_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 12, 8],
+    "min_samples_leaf": [1, 3],
+}
+
+
+def candidate_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def load_training_frame(data_path: str) -> pd.DataFrame:
+    df = pd.read_csv(data_path)
+    return add_delay_hours(df)
+
+
+def measure_latency(forest: CompiledForest, X: np.ndarray, repeat: int = 200, batch_size: int = 256) -> Dict[str, float]:
+    """Latency predict single-row (p50/p99, ms) dan throughput batch (rows/s) pada CompiledForest."""
+    rows = X[np.arange(repeat) % len(X)]
+    forest.predict(rows[:1])  # warm-up
+    single = []
+    for row in rows:
+        t0 = time.perf_counter()
+        forest.predict(row.reshape(1, -1))
+        single.append(time.perf_counter() - t0)
+    single = np.array(single) * 1000.0
+
+    batch = X[np.arange(batch_size) % len(X)]
+    t0 = time.perf_counter()
+    forest.predict(batch)
+    batch_s = time.perf_counter() - t0
+    return {
+        "single_p50_ms": float(np.percentile(single, 50)),
+        "single_p99_ms": float(np.percentile(single, 99)),
+        "batch_rows_per_s": float(batch_size / batch_s) if batch_s > 0 else float("inf"),
+    }
+
+
+def evaluate_candidate(params: Dict[str, Any], X_train, y_train, X_test, y_test, seed: int) -> Dict[str, Any]:
+    """Latih satu kandidat (single-thread; paralelisme ada di level kandidat) dan ukur metriknya."""
+    started = time.perf_counter()
+    model = RandomForestRegressor(random_state=seed, n_jobs=1, **params)
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - started
+
+    forest = CompiledForest.from_sklearn(model)
+    predicted = forest.predict(X_test)
+    return {
+        "params": params,
+        "mae": float(mean_absolute_error(y_test, predicted)),
+        "r2": float(r2_score(y_test, predicted)),
+        **measure_latency(forest, X_test),
+        "pickle_mb": len(pickle.dumps(model)) / 1e6,
+        "compiled_mb": forest.nbytes / 1e6,
+        "nodes": int(len(forest.value)),
+        "fit_s": fit_s,
+    }
+
+
+def choose(results: List[Dict[str, Any]], latency_budget_ms: float = None) -> Dict[str, Any]:
+    """MAE terendah di antara kandidat yang p99 single-row <= budget (tanpa budget: MAE terendah)."""
+    eligible = [r for r in results if latency_budget_ms is None or r["single_p99_ms"] <= latency_budget_ms]
+    if not eligible:
+        print(f"Warning: tidak ada kandidat dengan p99 <= {latency_budget_ms} ms, pilih yang tercepat.")
+        return min(results, key=lambda r: r["single_p99_ms"])
+    return min(eligible, key=lambda r: (r["mae"], r["single_p99_ms"]))
+
+
+def print_results(name: str, results: List[Dict[str, Any]], chosen: Dict[str, Any]):
+    print(f"\n[{name}]")
+    print(f"{'n_est':>6}{'depth':>7}{'leaf':>6}{'MAE':>11}{'R2':>8}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'rows/s':>10}{'pkl MB':>8}{'cmp MB':>8}{'fit s':>7}")
+    for r in sorted(results, key=lambda r: r["mae"]):
+        p = r["params"]
+        mark = " *" if r is chosen else ""
+        print(f"{p['n_estimators']:>6}{str(p['max_depth']):>7}{p['min_samples_leaf']:>6}{r['mae']:>11.3f}{r['r2']:>8.3f}"
+              f"{r['single_p50_ms']:>9.3f}{r['single_p99_ms']:>9.3f}{r['batch_rows_per_s']:>10.0f}"
+              f"{r['pickle_mb']:>8.2f}{r['compiled_mb']:>8.2f}{r['fit_s']:>7.2f}{mark}")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_model(model, path: str):
+    """
+    Pickle (format sama dengan try.py) ditulis atomik, lalu artefak compiled-nya
+    sebagai versi baru (CURRENT ditukar atomik, file yang di-mmap worker tidak ditimpa).
+    """
+    buffer = io.BytesIO()
+    pickle.dump(model, buffer)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp, path)
+    CompiledForest.from_sklearn(model).save(compiled_path(path))
+
+
+def write_manifest(out_dir: str, entries: Dict[str, Dict[str, Any]]):
+    """Gabungkan entry baru ke models/manifest.json (entry model lain dipertahankan)."""
+    path = os.path.join(out_dir, "manifest.json")
+    manifest = {"models": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+    manifest.setdefault("models", {}).update(entries)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def train_model(name: str, df: pd.DataFrame, grid: Dict[str, List[Any]], seed: int, n_jobs: int,
+                test_size: float, latency_budget_ms: float) -> Dict[str, Any]:
+    spec = MODEL_SPECS[name]
+    data = df.dropna(subset=spec["features"] + [spec["target"]])
+    X = data[spec["features"]].to_numpy(dtype=np.float64)
+    y = data[spec["target"]].to_numpy(dtype=np.float64)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+
+    candidates = candidate_grid(grid)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_candidate)(params, X_train, y_train, X_test, y_test, seed) for params in candidates
+    )
+    chosen = choose(results, latency_budget_ms)
+    print_results(name, results, chosen)
+
+    # Model final: konfigurasi terpilih dilatih ulang pada seluruh data (seed sama)
+    final = RandomForestRegressor(random_state=seed, n_jobs=n_jobs, **chosen["params"])
+    final.fit(pd.DataFrame(X, columns=spec["features"]), y)
+    return {"model": final, "chosen": chosen, "results": results, "rows": len(data)}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Training model mining/shipping dengan kandidat paralel.")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODEL_SPECS), default=sorted(MODEL_SPECS))
+    parser.add_argument("--data", default="Mining_Clean3.csv")
+    parser.add_argument("--out", default="models")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="-1 = semua core")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="batas p99 predict single-row (CompiledForest)")
+    parser.add_argument("--grid", default=None, help="JSON grid kandidat, misal '{\"n_estimators\": [100]}'")
+    parser.add_argument("--dry-run", action="store_true", help="hanya laporan, tidak menulis model")
+    args = parser.parse_args(argv)
+
+    grid = dict(DEFAULT_GRID)
+    if args.grid:
+        grid.update(json.loads(args.grid))
+
+    df = load_training_frame(args.data)
+    data_sha = file_sha256(args.data)
+    os.makedirs(args.out, exist_ok=True)
+
+    entries = {}
+    for name in args.models:
+        trained = train_model(name, df, grid, args.seed, args.n_jobs, args.test_size, args.latency_budget_ms)
+        chosen = trained["chosen"]
+        created_at = datetime.datetime.now()
+        params_key = json.dumps(chosen["params"], sort_keys=True)
+        version = created_at.strftime("%Y%m%d%H%M%S") + "-" + hashlib.sha1(
+            f"{params_key}{data_sha}{args.seed}".encode()).hexdigest()[:8]
+        entries[name] = {
+            "version": version,
+            "path": MODEL_SPECS[name]["file"],
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "features": list(MODEL_SPECS[name]["features"]),
+            "target": MODEL_SPECS[name]["target"],
+            "params": chosen["params"],
+            "seed": args.seed,
+            "metrics": {k: v for k, v in chosen.items() if k != "params"},
+            "latency_budget_ms": args.latency_budget_ms,
+            "data": {"path": args.data, "rows": trained["rows"], "sha256": data_sha},
+        }
+        if not args.dry_run:
+            write_model(trained["model"], os.path.join(args.out, MODEL_SPECS[name]["file"]))
+            print(f"{name}: versi {version} -> {os.path.join(args.out, MODEL_SPECS[name]['file'])}")
+
+    if not args.dry_run:
+        # Manifest ditulis terakhir: ModelRegistry baru melihat versi baru setelah semua file siap
+        print(f"manifest: {write_manifest(args.out, entries)}")
+
+
+if __name__ == "__main__":
+    main()